@@ -0,0 +1,100 @@
+# bench/bench_extract.py
+"""
+Parität und Laufzeit der Tabellen-Extraktion: BeautifulSoup ("bs4") gegen lxml direkt ("lxml").
+
+1. Parität: für jede Fixture (und jede vergrößerte Kopie) müssen scrape_frames() und
+   normalize_frames() mit beiden Parsern exakt gleiche DataFrames liefern (Werte, Spalten,
+   Reihenfolge). Abweichung → Exit-Code 1.
+2. Benchmark: parse_tables() + beide Frame-Varianten, bestes von --repeat Läufen.
+
+Fixtures: webuntis_subst_raw_*.html im Repo-Root und in docs/.
+Vergrößerte Kopien: die <tbody>-Zeilen jeder Tabelle werden --scale-fach wiederholt.
+
+Usage (from repo root):
+    python bench/bench_extract.py
+    python bench/bench_extract.py --scale 1 10 100 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from untis_extract import PARSERS, normalize_frames, parse_tables, scrape_frames  # noqa: E402
+
+TBODY_RE = re.compile(r"(<tbody[^>]*>)(.*?)(</tbody>)", re.S | re.I)
+
+
+def fixtures() -> list[Path]:
+    return sorted(ROOT.glob("webuntis_subst_raw_*.html")) + sorted((ROOT / "docs").glob("webuntis_subst_raw_*.html"))
+
+
+def enlarge(html: str, scale: int) -> str:
+    """Wiederholt den Inhalt jedes <tbody> scale-mal (gleiche Struktur, mehr Zeilen)."""
+    if scale <= 1:
+        return html
+    return TBODY_RE.sub(lambda m: m.group(1) + m.group(2) * scale + m.group(3), html)
+
+
+def extract(html: str, parser: str):
+    tables = parse_tables(html, parser)
+    return scrape_frames(tables), normalize_frames(tables)
+
+
+def frames_equal(a, b) -> bool:
+    return len(a) == len(b) and all(
+        list(x.columns) == list(y.columns) and x.equals(y) for x, y in zip(a, b)
+    )
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Parität + Benchmark bs4 vs. lxml für untis_extract.")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10],
+                    help="Vergrößerungsfaktoren für die tbody-Zeilen (default: %(default)s)")
+    ap.add_argument("--repeat", type=int, default=3, help="Wiederholungen je Messung (default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    files = fixtures()
+    if not files:
+        print("[warn] keine webuntis_subst_raw_*.html gefunden", file=sys.stderr)
+        return 1
+
+    failed = False
+    print(f"{'fixture':<40} {'scale':>5} {'rows':>7} " + " ".join(f"{p + ' ms':>10}" for p in PARSERS) + f" {'speedup':>8}")
+    for path in files:
+        base = path.read_text(encoding="utf-8", errors="ignore")
+        for scale in args.scale:
+            html = enlarge(base, scale)
+            results = {p: extract(html, p) for p in PARSERS}
+            ref_scrape, ref_norm = results[PARSERS[0]]
+            for p in PARSERS[1:]:
+                s, n = results[p]
+                if not frames_equal(ref_scrape, s) or not frames_equal(ref_norm, n):
+                    print(f"[FAIL] {path.relative_to(ROOT)} x{scale}: {p} weicht von {PARSERS[0]} ab")
+                    failed = True
+            rows = sum(len(df) for df in ref_norm)
+            ms = {p: best_of(lambda p=p: extract(html, p), args.repeat) * 1000 for p in PARSERS}
+            speedup = ms["bs4"] / ms["lxml"] if ms["lxml"] else float("inf")
+            print(f"{str(path.relative_to(ROOT)):<40} {scale:>5} {rows:>7} "
+                  + " ".join(f"{ms[p]:>10.1f}" for p in PARSERS) + f" {speedup:>7.1f}x")
+
+    print("PARITY FAIL" if failed else "PARITY OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# bench/bench_fcp.py
+"""
+First-Contentful-Paint und "erste Zeile sichtbar" für die Report-Seiten, gemessen mit
+Headless-Chromium (Playwright) gegen einen lokalen HTTP-Server.
+
+Verglichen werden (Standard: site/ aus build_site.py):
+- dynamic: report_all.html – jQuery/DataTables/i18n vom CDN, danach JSON-Abruf
+- static:  index.html mit --render static – Tabelle vorgerendert, Skript inline
+
+Gemessen je Seite und Lauf (frischer Browser-Kontext, kein Cache):
+- fcp_ms:   performance-Eintrag "first-contentful-paint"
+- rows_ms:  bis die erste Tabellenzeile sichtbar ist (#tbl tbody tr)
+- requests: Anzahl Anfragen, davon extern (nicht localhost)
+
+--throttle simuliert ein langsames Mobilnetz (CDP Network.emulateNetworkConditions, nur
+Chromium); die dynamische Seite braucht Internetzugang für die CDN-Dateien.
+
+Usage (from repo root):
+    python build_site.py --from-raw && python bench/bench_fcp.py
+    python bench/bench_fcp.py --dir docs --runs 10 --throttle
+    python bench/bench_fcp.py --page dynamic=report_all.html?cls=8c --page static=index.html?cls=8c
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import statistics
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# ~1,6 Mbit/s down, 750 kbit/s up, 150 ms RTT ("Fast 3G" der DevTools)
+THROTTLE = {"offline": False, "latency": 150,
+            "downloadThroughput": 1.6 * 1024 * 1024 / 8, "uploadThroughput": 750 * 1024 / 8}
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory: Path) -> tuple[ThreadingHTTPServer, str]:
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/"
+
+
+def measure(browser, url: str, throttle: bool, timeout_ms: int) -> dict:
+    ctx = browser.new_context()
+    page = ctx.new_page()
+    requests: list[str] = []
+    page.on("request", lambda r: requests.append(r.url))
+    if throttle:
+        cdp = ctx.new_cdp_session(page)
+        cdp.send("Network.enable")
+        cdp.send("Network.emulateNetworkConditions", THROTTLE)
+    try:
+        page.goto(url, wait_until="commit", timeout=timeout_ms)
+        page.wait_for_selector("#tbl tbody tr", state="visible", timeout=timeout_ms)
+        rows_ms = page.evaluate("performance.now()")
+        fcp_ms = page.evaluate("""() => new Promise(resolve => {
+            const hit = performance.getEntriesByName('first-contentful-paint')[0];
+            if (hit) return resolve(hit.startTime);
+            new PerformanceObserver(l => resolve(l.getEntries()[0].startTime))
+              .observe({type: 'paint', buffered: true});
+        })""")
+    finally:
+        ctx.close()
+    local = url.split("/", 3)[2]
+    return {"fcp_ms": fcp_ms, "rows_ms": rows_ms, "requests": len(requests),
+            "external": sum(1 for u in requests if local not in u)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="FCP-Benchmark: dynamischer vs. vorgerenderter Report.")
+    ap.add_argument("--dir", type=Path, default=ROOT / "site", help="zu servierender Ordner (default: site/)")
+    ap.add_argument("--page", action="append", metavar="NAME=PFAD",
+                    help="Seite (mehrfach); default: dynamic=report_all.html, static=index.html")
+    ap.add_argument("--runs", type=int, default=5, help="Läufe je Seite (default: %(default)s)")
+    ap.add_argument("--throttle", action="store_true", help="langsames Mobilnetz simulieren")
+    ap.add_argument("--timeout", type=int, default=30000, help="Timeout je Lauf in ms (default: %(default)s)")
+    ap.add_argument("--json", type=Path, help="Ergebnisse zusätzlich als JSON schreiben")
+    args = ap.parse_args(argv)
+
+    try:
+        from playwright.sync_api import Error as PlaywrightError, sync_playwright
+    except ImportError:
+        print("[error] playwright nicht installiert (pip install playwright && playwright install chromium)",
+              file=sys.stderr)
+        return 1
+
+    pages = dict(p.split("=", 1) for p in (args.page or ["dynamic=report_all.html", "static=index.html"]))
+    missing = [p for p in pages.values() if not (args.dir / p.split("?")[0]).exists()]
+    if missing:
+        print(f"[error] fehlt in {args.dir}: {', '.join(missing)} (erst build_site.py laufen lassen)",
+              file=sys.stderr)
+        return 1
+
+    srv, base = serve(args.dir)
+    results: dict[str, list[dict]] = {}
+    try:
+        with sync_playwright() as p:
+            try:
+                browser = p.chromium.launch()
+            except PlaywrightError as e:
+                print(f"[error] Chromium startet nicht: {str(e).splitlines()[0]}", file=sys.stderr)
+                return 1
+            for name, path in pages.items():
+                results[name] = []
+                for _ in range(args.runs):
+                    try:
+                        results[name].append(measure(browser, base + path, args.throttle, args.timeout))
+                    except PlaywrightError as e:
+                        print(f"[warn] {name}: {str(e).splitlines()[0]}")
+            browser.close()
+    finally:
+        srv.shutdown()
+
+    print(f"{'page':<10} {'runs':>4} {'fcp ms':>9} {'rows ms':>9} {'req':>5} {'extern':>7}"
+          + ("   (gedrosselt)" if args.throttle else ""))
+    summary = {}
+    for name, runs in results.items():
+        if not runs:
+            print(f"{name:<10} {0:>4} {'–':>9} {'–':>9}")
+            continue
+        summary[name] = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        s = summary[name]
+        print(f"{name:<10} {len(runs):>4} {s['fcp_ms']:>9.0f} {s['rows_ms']:>9.0f} {s['requests']:>5.0f} {s['external']:>7.0f}")
+    if "dynamic" in summary and "static" in summary and summary["static"]["rows_ms"]:
+        print(f"erste Zeile: static {summary['dynamic']['rows_ms'] / summary['static']['rows_ms']:.1f}x schneller (Median)")
+    if args.json:
+        args.json.write_text(json.dumps({"throttle": args.throttle, "median": summary, "runs": results}, indent=2),
+                             encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# bench/bench_normalize.py
+"""
+Laufzeit von untis_normalize.normalize() auf synthetisch vergrößerten Eingaben.
+
+Die Frames der webuntis_subst_raw_*.html (Repo-Root und docs/) werden so oft mit
+fortlaufendem Datum wiederholt, bis --rows Zeilen erreicht sind; jede Kopie bleibt
+dadurch bei der Dubletten-Erkennung erhalten (wie ein Schuljahr archivierter Snapshots).
+
+Mit --baseline REV wird zusätzlich die untis_normalize.py aus diesem Git-Stand geladen,
+gleich gemessen und ihr Ergebnis mit dem aktuellen verglichen (Abweichung → Exit-Code 1).
+
+Usage (from repo root):
+    python bench/bench_normalize.py
+    python bench/bench_normalize.py --rows 10000 100000 1000000
+    python bench/bench_normalize.py --rows 10000 50000 --baseline HEAD~1
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+import types
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import untis_normalize  # noqa: E402
+from untis_extract import parse_tables  # noqa: E402
+
+
+def base_frames() -> list[pd.DataFrame]:
+    frames = []
+    for path in sorted(ROOT.glob("webuntis_subst_raw_*.html")) + sorted((ROOT / "docs").glob("webuntis_subst_raw_*.html")):
+        html = path.read_text(encoding="utf-8", errors="ignore")
+        frames += untis_normalize.frames_for_day(parse_tables(html, "lxml"), "")
+    return frames
+
+
+def synth(frames: list[pd.DataFrame], rows: int) -> list[pd.DataFrame]:
+    """Wiederholt jeden Frame mit je eigenem Datum, bis insgesamt mindestens rows Zeilen vorliegen."""
+    per_copy = sum(len(df) for df in frames)
+    copies = -(-rows // per_copy)
+    start = date(2025, 8, 1)
+    dates = [(start + timedelta(days=i)).strftime("%d.%m.%Y") for i in range(copies)]
+    return [pd.concat([df.assign(__datum=d) for d in dates], ignore_index=True) for df in frames]
+
+
+def load_baseline(rev: str) -> types.ModuleType:
+    src = subprocess.run(["git", "show", f"{rev}:untis_normalize.py"], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    mod = types.ModuleType(f"untis_normalize_{rev}")
+    exec(compile(src, f"{rev}:untis_normalize.py", "exec"), mod.__dict__)
+    return mod
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark für untis_normalize.normalize().")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                    help="Zeilenzahlen der synthetischen Eingabe (default: %(default)s)")
+    ap.add_argument("--baseline", metavar="REV", help="zum Vergleich: untis_normalize.py aus Git-Stand REV")
+    args = ap.parse_args(argv)
+
+    frames = base_frames()
+    if not frames:
+        print("[warn] keine webuntis_subst_raw_*.html gefunden", file=sys.stderr)
+        return 1
+    baseline = load_baseline(args.baseline) if args.baseline else None
+
+    failed = False
+    header = f"{'rows in':>9} {'rows out':>9} {'normalize s':>12} {'rows/s':>10}"
+    if baseline:
+        header += f" {'baseline s':>11} {'speedup':>8}"
+    print(header)
+    for rows in args.rows:
+        data = synth(frames, rows)
+        n_in = sum(len(df) for df in data)
+        df_out, t = timed(untis_normalize.normalize, data, "")
+        line = f"{n_in:>9} {len(df_out):>9} {t:>12.3f} {n_in / t:>10.0f}"
+        if baseline:
+            df_ref, t_ref = timed(baseline.normalize, data, "")
+            line += f" {t_ref:>11.3f} {t_ref / t:>7.1f}x"
+            if not df_out.equals(df_ref) or list(df_out.columns) != list(df_ref.columns):
+                line += "  [FAIL] Ergebnis weicht ab"
+                failed = True
+        print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
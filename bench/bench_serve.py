@@ -0,0 +1,142 @@
+# bench/bench_serve.py
+"""
+Offline-Selbsttest und Latenzmessung für untis_serve.py – ohne Netz, gegen 127.0.0.1.
+
+Kopiert den normalisierten Stand in ein Temp-Verzeichnis, startet den Dienst auf einem
+freien Port und prüft:
+- /subst?cls=… liefert dieselben Zeilen wie untis_shards.group() für diese Klasse,
+- cls+date ist die Schnittmenge, teacher findet Tokens aus dem Klartext,
+- If-None-Match mit dem ETag → 304 ohne Inhalt,
+- nach Änderung der Datei → neuer Stand, altes ETag → 200; halb geschriebene Datei → alter Stand.
+Danach Median-Latenz für 200 (Cache warm) und 304 über --requests Anfragen.
+
+Usage (from repo root):
+    python bench/bench_serve.py
+    python bench/bench_serve.py --src untis_subst_normalized.json --requests 2000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import quote
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import untis_serve  # noqa: E402
+import untis_shards  # noqa: E402
+
+
+def fetch(url: str, etag: str | None = None) -> tuple[int, dict, bytes]:
+    req = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as r:
+            return r.status, dict(r.headers), r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def check(cond: bool, msg: str, failures: list[str]) -> None:
+    if not cond:
+        failures.append(msg)
+        print(f"[FAIL] {msg}")
+
+
+def selftest(base: str, src: Path, srv, failures: list[str]) -> str:
+    records = json.loads(src.read_text(encoding="utf-8"))
+    by_cls, _ = untis_shards.group(records)
+    cls = max(by_cls, key=lambda c: len(by_cls[c]))
+
+    st, hdr, body = fetch(f"{base}/subst?cls={quote(cls)}")
+    doc = json.loads(body)
+    check(st == 200 and doc["rows"] == by_cls[cls], f"/subst?cls={cls}: {st}, {doc.get('count')} Zeilen", failures)
+    etag = hdr.get("ETag")
+    st, _, body = fetch(f"{base}/subst?cls={quote(cls.upper())}", etag)
+    check(st == 304 and body == b"", f"If-None-Match (Großschreibung) → {st}", failures)
+
+    datum = records[untis_shards.build_index(records)["classes"][cls][0]]["datum"]
+    want = [r for r in by_cls[cls] if r["datum"] == datum]
+    iso = "-".join(reversed(datum.split(".")))
+    st, _, body = fetch(f"{base}/subst?cls={quote(cls)}&date={iso}")
+    check(st == 200 and json.loads(body)["rows"] == want, f"cls+date ({iso}) → {len(want)} Zeilen", failures)
+
+    meta = json.loads(fetch(f"{base}/meta")[2])
+    if meta["teachers"]:
+        t = max(meta["teachers"], key=meta["teachers"].get)
+        doc = json.loads(fetch(f"{base}/subst?teacher={quote(t)}")[2])
+        check(doc["count"] == meta["teachers"][t] > 0, f"teacher={t} → {doc['count']} Zeilen", failures)
+    check(fetch(f"{base}/subst?klasse=8c")[0] == 400, "unbekannter Parameter → 400", failures)
+    check(fetch(f"{base}/nix")[0] == 404, "unbekannter Pfad → 404", failures)
+
+    # Hot Reload: halb geschrieben → alter Stand; vollständig → neuer Stand
+    path = srv.store.src
+    old = srv.store.index.version
+    path.write_text("[{", encoding="utf-8")
+    st, hdr2, _ = fetch(f"{base}/subst?cls={quote(cls)}", etag)
+    check(st == 304 and hdr2.get("ETag") == etag, f"halb geschriebene Datei → {st} (alter Stand)", failures)
+    path.write_text(json.dumps(records[:-1], ensure_ascii=False, indent=2), encoding="utf-8")
+    st, hdr2, body = fetch(f"{base}/subst?cls={quote(cls)}", etag)
+    check(st == 200 and hdr2.get("ETag") != etag and srv.store.index.version != old,
+          f"nach Änderung → {st}, Stand {srv.store.index.version}", failures)
+    path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+    return cls
+
+
+def timed(url: str, n: int, etag: str | None = None) -> float:
+    ts = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fetch(url, etag)
+        ts.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(ts)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Selbsttest + Latenz für untis_serve.py (offline).")
+    ap.add_argument("--src", type=Path, default=ROOT / "docs" / "untis_subst_normalized.json",
+                    help="normalisierter Stand (default: docs/untis_subst_normalized.json)")
+    ap.add_argument("--requests", type=int, default=500, help="Anfragen je Messung (default: %(default)s)")
+    args = ap.parse_args(argv)
+    if not args.src.exists():
+        print(f"[error] {args.src} nicht gefunden", file=sys.stderr)
+        return 1
+
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "untis_subst_normalized.json"
+        shutil.copyfile(args.src, src)
+        srv = untis_serve.make_server(src, port=0, poll=0, quiet=True)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        base = "http://127.0.0.1:%d" % srv.server_address[1]
+        try:
+            cls = selftest(base, args.src, srv, failures)
+            srv.store.poll = untis_serve.POLL_S
+            url = f"{base}/subst?cls={quote(cls)}"
+            _, hdr, _ = fetch(url)
+            t200 = timed(url, args.requests)
+            t304 = timed(url, args.requests, hdr.get("ETag"))
+        finally:
+            srv.shutdown()
+            srv.server_close()
+
+    print(f"{'Anfrage':<28} {'Median ms':>10}")
+    print(f"{'/subst?cls=' + cls + ' (200)':<28} {t200:>10.3f}")
+    print(f"{'/subst?cls=' + cls + ' (304)':<28} {t304:>10.3f}")
+    if failures:
+        print(f"[error] {len(failures)} Prüfungen fehlgeschlagen", file=sys.stderr)
+        return 1
+    print("OK. Selbsttest bestanden (ETag/304, Schnittmengen, Hot Reload)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
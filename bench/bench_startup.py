@@ -0,0 +1,139 @@
+# bench/bench_startup.py
+"""
+Kaltstart der leichten Einstiegspunkte: Importzeit (python -X importtime) und Laufzeit
+eines typischen Aufrufs als eigener Prozess – das, was auf Kiosk-PC/Raspberry Pi zählt.
+
+Je Einstiegspunkt:
+- import_ms:  kumulierte Importzeit des Moduls laut -X importtime (Median aus --runs)
+- heavy:      davon geladene schwere Pakete (pandas, numpy, bs4, lxml, playwright, requests)
+- run_ms:     Wandzeit des ganzen Prozesses für einen typischen Aufruf (Median aus --runs)
+
+Aufrufe (Arbeitsordner mit docs/untis_subst_normalized.json, Suchindex, webuntis_subst.json):
+    untis_filter.py -c 8c | untis_report.py -i <clean.csv> | untis_inspect.py <normalisiert>
+    untis_inspect.py (webuntis_subst.json) | untis_monitor_scrape.py --help
+(ältere Stände ohne Pfad-Argument lesen bei inspect_normalized webuntis_subst.json)
+
+Mit --rev REV wird derselbe Satz für den Git-Stand REV gemessen (git archive in einen
+Temp-Ordner) und gegenübergestellt.
+
+Usage (from repo root):
+    python bench/bench_startup.py
+    python bench/bench_startup.py --rev HEAD~1 --runs 10 --out /tmp/startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import untis_search  # noqa: E402
+
+HEAVY = ("pandas", "numpy", "bs4", "lxml", "playwright", "requests")
+CLEAN_CSV = "untis_subst_8c_clean.csv"
+CASES = [  # (Name, Modul, Skript-Argumente)
+    ("filter", "untis_filter", ["untis_filter.py", "-c", "8c"]),
+    ("report", "untis_report", ["untis_report.py", "-i", CLEAN_CSV, "-o", "report_8c.html"]),
+    ("inspect_normalized", "untis_inspect", ["untis_inspect.py", "untis_subst_normalized.json"]),
+    ("inspect_scrape", "untis_inspect", ["untis_inspect.py"]),
+    ("scrape_help", "untis_monitor_scrape", ["untis_monitor_scrape.py", "--help"]),
+]
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\| ( *)(\S+)")  # Einrückung = Tiefe
+
+
+def import_profile(tree: Path, module: str) -> tuple[float, list[str]]:
+    """(kumulierte Importzeit in ms, geladene schwere Pakete) für "import module" in tree."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=tree,
+                         capture_output=True, text=True, check=True).stderr
+    total, heavy = 0.0, set()
+    for m in _LINE_RE.finditer(err):
+        name = m.group(4)
+        if name == module and not m.group(3):
+            total = int(m.group(2)) / 1000
+        if name.split(".")[0] in HEAVY:
+            heavy.add(name.split(".")[0])
+    return total, sorted(heavy)
+
+
+def run_ms(tree: Path, work: Path, argv: list[str]) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(tree / argv[0]), *argv[1:]], cwd=work,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - t0) * 1000
+
+
+def prepare_work(work: Path) -> None:
+    """Eingaben für die Aufrufe; die Clean-CSV entsteht einmal mit dem aktuellen untis_filter.py."""
+    work.mkdir(parents=True, exist_ok=True)
+    records = json.loads((ROOT / "docs" / "untis_subst_normalized.json").read_text(encoding="utf-8"))
+    src = work / "untis_subst_normalized.json"
+    src.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    untis_search.search_path(src).write_text(json.dumps(untis_search.build_search_index(records)), encoding="utf-8")
+    shutil.copy2(ROOT / "docs" / "webuntis_subst.json", work / "webuntis_subst.json")
+    subprocess.run([sys.executable, str(ROOT / "untis_filter.py"), "-c", "8c"], cwd=work,
+                   stdout=subprocess.DEVNULL, check=True)
+
+
+def export_rev(rev: str, dest: Path) -> Path:
+    data = subprocess.run(["git", "archive", rev], cwd=ROOT, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        tar.extractall(dest)
+    return dest
+
+
+def measure_tree(tree: Path, work: Path, runs: int) -> dict[str, dict]:
+    out = {}
+    for name, module, argv in CASES:
+        run_ms(tree, work, argv)  # Aufwärmen (.pyc schreiben, Dateicache)
+        imports = [import_profile(tree, module) for _ in range(runs)]
+        out[name] = {"import_ms": round(statistics.median(t for t, _ in imports), 1),
+                     "heavy": imports[0][1],
+                     "run_ms": round(statistics.median(run_ms(tree, work, argv) for _ in range(runs)), 1)}
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Kaltstart der leichten Einstiegspunkte messen (-X importtime).")
+    ap.add_argument("--runs", type=int, default=5, help="Wiederholungen je Messung (default: %(default)s)")
+    ap.add_argument("--rev", help="zusätzlich diesen Git-Stand messen und vergleichen, z. B. HEAD~1")
+    ap.add_argument("--out", type=Path, help="Ergebnis als JSON")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="untis_startup_") as tmp:
+        tmp = Path(tmp)
+        prepare_work(tmp / "work")
+        results = {"current": measure_tree(ROOT, tmp / "work", args.runs)}
+        if args.rev:
+            results[args.rev] = measure_tree(export_rev(args.rev, tmp / "rev"), tmp / "work", args.runs)
+
+    cur = results["current"]
+    base = results.get(args.rev) if args.rev else None
+    print(f"{'Aufruf':<20} {'Import ms':>10} {'Lauf ms':>9}  {'schwere Pakete':<14}"
+          + (f"   | {args.rev}: Import / Lauf ms (schwere Pakete), Lauf vorher/nachher" if base else ""))
+    for name, r in cur.items():
+        line = f"{name:<20} {r['import_ms']:>10.1f} {r['run_ms']:>9.1f}  {', '.join(r['heavy']) or '–':<14}"
+        if base:
+            b = base[name]
+            line += (f"   | {b['import_ms']:>7.1f} / {b['run_ms']:>7.1f} ({', '.join(b['heavy']) or '–'}), "
+                     f"×{b['run_ms'] / r['run_ms']:.2f}")
+        print(line)
+    if args.out:
+        args.out.write_text(json.dumps({"runs": args.runs, "python": sys.version.split()[0], "results": results},
+                                       ensure_ascii=False, indent=2), encoding="utf-8")
+    print("OK." + (f" → {args.out}" if args.out else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# bench/bench_suite.py
+"""
+Offline-Benchmark-Suite über die eingecheckten Monitor-Fixtures, mit synthetischer Skalierung.
+
+Fixtures:
+- webuntis_subst_raw_*.html (Repo-Root und docs/): Monitor-Slides
+- docs/untis_subst_normalized.json: normalisierter Stand
+
+Generator: jede Kopie der <tbody>-Zeilen (bzw. der normalisierten Zeilen) bekommt eigene
+Klassennamen ("8c" → "8c-3", "8a, 8b" → "8a-3, 8b-3"), damit bei 10×–1000× die Zeilen
+verschieden bleiben (Dubletten-Entfernung) und entsprechend viele Klassen entstehen.
+
+Gemessen je Skalierung (bestes und Median aus --repeat Läufen nach einem Aufwärmlauf, in ms):
+- extract_tables[p]            untis_monitor_scrape.extract_tables (Scrape-Frames)
+- extract_tables_from_html[p]  untis_normalize.extract_tables_from_html (Text + Zell-HTML)
+- extract_cell_html[p]         tools/html_keep_strike.extract_cell_html über alle <td> (ohne Parsen)
+- normalize_main[p]            untis_normalize.main(--force) auf beiden Slides, in einem Temp-Ordner
+- filter_class / filter_grep   untis_filter.main(-c …) bzw. (--grep …) auf dem normalisierten Stand
+- report[r]                    untis_report.run auf der Clean-CSV aller Klassen (datatables/static)
+(p = Parser bs4/lxml, r = Render-Modus)
+
+Ergebnis als JSON (--out); mit --baseline wird gegen eine frühere Ergebnisdatei verglichen:
+ist ein Fall um mehr als --threshold (relativ, bestes Ergebnis) langsamer, Exit-Code 1.
+Fälle unter --min-ms in der Baseline werden nicht bewertet (Messrauschen).
+Kein Netzwerk, kein Browser; alle Ausgaben landen in einem Temp-Ordner.
+
+Usage (from repo root):
+    python bench/bench_suite.py                                   # Skalierung 1, 10, 100
+    python bench/bench_suite.py --out bench/baseline.json         # Baseline festhalten
+    python bench/bench_suite.py --baseline bench/baseline.json --threshold 0.2
+    python bench/bench_suite.py --scale 1000 --parser lxml --only extract normalize
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import untis_filter  # noqa: E402
+import untis_monitor_scrape  # noqa: E402
+import untis_normalize  # noqa: E402
+import untis_report  # noqa: E402
+import untis_search  # noqa: E402
+from tools import html_keep_strike  # noqa: E402
+from untis_extract import PARSERS  # noqa: E402
+
+RESULTS = ROOT / "bench" / "results.json"
+NORMALIZED = ROOT / "docs" / "untis_subst_normalized.json"
+RENDERS = ("datatables", "static")
+VERSION = 1
+
+TBODY_RE = re.compile(r"(<tbody[^>]*>)(.*?)(</tbody>)", re.S | re.I)
+TR_RE = re.compile(r"<tr[^>]*>.*?</tr>", re.S | re.I)
+TD_RE = re.compile(r"(<td[^>]*>)(.*?)(</td>)", re.S | re.I)
+CLASS_CELLS = (0, 3)  # Gruppen- und Klassen-Spalte (Aufbau wie in den Fixtures)
+TOKEN_RE = re.compile(r"[^,\s;/|<>]+")
+
+
+# ---------- Fixtures + Generator ----------
+
+def raw_fixtures() -> list[Path]:
+    """Slide 1/2 für normalize: Repo-Root, sonst docs/."""
+    return sorted(ROOT.glob("webuntis_subst_raw_*.html")) or sorted((ROOT / "docs").glob("webuntis_subst_raw_*.html"))
+
+
+def _suffix_classes(text: str, k: int) -> str:
+    return TOKEN_RE.sub(lambda m: f"{m.group(0)}-{k}", text) if k else text
+
+
+def _suffix_row(row: str, k: int) -> str:
+    col = itertools.count()
+    return TD_RE.sub(lambda m: m.group(1) + _suffix_classes(m.group(2), k) + m.group(3)
+                     if next(col) in CLASS_CELLS else m.group(0), row)
+
+
+def synth_html(html: str, scale: int) -> str:
+    """Monitor-Slide mit scale-mal so vielen Zeilen, Kopie k mit Klassen "<klasse>-k"."""
+    if scale <= 1:
+        return html
+
+    def body(m: re.Match) -> str:
+        rows = TR_RE.findall(m.group(2))
+        return m.group(1) + "".join(_suffix_row(r, k) for k in range(scale) for r in rows) + m.group(3)
+
+    return TBODY_RE.sub(body, html)
+
+
+def synth_records(records: list[dict], scale: int) -> list[dict]:
+    """Normalisierter Stand, scale-mal; Info-Zeilen (gruppe 1) nur einmal."""
+    out = list(records)
+    for k in range(1, scale):
+        out += [{**r, "klasse": _suffix_classes(r.get("klasse") or "", k)} for r in records if r.get("gruppe") != 1]
+    return out
+
+
+def tbody_rows(html: str) -> int:
+    return sum(len(TR_RE.findall(m.group(2))) for m in TBODY_RE.finditer(html))
+
+
+# ---------- Messung ----------
+
+def measure(fn, repeat: int) -> tuple[float, float]:
+    """(bestes, Median) in ms nach einem ungemessenen Aufwärmlauf; Ausgaben werden verschluckt."""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - t0) * 1000)
+    return min(times), statistics.median(times)
+
+
+@contextlib.contextmanager
+def chdir(path: Path):
+    prev = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(prev)
+
+
+def cases_for_scale(scale: int, parsers: list[str], work: Path):
+    """(Name, Zeilen, Funktion) je Fall; Vorbereitung (Generator, Parsen, Dateien) ist nicht gemessen."""
+    slides = [synth_html(p.read_text(encoding="utf-8", errors="ignore"), scale) for p in raw_fixtures()]
+    html_rows = tbody_rows(slides[0])
+    norm_dir = work / f"normalize_{scale}"
+    norm_dir.mkdir()
+    for i, html in enumerate(slides, 1):
+        (norm_dir / untis_monitor_scrape.RAW_HTML_PATTERN.format(i)).write_text(html, encoding="utf-8")
+
+    for parser in parsers:
+        yield f"extract_tables[{parser}]", html_rows, lambda p=parser: untis_monitor_scrape.extract_tables(slides[0], p)
+        yield (f"extract_tables_from_html[{parser}]", html_rows,
+               lambda p=parser: untis_normalize.extract_tables_from_html(slides[0], p))
+        tree = BeautifulSoup(slides[0], "lxml") if parser == "bs4" else lxml.html.fromstring(slides[0])
+        cells = tree.find_all("td") if parser == "bs4" else list(tree.iter("td"))
+        yield (f"extract_cell_html[{parser}]", len(cells),
+               lambda cells=cells: [html_keep_strike.extract_cell_html(c) for c in cells])
+
+        def normalize_main(p=parser):
+            with chdir(norm_dir):
+                untis_normalize.main(["--force", "--parser", p])
+        yield f"normalize_main[{parser}]", sum(tbody_rows(h) for h in dict.fromkeys(slides)), normalize_main
+
+    # Filter/Report auf dem normalisierten Stand aus docs/ (synthetisch vergrößert)
+    records = synth_records(json.loads(NORMALIZED.read_text(encoding="utf-8")), scale)
+    filter_dir = work / f"filter_{scale}"
+    filter_dir.mkdir()
+    src = filter_dir / untis_filter.IN_JSON
+    src.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    untis_search.search_path(src).write_text(json.dumps(untis_search.build_search_index(records)), encoding="utf-8")
+    cls = next((r["klasse"].split(",")[0].strip() for r in records if r.get("gruppe") != 1 and r.get("klasse")), "8c")
+    word = next((w for r in records for w in untis_search.row_parts(r)[0].split() if len(w) > 3), "ma")
+
+    def run_filter(*argv):
+        with chdir(filter_dir):
+            untis_filter.main(list(argv))
+    yield "filter_class", len(records), lambda: run_filter("-c", cls)
+    yield "filter_grep", len(records), lambda: run_filter("--grep", word)
+
+    with chdir(filter_dir):
+        rows = untis_filter.clean(untis_filter.load(untis_filter.IN_JSON)[0])
+        csv = filter_dir / untis_filter.write_clean(rows, ["alle"])[0]
+    for render in RENDERS:
+        yield (f"report[{render}]", len(rows),
+               lambda r=render: untis_report.run(csv, filter_dir / f"report_{r}.html", None, 0, False, r))
+
+
+# ---------- Vergleich ----------
+
+def regressions(results: list[dict], baseline: list[dict], threshold: float, min_ms: float) -> list[str]:
+    base = {(b["case"], b["scale"]): b for b in baseline}
+    out = []
+    for r in results:
+        b = base.get((r["case"], r["scale"]))
+        if b is None or b["best_ms"] < min_ms:
+            continue
+        ratio = r["best_ms"] / b["best_ms"]
+        r["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            out.append(f"{r['case']} @{r['scale']}×: {b['best_ms']:.2f} → {r['best_ms']:.2f} ms (×{ratio:.2f})")
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline-Benchmarks über die Monitor-Fixtures mit synthetischer Skalierung.")
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100],
+                    help="Vergrößerungsfaktoren (default: %(default)s)")
+    ap.add_argument("--repeat", type=int, default=5, help="Wiederholungen je Messung (default: %(default)s)")
+    ap.add_argument("--parser", choices=PARSERS, nargs="+", default=list(PARSERS),
+                    help="Parser für die HTML-Fälle (default: %(default)s)")
+    ap.add_argument("--only", nargs="+", metavar="TEXT", help="nur Fälle, deren Name einen der Texte enthält")
+    ap.add_argument("--out", type=Path, default=RESULTS, help="Ergebnis-JSON (default: bench/results.json)")
+    ap.add_argument("--baseline", type=Path, help="frühere Ergebnis-JSON zum Vergleich")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="erlaubte Verlangsamung gegenüber der Baseline, relativ (default: %(default)s)")
+    ap.add_argument("--min-ms", type=float, default=1.0,
+                    help="Fälle unter dieser Baseline-Dauer nicht bewerten (default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    if not raw_fixtures() or not NORMALIZED.exists():
+        print("[error] Fixtures fehlen (webuntis_subst_raw_*.html, docs/untis_subst_normalized.json)", file=sys.stderr)
+        return 1
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[error] Baseline {args.baseline}: {e}", file=sys.stderr)
+            return 1
+
+    results: list[dict] = []
+    print(f"{'Fall':<34} {'scale':>5} {'Zeilen':>8} {'bestes ms':>10} {'Median ms':>10}")
+    with tempfile.TemporaryDirectory(prefix="untis_bench_") as tmp:
+        for scale in args.scale:
+            for name, rows, fn in cases_for_scale(scale, args.parser, Path(tmp)):
+                if args.only and not any(t in name for t in args.only):
+                    continue
+                best, median = measure(fn, args.repeat)
+                results.append({"case": name, "scale": scale, "rows": rows,
+                                "best_ms": round(best, 3), "median_ms": round(median, 3)})
+                print(f"{name:<34} {scale:>5} {rows:>8} {best:>10.2f} {median:>10.2f}")
+
+    failed = regressions(results, baseline, args.threshold, args.min_ms) if baseline is not None else []
+    doc = {"version": VERSION, "created": datetime.now().isoformat(timespec="seconds"),
+           "python": platform.python_version(), "platform": platform.platform(),
+           "repeat": args.repeat, "threshold": args.threshold, "results": results}
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    for line in failed:
+        print(f"[regression] {line}")
+    if failed:
+        print(f"{len(failed)} Regression(en) über {args.threshold:.0%} → {args.out}")
+        return 1
+    print(f"OK. {len(results)} Messungen → {args.out}" + (f" (Baseline {args.baseline}: keine Regression)" if baseline is not None else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,84 +1,181 @@
 # build_site.py
 # Baut ./site für GitHub Pages:
-# 1) Scrape (untis_monitor_scrape.py)
-# 2) Normalize (untis_normalize.py)
-# 3) Report (untis_report_all.py)
-# 4) Kopiert index + Debug-/Daten-Dateien nach ./site
-# 5) Listet den Inhalt von ./site für die CI-Logs
+# 1) Scrape → Normalize → Report in einem Prozess (untis_pipeline.run, HTTP-Modus mit Browser-Fallback)
+# 2) index.html vorgerendert (untis_report_all.py --render static), Debug-/Daten-Dateien,
+#    Shards je Klasse/Datum (untis_shards.py), Spaltenformat + .gz/.br (untis_compact.py)
+# 3) Listet den Inhalt von ./site für die CI-Logs
+#
+# Stufen-Cache (tools/stage_cache.py, .stage_manifest.json): sind Slides, Datum und Report
+# gegenüber dem zuletzt gebauten Stand unverändert, endet der Build nach dem Scrape, ohne
+# ./site neu zu bauen. In GitHub Actions wird dann skipped=true nach $GITHUB_OUTPUT
+# geschrieben, die Folgeschritte (docs, Cache-Bust, Header, Commit) entfallen. Das Manifest
+# wird nach site/ mitveröffentlicht und auf einem frischen Checkout aus docs/ gelesen;
+# fehlt site/ dort, wird es aus docs/ übernommen (pages.yml lädt site/ in jedem Fall hoch).
+#
+# Messwerte je Stufe (tools/instrument.py: Wand-/CPU-Zeit, Spitzen-RSS, I/O-Bytes, Zeilen)
+# landen als "perf" in site/debug_meta.json, mit --metrics-file zusätzlich als
+# Prometheus-Textfile (auch wenn der Build nach dem Scrape endet).
+#
+#   python build_site.py              # mit Scrape
+#   python build_site.py --from-raw   # vorhandene webuntis_subst_raw_*.html verwenden
+#   python build_site.py --force      # Cache ignorieren
+#   python build_site.py --render dynamic   # index.html = report_all.html statt vorgerendert
+#   python build_site.py --metrics-file /var/lib/node_exporter/textfile/untis.prom
 
 from pathlib import Path
-import subprocess
+import argparse
+import os
 import sys
 import shutil
 import json
 from datetime import datetime
 
+import untis_compact
+import untis_pipeline
+import untis_report_all
+import untis_shards
+import untis_store
+from tools.instrument import RECORDER, stage, write_prometheus
+from tools.stage_cache import MANIFEST, StageCache, code_hash, hash_file, hash_values, set_github_output
+
 ROOT = Path(__file__).parent.resolve()
 SITE = ROOT / "site"
+DOCS = ROOT / "docs"  # zuletzt veröffentlichter Stand (GitHub Pages)
 
-def run(cmd: list[str]) -> None:
-    print(f"[RUN] {' '.join(cmd)}")
-    res = subprocess.run(cmd, cwd=ROOT)
-    if res.returncode != 0:
-        print(f"[ERROR] Command failed with exit code {res.returncode}: {' '.join(cmd)}")
-        sys.exit(res.returncode)
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Baut ./site für GitHub Pages.")
+    ap.add_argument("--from-raw", action="store_true",
+                    help="nicht scrapen, vorhandene webuntis_subst_raw_*.html verarbeiten")
+    ap.add_argument("--mode", choices=["browser", "http", "auto"], default="auto",
+                    help="Scrape-Modus (default: %(default)s)")
+    ap.add_argument("--parser", choices=untis_pipeline.PARSERS, default="bs4",
+                    help="HTML-Parser für die Tabellen (default: %(default)s)")
+    ap.add_argument("--force", action="store_true",
+                    help="Stufen-Cache ignorieren, alle Stufen ausführen")
+    ap.add_argument("--store", type=Path, nargs="?", const=untis_store.DB_PATH,
+                    help="Stand an die Historie anhängen (untis_store.py)")
+    ap.add_argument("--render", choices=untis_report_all.RENDERS, default="static",
+                    help="index.html vorgerendert (static) oder als Kopie von report_all.html (dynamic); "
+                         "default: %(default)s")
+    ap.add_argument("--metrics-file", type=Path,
+                    help="Stufen-Messwerte zusätzlich als Prometheus-Textfile schreiben")
+    args = ap.parse_args(argv)
 
-def main() -> None:
     print(f"[INFO] Build start: {datetime.now().isoformat(timespec='seconds')}")
     print(f"[INFO] Python: {sys.executable}")
     print(f"[INFO] Project root: {ROOT}")
+    os.chdir(ROOT)
 
-    # 1) Scrape -> erzeugt u. a. webuntis_subst.json / raw_*.html
-    run([sys.executable, "untis_monitor_scrape.py"])
+    cache = StageCache.load(ROOT / MANIFEST, seed=DOCS / MANIFEST.name)
+    if args.force:
+        cache.invalidate("normalize", "report", "site")
 
-    # 2) Normalisieren -> erzeugt untis_subst_normalized.json
-    run([sys.executable, "untis_normalize.py"])
+    # 1–3) Scrape → Normalize → Report (report_all.html), alles im Speicher weitergereicht
+    untis_pipeline.run(mode=args.mode, from_raw=args.from_raw, parser=args.parser,
+                       cache=cache, published=DOCS, store=args.store)
 
-    # 3) Report (alle Klassen/Tage) -> erzeugt report_all.html
-    run([sys.executable, "untis_report_all.py"])
+    # Site-Stufe: Daten + Report + dieser Code. webuntis_subst.json (Scrape-Meta mit
+    # Zeitstempeln) zählt bewusst nicht, sonst wäre jeder Lauf eine Änderung.
+    site_code = code_hash(__file__, untis_shards.__file__, untis_compact.__file__, untis_report_all.__file__,
+                          ROOT / "tools" / "static_report.py")
+    site_key = hash_values(site_code, args.render, cache.stages.get("normalize", {}).get("inputs", ""),
+                           hash_file(ROOT / "report_all.html") or "")
+    if cache.fresh("site", site_key) and ((SITE / "index.html").exists() or (DOCS / "index.html").exists()):
+        print(cache.skip_message("site") + " – Build endet nach dem Scrape")
+        if not (SITE / "index.html").exists():
+            # frischer Checkout: veröffentlichten Stand übernehmen, damit site/ vollständig vorliegt
+            shutil.rmtree(SITE, ignore_errors=True)
+            shutil.copytree(DOCS, SITE)
+            print(f"[site] unverändert, aus {DOCS.name}/ übernommen")
+        if args.metrics_file:
+            write_prometheus(args.metrics_file, RECORDER.as_meta())
+        cache.save()
+        set_github_output(skipped=True)
+        return
 
     # 4) site/ neu aufbauen
     if SITE.exists():
         shutil.rmtree(SITE)
     SITE.mkdir(parents=True, exist_ok=True)
 
-    # 5) report_all.html als index.html veröffentlichen
+    # 5) index.html: vorgerenderte Standardansicht (--render static) oder report_all.html;
+    #    report_all.html (lädt JSON/Shards) wird in beiden Fällen mitveröffentlicht
     src_report = ROOT / "report_all.html"
     dst_index = SITE / "index.html"
     if not src_report.exists():
         print("[ERROR] report_all.html wurde nicht erzeugt – Abbruch.")
         sys.exit(1)
-    shutil.copy2(src_report, dst_index)
+    shutil.copy2(src_report, SITE / "report_all.html")
+    norm_json = ROOT / "untis_subst_normalized.json"
+    if args.render == "static" and norm_json.exists():
+        untis_report_all.build_static(json.loads(norm_json.read_text(encoding="utf-8")), dst_index)
+    else:
+        shutil.copy2(src_report, dst_index)
 
     # 6) Debug-/Daten-Artefakte mitveröffentlichen (falls vorhanden)
     publish_files = [
         "webuntis_subst.json",
         "untis_subst_normalized.json",
+        "untis_subst_normalized.index.json",
+        "untis_subst_normalized.search.json",
+        "delta.json",
         "webuntis_subst.csv",
         "webuntis_subst_raw_1.html",
         "webuntis_subst_raw_2.html",
     ]
-    for name in publish_files:
-        p = ROOT / name
-        if p.exists():
-            shutil.copy2(p, SITE / name)
+    with stage("site_copy") as m:
+        copied = 0
+        for name in publish_files:
+            p = ROOT / name
+            if p.exists():
+                shutil.copy2(p, SITE / name)
+                copied += 1
+        m["files"] = copied
+
+    # 6a) Shards je Klasse/Datum + manifest.json (report_all.html lädt bei ?cls=/?date= nur diese)
+    if norm_json.exists():
+        with stage("shards") as m:
+            manifest = untis_shards.write_shards(json.loads(norm_json.read_text(encoding="utf-8")), SITE / "shards")
+            m["rows"] = manifest["rows"]
+        print(f"[site] {len(manifest['classes'])} Klassen-, {len(manifest['dates'])} Datums-Shards")
 
-    # 6b) kompakte Meta-Datei schreiben (aus webuntis_subst.json)
+    # 6b) Meta-Daten des Scrapes (aus webuntis_subst.json) für debug_meta.json, geschrieben in 7c
+    meta = {}
     meta_src = ROOT / "webuntis_subst.json"
     if meta_src.exists():
         try:
-            data = json.loads(meta_src.read_text(encoding="utf-8"))
-            meta = data.get("meta", {})
-            (SITE / "debug_meta.json").write_text(
-                json.dumps(meta, ensure_ascii=False, indent=2),
-                encoding="utf-8"
-            )
+            meta = json.loads(meta_src.read_text(encoding="utf-8")).get("meta", {})
         except Exception as e:
-            print(f"[WARN] debug_meta.json konnte nicht erzeugt werden: {e}")
+            print(f"[WARN] debug_meta.json: Meta-Daten nicht lesbar: {e}")
+
+    # 6c) Spaltenformat (untis_compact.py) der großen JSON-Dateien + vorkomprimierte .gz/.br
+    #     für alle Daten-Dateien; HTML nicht, das ändern Cache-Bust/Header danach noch
+    #     (debug_meta.json ebenso wenig, die Nachbearbeitung hängt dort Messwerte an)
+    with stage("columnar"):
+        for name in ("untis_subst_normalized.json", "webuntis_subst.json"):
+            if (SITE / name).exists():
+                doc = json.loads((SITE / name).read_text(encoding="utf-8"))
+                untis_compact.write_columnar(doc, untis_compact.columnar_path(SITE / name))
+    with stage("precompress") as m:
+        data_files = sorted(p for p in SITE.rglob("*") if p.suffix in (".json", ".csv") and p.is_file())
+        packed = untis_compact.precompress(data_files)
+        m["files"] = len(packed)
+    print(f"[site] {len(packed)} vorkomprimierte Dateien" + ("" if untis_compact.brotli else " (ohne .br: brotli fehlt)"))
 
     # 7) robots.txt minimal
     (SITE / "robots.txt").write_text("User-agent: *\nAllow: /\n", encoding="utf-8")
 
+    # 7b) Stufen-Manifest mitveröffentlichen (Basis für den nächsten Lauf)
+    cache.record("site", site_key)
+    cache.save(copy_to=SITE)
+    set_github_output(skipped=False)
+
+    # 7c) debug_meta.json: Scrape-Meta + Messwerte aller Stufen dieses Prozesses
+    meta["perf"] = RECORDER.as_meta()
+    (SITE / "debug_meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.metrics_file:
+        write_prometheus(args.metrics_file, meta["perf"])
+
     # 8) Site-Inhalt für Logs ausgeben
     print("[SITE CONTENTS]")
     for p in sorted(SITE.rglob("*")):
@@ -5,6 +5,11 @@ import sys
 import time
 from pathlib import Path
 
+try:
+    from tools.instrument import RECORDER, append_to_meta
+except ImportError:  # als Skript gestartet: python tools/cache_bust_site.py
+    from instrument import RECORDER, append_to_meta
+
 
 def _get_version() -> str:
     """Return short SHA from CI or timestamp fallback."""
@@ -18,16 +23,17 @@ def _cache_bust_in_html(html_path: Path, version: str) -> bool:
     """Append/replace ?v=VERSION on known local assets inside HTML.
 
     We target the normalized outputs referenced by the report page(s):
-    - untis_subst_normalized.json
+    - untis_subst_normalized.json (and its .columnar.json/.index.json/.search.json siblings)
     - untis_subst_normalized.csv
+    - shards/manifest.json (shard files themselves are addressed by content hash)
 
     Any existing ?v=... is replaced with the new version.
     """
     text = html_path.read_text(encoding="utf-8")
 
-    # Match the two filenames with optional existing query and hash tail
+    # Match the known filenames with optional existing query and hash tail
     pattern = re.compile(
-        r"(?P<base>untis_subst_normalized\.(?:json|csv))(?:\?v=[^\"'#]*)?(?P<tail>(?:#[^\"']*)?)"
+        r"(?P<base>untis_subst_normalized(?:\.columnar|\.index|\.search)?\.(?:json|csv)|shards/manifest\.json)(?:\?v=[^\"'#]*)?(?P<tail>(?:#[^\"']*)?)"
     )
 
     def _repl(m: re.Match) -> str:
@@ -50,14 +56,20 @@ def main(site_dir: str = "site") -> int:
         print(f"[cache-bust] site dir not found: {site}", file=sys.stderr)
         return 1
 
-    changed_any = False
     # Restrict to report*.html to avoid touching unrelated pages
-    for html in site.rglob("*.html"):
-        if not html.name.startswith("report"):
-            continue
-        if _cache_bust_in_html(html, version):
-            print(f"[cache-bust] updated {html.relative_to(site)} -> v={version}")
-            changed_any = True
+    pages = sorted(h for h in site.rglob("*.html") if h.name.startswith("report"))
+
+    # No stage cache here: inject_header.py rewrites the same pages right afterwards, so a
+    # recorded hash would never match on the next run. The pass is a cheap, idempotent regex;
+    # unchanged builds already skip it via build_site.py (skipped=true).
+    changed_any = False
+    with RECORDER.stage("cache_bust") as m:
+        for html in pages:
+            if _cache_bust_in_html(html, version):
+                print(f"[cache-bust] updated {html.relative_to(site)} -> v={version}")
+                changed_any = True
+        m["files"] = len(pages)
+    append_to_meta(site / "debug_meta.json", RECORDER.as_meta())
 
     if not changed_any:
         print("[cache-bust] no matches found; nothing changed.")
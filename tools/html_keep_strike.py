@@ -2,46 +2,100 @@
 from __future__ import annotations
 
 import re
-from bs4 import BeautifulSoup, Tag
+from bs4 import Comment, Tag
+from lxml import etree
 
 ALLOWED_TAGS = {"s", "del", "strike", "b", "strong", "span", "br"}
+_WS = re.compile(r"\s+")
 
-def extract_cell_html(cell: Tag) -> str:
-    """Sanitisiertes innerHTML einer <td>, erhält Durchstreichungen.
+_SKIP_TAGS = {"script", "style"}
+_TEXT, _COMMENT = "#text", "#comment"  # keine gültigen Tag-Namen
+
+
+def _children_bs4(el):
+    for node in el.children:
+        if isinstance(node, Tag):
+            yield node.name, node
+        elif isinstance(node, Comment):
+            yield _COMMENT, str(node)
+        else:
+            yield _TEXT, str(node)
 
-    - erlaubt: <s>, <del>, <strike>, <b>, <strong>, <span style="text-decoration:line-through">, <br>
-    - alle anderen Tags werden entfernt (unwrap)
-    - Attribute werden entfernt, außer minimaler style bei <span>
-    """
-    raw = cell.decode_contents()
-    soup = BeautifulSoup(raw, "lxml")
 
-    for t in soup(["script", "style"]):
-        t.decompose()
+def _children_lxml(el):
+    if el.text:
+        yield _TEXT, el.text
+    for child in el:
+        tag = child.tag
+        if isinstance(tag, str):
+            yield tag, child
+        elif tag is etree.Comment:
+            yield _COMMENT, child.text or ""
+        if child.tail:
+            yield _TEXT, child.tail
 
-    # <strike> vereinheitlichen
-    for t in soup.find_all("strike"):
-        t.name = "s"
 
-    for t in soup.find_all(True):
-        if t.name not in ALLOWED_TAGS:
-            t.unwrap()
+def _escape_text(s: str) -> str:
+    # wie BeautifulSoups "minimal"-Formatter
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _walk(el, children, html: list[str], runs: list[list[str]]) -> None:
+    """Schreibt sanitisiertes HTML nach html und Textstücke nach runs.
+
+    Jedes erhaltene Tag, <br> und jeder Kommentar beginnt ein neues Textstück – genau dort,
+    wo get_text() auf dem sanitisierten HTML getrennte Strings sähe.
+    """
+    for kind, node in children(el):
+        if kind == _TEXT:
+            html.append(_escape_text(node))
+            runs[-1].append(node)
+        elif kind == _COMMENT:
+            html.append(f"<!--{node}-->")
+            runs.append([])
+        elif kind in _SKIP_TAGS:
             continue
-        if t.name == "span":
-            style = t.attrs.get("style", "")
-            if "line-through" in style:
-                t.attrs = {"style": "text-decoration:line-through"}
-            else:
-                t.attrs = {}
         else:
-            t.attrs = {}
+            name = "s" if kind == "strike" else kind  # <strike> vereinheitlichen
+            if name not in ALLOWED_TAGS:
+                _walk(node, children, html, runs)  # unwrap
+            elif name == "br":
+                html.append("<br/>")
+                runs.append([])
+            else:
+                attrs = ""
+                if name == "span" and "line-through" in (node.get("style") or ""):
+                    attrs = ' style="text-decoration:line-through"'
+                html.append(f"<{name}{attrs}>")
+                runs.append([])
+                _walk(node, children, html, runs)
+                html.append(f"</{name}>")
+                runs.append([])
+
+
+def sanitize_cell(cell) -> tuple[str, str]:
+    """Sanitisiertes innerHTML und Klartext einer <td> in einem Durchlauf über den Originalbaum.
+
+    - erlaubt: <s>, <del>, <strike>, <b>, <strong>, <span style="text-decoration:line-through">, <br>
+    - alle anderen Tags werden entfernt (unwrap), <script>/<style> samt Inhalt
+    - Attribute werden entfernt, außer minimaler style bei <span>
+    - Klartext wie get_text(" ", strip=True) auf dem sanitisierten HTML (für Dedupe/Filter)
+
+    cell darf ein bs4-Tag oder ein lxml-Element sein.
+    """
+    children = _children_bs4 if isinstance(cell, Tag) else _children_lxml
+    html: list[str] = []
+    runs: list[list[str]] = [[]]
+    _walk(cell, children, html, runs)
+    text = " ".join(t for t in (_WS.sub(" ", "".join(r)).strip() for r in runs) if t)
+    return _WS.sub(" ", "".join(html)).strip(), text
+
+
+def extract_cell_html(cell) -> str:
+    """Sanitisiertes innerHTML einer <td>, erhält Durchstreichungen (siehe sanitize_cell)."""
+    return sanitize_cell(cell)[0]
 
-    html = str(soup)
-    html = re.sub(r"\s+", " ", html).strip()
-    return html
 
-def extract_cell_text(cell: Tag) -> str:
+def extract_cell_text(cell) -> str:
     """Nur Text (ohne HTML) – nützlich für Dedupe/Filter."""
-    cleaned_html = extract_cell_html(cell)
-    txt = BeautifulSoup(cleaned_html, "lxml").get_text(" ", strip=True)
-    return re.sub(r"\s+", " ", txt)
+    return sanitize_cell(cell)[1]
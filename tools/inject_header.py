@@ -23,6 +23,13 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
+try:
+    from tools.instrument import RECORDER, append_to_meta
+    from tools.stage_cache import MANIFEST, StageCache, hash_file, hash_values
+except ImportError:  # als Skript gestartet: python tools/inject_header.py
+    from instrument import RECORDER, append_to_meta
+    from stage_cache import MANIFEST, StageCache, hash_file, hash_values
+
 try:
     from zoneinfo import ZoneInfo  # Python 3.11+
 except Exception:  # pragma: no cover
@@ -134,22 +141,40 @@ def main(target_dir: Optional[str] = None) -> int:
         return 1
 
     stamp = _fmt(_load_meta_time(dir_path))
+    pages = [dir_path / name for name in ("index.html", "report_all.html")]
+
+    # In-place stage: skip if the pages still carry this stamp from the last run
+    # The manifest is also kept in the target dir (docs/), so a fresh checkout sees this stage
+    cache = StageCache.load(seed=dir_path / MANIFEST.name)
+    stage = f"inject_header:{dir_path.name}"
+
+    def _key() -> str:
+        return hash_values(stamp, *(f"{p.name}:{hash_file(p)}" for p in pages))
+
+    if cache.fresh(stage, _key()):
+        print(f"[inject-header] {cache.skip_message(stage)}")
+        return 0
 
     changed = False
-    for name in ("index.html", "report_all.html"):
-        p = dir_path / name
-        if p.exists():
-            html = p.read_text(encoding="utf-8")
-            new_html = _inject_header(html, stamp)
-            if new_html != html:
-                p.write_text(new_html, encoding="utf-8")
-                print(f"[inject-header] updated {name} → Stand: {stamp}")
-                changed = True
-            else:
-                print(f"[inject-header] no change needed for {name}")
+    with RECORDER.stage("inject_header") as m:
+        for p in pages:
+            name = p.name
+            if p.exists():
+                html = p.read_text(encoding="utf-8")
+                new_html = _inject_header(html, stamp)
+                if new_html != html:
+                    p.write_text(new_html, encoding="utf-8")
+                    print(f"[inject-header] updated {name} → Stand: {stamp}")
+                    changed = True
+                else:
+                    print(f"[inject-header] no change needed for {name}")
+        m["files"] = sum(p.exists() for p in pages)
+    append_to_meta(dir_path / "debug_meta.json", RECORDER.as_meta())
 
     if not changed:
         print("[inject-header] nothing changed")
+    cache.record(stage, _key())
+    cache.save(copy_to=dir_path)
     return 0
 
 
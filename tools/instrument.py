@@ -0,0 +1,180 @@
+# tools/instrument.py
+"""
+Messpunkte je Stufe (Scrape, Extraktion, Normalisierung, Writer, Site-Nachbearbeitung):
+Wandzeit, CPU-Zeit, Spitzen-RSS, gelesene/geschriebene Bytes und Zeilenzahl.
+
+- cpu_s:        CPU-Zeit dieses Python-Prozesses (Chromium läuft in eigenen Prozessen)
+- rss_peak_mb:  höchster RSS des Prozesses bis zum Ende der Stufe (steigt er, hat die
+                Stufe den Spitzenwert gesetzt)
+- read_bytes / write_bytes: Bytes über read()/write() (Linux /proc/self/io rchar/wchar,
+                sonst psutil falls installiert; fehlt beides: null)
+- rows:         setzt die Stufe selbst (m["rows"] = …), ebenso weitere Felder
+
+build_site.py schreibt die Liste als "perf" nach debug_meta.json; die Nachbearbeitung
+(cache_bust_site.py, inject_header.py) hängt ihre Stufen dort an (append_to_meta).
+Optional als Prometheus-Textfile (node_exporter --collector.textfile), atomar geschrieben.
+
+Verwendung:
+    from tools.instrument import RECORDER, stage
+    with stage("normalize") as m:
+        df = normalize(...)
+        m["rows"] = len(df)
+    meta["perf"] = RECORDER.as_meta()
+
+    python tools/instrument.py docs/debug_meta.json                  # Tabelle
+    python tools/instrument.py docs/debug_meta.json --prometheus /var/lib/node_exporter/untis.prom
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource  # nicht unter Windows
+except ImportError:
+    resource = None
+try:
+    import psutil  # optional
+except ImportError:
+    psutil = None
+
+_PROC_IO = Path("/proc/self/io")
+
+
+def _io_bytes() -> tuple[int, int] | None:
+    """(gelesen, geschrieben) seit Prozessstart oder None."""
+    try:
+        fields = dict(line.split(": ") for line in _PROC_IO.read_text().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    if psutil is not None:
+        try:
+            c = psutil.Process().io_counters()
+            return getattr(c, "read_chars", c.read_bytes), getattr(c, "write_chars", c.write_bytes)
+        except (psutil.Error, AttributeError):
+            pass
+    return None
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # macOS: Bytes
+    if psutil is not None:
+        mem = psutil.Process().memory_info()
+        return round(getattr(mem, "peak_wset", mem.rss) / (1024 * 1024), 1)
+    return None
+
+
+class Recorder:
+    """Sammelt abgeschlossene Stufen in Reihenfolge ihres Endes (verschachtelt erlaubt)."""
+
+    def __init__(self):
+        self.stages: list[dict] = []
+        self._t0 = time.perf_counter()
+
+    def reset(self) -> None:
+        self.stages = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **info):
+        m = dict(info)
+        t0, c0, io0 = time.perf_counter(), time.process_time(), _io_bytes()
+        try:
+            yield m
+        except BaseException as e:
+            m["error"] = type(e).__name__
+            raise
+        finally:
+            t1, c1, io1 = time.perf_counter(), time.process_time(), _io_bytes()
+            entry = {"stage": name, "start_s": round(t0 - self._t0, 4), "wall_s": round(t1 - t0, 4),
+                     "cpu_s": round(c1 - c0, 4), "rss_peak_mb": _peak_rss_mb(),
+                     "read_bytes": io1[0] - io0[0] if io0 and io1 else None,
+                     "write_bytes": io1[1] - io0[1] if io0 and io1 else None}
+            entry.update(m)
+            self.stages.append(entry)
+
+    def as_meta(self) -> list[dict]:
+        return list(self.stages)
+
+
+RECORDER = Recorder()
+stage = RECORDER.stage
+
+
+def append_to_meta(meta_path: Path, entries: list[dict]) -> bool:
+    """Hängt Stufen an meta_path["perf"] an (für Werkzeuge, die nach build_site.py laufen)."""
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    meta["perf"] = list(meta.get("perf") or []) + entries
+    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return True
+
+
+_METRICS = (  # (Feld, Metrik, Hilfe, Zusammenfassung je Stufe)
+    ("wall_s", "stage_wall_seconds", "Wandzeit je Stufe", sum),
+    ("cpu_s", "stage_cpu_seconds", "CPU-Zeit des Python-Prozesses je Stufe", sum),
+    ("read_bytes", "stage_read_bytes", "gelesene Bytes je Stufe", sum),
+    ("write_bytes", "stage_write_bytes", "geschriebene Bytes je Stufe", sum),
+    ("rows", "stage_rows", "Zeilen je Stufe", sum),
+    ("rss_peak_mb", "stage_rss_peak_megabytes", "Spitzen-RSS am Ende der Stufe", max),
+)
+
+
+def prometheus_text(entries: list[dict], prefix: str = "untis") -> str:
+    """Textfile-Format; mehrfach vorkommende Stufen werden zusammengefasst."""
+    lines = []
+    for field, metric, help_text, combine in _METRICS:
+        values: dict[str, list[float]] = {}
+        for e in entries:
+            if isinstance(e.get(field), (int, float)):
+                values.setdefault(e["stage"], []).append(e[field])
+        if not values:
+            continue
+        lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} gauge"]
+        lines += [f'{prefix}_{metric}{{stage="{name}"}} {combine(v):g}' for name, v in values.items()]
+    lines += [f"# HELP {prefix}_last_run_timestamp_seconds Ende des Laufs (Unix-Zeit)",
+              f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+              f"{prefix}_last_run_timestamp_seconds {time.time():.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path, entries: list[dict]) -> None:
+    """Atomar (tmp + os.replace), damit node_exporter nie eine halbe Datei liest."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(prometheus_text(entries), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Stufen-Messwerte aus debug_meta.json anzeigen/exportieren.")
+    ap.add_argument("meta", type=Path, help="debug_meta.json")
+    ap.add_argument("--prometheus", type=Path, help="zusätzlich als Prometheus-Textfile schreiben")
+    args = ap.parse_args(argv)
+    try:
+        entries = json.loads(args.meta.read_text(encoding="utf-8")).get("perf") or []
+    except (OSError, ValueError) as e:
+        print(f"[error] {args.meta}: {e}", file=sys.stderr)
+        return 1
+    print(f"{'Stufe':<24} {'Wand s':>8} {'CPU s':>8} {'RSS MB':>8} {'gelesen':>10} {'geschr.':>10} {'Zeilen':>7}")
+    for e in entries:
+        print(f"{e['stage']:<24} {e['wall_s']:>8.3f} {e['cpu_s']:>8.3f} {e.get('rss_peak_mb') or 0:>8.1f} "
+              f"{e.get('read_bytes') or 0:>10} {e.get('write_bytes') or 0:>10} {e.get('rows', ''):>7}")
+    if args.prometheus:
+        write_prometheus(args.prometheus, entries)
+        print(f"OK. {len(entries)} Stufen → {args.prometheus}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# tools/stage_cache.py
+"""
+Stufen-Manifest für die Pipeline: merkt sich je Stufe einen Hash ihrer Eingaben und ihrer
+Ausgaben. Hat sich beides seit dem letzten Lauf nicht geändert, wird die Stufe übersprungen.
+
+Manifest (JSON, Default ``.stage_manifest.json`` im Arbeitsverzeichnis)::
+
+    {"version": 1,
+     "stages": {"normalize": {"inputs": "<sha1>", "outputs": {"untis_subst_normalized.json": "<sha1>", ...},
+                              "info": {"rows": 78}, "at": "2025-09-16T18:45:00"}}}
+
+Ausgaben werden über den Dateinamen geführt, damit sie auch gegen veröffentlichte Kopien
+(z. B. ``docs/``) geprüft werden können.
+
+Verwendung:
+    cache = StageCache.load()
+    key = hash_values(code_hash(__file__), *inputs)
+    if cache.fresh("normalize", key, [OUT_JSON, OUT_CSV]):
+        print(cache.skip_message("normalize"))
+    else:
+        ...
+        cache.record("normalize", key, [OUT_JSON, OUT_CSV])
+    cache.save()
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+MANIFEST = Path(".stage_manifest.json")
+VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def hash_file(path: Path) -> str | None:
+    """sha1 des Dateiinhalts, None wenn die Datei fehlt."""
+    try:
+        return hash_bytes(Path(path).read_bytes())
+    except OSError:
+        return None
+
+
+def hash_values(*parts: str | bytes) -> str:
+    """Ein Hash über mehrere Werte (längenpräfixiert, damit ("ab", "c") ≠ ("a", "bc"))."""
+    h = hashlib.sha1()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        h.update(f"{len(data)}:".encode("ascii"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def code_hash(*sources: str | Path) -> str:
+    """Hash über den Quelltext der Module einer Stufe – Codeänderungen entwerten den Cache."""
+    return hash_values(*(hash_file(Path(s)) or "" for s in sources))
+
+
+@dataclass
+class StageCache:
+    path: Path = MANIFEST
+    stages: dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path = MANIFEST, seed: Path | None = None) -> "StageCache":
+        """Liest das Manifest; fehlt es, wird (falls vorhanden) seed übernommen,
+        z. B. die mitveröffentlichte Kopie in docs/ auf einem frischen CI-Checkout."""
+        path = Path(path)
+        src = path if path.exists() else (Path(seed) if seed and Path(seed).exists() else None)
+        stages: dict[str, dict] = {}
+        if src is not None:
+            try:
+                data = json.loads(src.read_text(encoding="utf-8"))
+                if data.get("version") == VERSION:
+                    stages = data.get("stages", {})
+            except (OSError, ValueError) as e:
+                print(f"[warn] Stufen-Manifest {src} unlesbar, starte leer: {e}")
+        return cls(path, stages)
+
+    def fresh(self, name: str, inputs: str, outputs: list[Path] = (),
+              published: Path | None = None) -> bool:
+        """True, wenn die Eingaben gleich sind und alle Ausgaben unverändert vorliegen.
+
+        Fehlt eine Ausgabe lokal, zählt die gleichnamige Datei unter published."""
+        entry = self.stages.get(name)
+        if not entry or entry.get("inputs") != inputs:
+            return False
+        recorded = entry.get("outputs", {})
+        for out in outputs:
+            out = Path(out)
+            if not out.exists() and published is not None:
+                out = Path(published) / out.name
+            if out.name not in recorded or hash_file(out) != recorded[out.name]:
+                return False
+        return True
+
+    def record(self, name: str, inputs: str, outputs: list[Path] = (), **info) -> None:
+        self.stages[name] = {
+            "inputs": inputs,
+            "outputs": {Path(o).name: hash_file(Path(o)) for o in outputs},
+            "info": info,
+            "at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def invalidate(self, *names: str) -> None:
+        """Vergisst die genannten Stufen (--force): sie laufen beim nächsten fresh() sicher."""
+        for name in names:
+            self.stages.pop(name, None)
+
+    def info(self, name: str) -> dict:
+        return self.stages.get(name, {}).get("info", {})
+
+    def skip_message(self, name: str) -> str:
+        at = self.stages.get(name, {}).get("at", "?")
+        return f"[skip] {name}: Eingaben unverändert seit {at}"
+
+    def save(self, copy_to: Path | None = None) -> None:
+        """Schreibt das Manifest atomar; copy_to legt zusätzlich eine Kopie ab (z. B. in site/)."""
+        text = json.dumps({"version": VERSION, "stages": self.stages}, ensure_ascii=False, indent=2)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
+        if copy_to is not None:
+            shutil.copy2(self.path, Path(copy_to) / self.path.name)
+
+
+def set_github_output(**values: str | bool) -> None:
+    """Schreibt key=value nach $GITHUB_OUTPUT (nur in GitHub Actions gesetzt)."""
+    target = os.environ.get("GITHUB_OUTPUT")
+    if not target:
+        return
+    with open(target, "a", encoding="utf-8") as f:
+        for k, v in values.items():
+            f.write(f"{k}={str(v).lower() if isinstance(v, bool) else v}\n")
@@ -0,0 +1,89 @@
+# tools/static_report.py
+"""
+Bausteine für vorgerenderte Report-Seiten (``--render static`` in untis_report.py und
+untis_report_all.py): die Tabelle steht fertig im HTML, CSS und ein kleines Skript sind
+inline – keine CDN-Anfragen, kein JSON-Abruf, der erste Paint zeigt schon die Zeilen.
+
+Das Skript (ohne Abhängigkeiten) kann
+- Datum/Klasse filtern: ``<select data-filter="d">`` gegen ``<tr data-d="…">``,
+  Klassen als ``data-c="|8a|8b|"``; ?date= / ?cls= wählen vor,
+- frei suchen: ``<input data-search>`` über den Zeilentext,
+- sortieren: Klick auf eine Spaltenüberschrift (Zahlen numerisch, erneuter Klick kehrt um).
+
+Verwendung:
+    from tools.static_report import STYLE, SCRIPT, table_rows
+    tbody = table_rows(rows, cells=lambda r: [...], attrs=lambda r: {"d": r["datum"]})
+"""
+from __future__ import annotations
+
+import html
+
+STYLE = """<style>
+  body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Ubuntu,Arial,sans-serif;margin:16px}
+  header{display:flex;gap:12px;flex-wrap:wrap;align-items:center;margin-bottom:10px}
+  select,input{padding:6px 8px}
+  table{border-collapse:collapse;width:100%}
+  th,td{border:1px solid #ccc;padding:6px 8px;text-align:left;vertical-align:top}
+  th{background:#f4f4f4;cursor:pointer;white-space:nowrap;user-select:none}
+  th[aria-sort=ascending]::after{content:" \\25B2"}
+  th[aria-sort=descending]::after{content:" \\25BC"}
+  tbody tr:nth-child(even){background:#fafafa}
+  .muted{color:#666;font-size:0.9em}
+  @media (max-width:700px){table{font-size:0.95rem}th,td{padding:4px}}
+</style>"""
+
+SCRIPT = """<script>
+(function(){
+  var tbody = document.querySelector('#tbl tbody');
+  var rows = Array.prototype.slice.call(tbody.rows);
+  var sels = Array.prototype.slice.call(document.querySelectorAll('select[data-filter]'));
+  var search = document.querySelector('input[data-search]');
+  var status = document.getElementById('status');
+  var params = new URLSearchParams(location.search);
+  var perma = {d: params.get('date'), c: params.get('cls')};
+  sels.forEach(function(s){
+    var want = perma[s.dataset.filter];
+    if (want && Array.prototype.some.call(s.options, function(o){ return o.value === want; })) s.value = want;
+  });
+  function apply(){
+    var q = search ? search.value.trim().toLowerCase() : '', n = 0;
+    rows.forEach(function(tr){
+      var ok = sels.every(function(s){
+        var v = s.value, k = s.dataset.filter;
+        return !v || (k === 'c' ? (tr.dataset.c || '').indexOf('|' + v + '|') >= 0 : tr.dataset[k] === v);
+      }) && (!q || tr.textContent.toLowerCase().indexOf(q) >= 0);
+      tr.hidden = !ok;
+      if (ok) n++;
+    });
+    if (status) status.textContent = n + ' Einträge';
+  }
+  sels.forEach(function(s){ s.addEventListener('change', apply); });
+  if (search) search.addEventListener('input', apply);
+  var coll = new Intl.Collator('de', {numeric: true, sensitivity: 'base'});
+  Array.prototype.forEach.call(document.querySelectorAll('#tbl thead th'), function(th, i, all){
+    th.addEventListener('click', function(){
+      var dir = th.getAttribute('aria-sort') === 'ascending' ? -1 : 1;
+      Array.prototype.forEach.call(all, function(h){ h.removeAttribute('aria-sort'); });
+      th.setAttribute('aria-sort', dir > 0 ? 'ascending' : 'descending');
+      rows.sort(function(a, b){ return dir * coll.compare(a.cells[i].textContent, b.cells[i].textContent); });
+      rows.forEach(function(tr){ tbody.appendChild(tr); });
+    });
+  });
+  apply();
+})();
+</script>"""
+
+
+def table_rows(rows, cells, attrs=None) -> str:
+    """<tr>-Zeilen: cells(row) liefert fertiges Zell-HTML, attrs(row) die data-*-Attribute."""
+    out = []
+    for r in rows:
+        data = "".join(f' data-{k}="{html.escape(str(v), quote=True)}"' for k, v in (attrs(r) if attrs else {}).items())
+        out.append(f"    <tr{data}>" + "".join(f"<td>{c}</td>" for c in cells(r)) + "</tr>\n")
+    return "".join(out)
+
+
+def options(values, label: str) -> str:
+    """<option>-Liste für ein Filter-Select; leerer Wert = alle."""
+    return f'<option value="">{html.escape(label)}</option>' + "".join(
+        f'<option value="{html.escape(v, quote=True)}">{html.escape(v)}</option>' for v in values)
@@ -0,0 +1,157 @@
+# tools/untis_stub_server.py
+"""
+Lokaler Stub des WebUntis-Monitors für Offline-Tests von
+``untis_monitor_scrape.py --mode http``.
+
+Beantwortet:
+- GET  /WebUntis/monitor                     → kleines HTML + Session-Cookie
+- POST /WebUntis/monitor/substitution/data   → gespeicherte Payload je ``dateOffset``
+
+Quellen für die Payload (eine von beiden):
+- ``--payload webuntis_subst_payload.json``  (vom Scraper mit ``--save-payload`` gespeichert)
+- ``--from-html webuntis_subst_raw_1.html``  (aus einem gespeicherten Monitor-DOM rekonstruiert;
+  jeder gp_SubstitutionMonitor-Block wird zu einem Tag)
+
+Usage (from repo root):
+    python tools/untis_stub_server.py --from-html webuntis_subst_raw_1.html
+    python untis_monitor_scrape.py --mode http \
+        --url "http://127.0.0.1:8765/WebUntis/monitor?school=Barmstedt%20Schule&monitorType=subst&format=Homepage"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+
+DATA_PATH = "/WebUntis/monitor/substitution/data"
+
+
+def payloads_from_html(html: str) -> dict[str, dict]:
+    """Rekonstruiert je Monitor-Block eine Antwort des Datenendpunkts."""
+    soup = BeautifulSoup(html, "lxml")
+    days: dict[str, dict] = {}
+    # Ticker-Block (ebenfalls gp_SubstitutionMonitor) hat keine Tabelle → überspringen
+    monitors = [m for m in soup.select("div.gp_SubstitutionMonitor")
+                if m.select_one(".grupet_widget_AutoScrollingTable")]
+    for offset, mon in enumerate(monitors):
+        title = mon.select_one(".title span")
+        m = re.search(r"(\d{2})\.(\d{2})\.(\d{4})", title.get_text() if title else "")
+        day = int(f"{m.group(3)}{m.group(2)}{m.group(1)}") if m else None
+        status = mon.select_one(".status")
+        last_update = status.get_text(strip=True).replace("Stand:", "").strip() if status else ""
+
+        classes: list[str] = []
+        for td in mon.select(".gp_SubstitutionMonitor_AbsenceHeader td"):
+            spans = td.find_all("span")
+            if spans and spans[0].get_text(strip=True).startswith("Klassen:"):
+                classes = [c.strip() for c in spans[-1].get_text().split(",") if c.strip()]
+
+        rows = []
+        # AutoScrollingTable dupliziert den Body für endloses Scrollen → nur den ersten nehmen
+        body = mon.select_one(".grupet_widget_AutoScrollingTable tbody")
+        for tr in body.find_all("tr") if body else []:
+            tds = tr.find_all("td")
+            if len(tds) < 3:
+                continue
+            cells = tds[2:]
+            cell_classes = {}
+            for i, td in enumerate(cells):
+                cls = [c for c in td.get("class", []) if c]
+                if cls:
+                    cell_classes[str(i)] = cls
+            rows.append({
+                "group": tds[0].get_text(strip=True),
+                "data": [td.decode_contents() for td in cells],
+                "cellClasses": cell_classes,
+            })
+
+        days[str(offset)] = {"payload": {
+            "date": day,
+            "lastUpdate": last_update,
+            "affectedElements": {"1": classes},
+            "rows": rows,
+        }}
+    return days
+
+
+def make_handler(days: dict[str, dict]):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-Alive wie der echte Server
+
+        def _send(self, status: int, body: bytes, ctype: str, cookie: bool = False) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            if cookie:
+                self.send_header("Set-Cookie", "JSESSIONID=stub; Path=/WebUntis; HttpOnly")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if urlsplit(self.path).path.startswith("/WebUntis/monitor"):
+                body = b"<!DOCTYPE html><html><body class=\"WebUntisMonitor\"></body></html>"
+                self._send(200, body, "text/html;charset=UTF-8", cookie=True)
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if urlsplit(self.path).path != DATA_PATH:
+                self._send(404, b"not found", "text/plain")
+                return
+            try:
+                req = json.loads(raw or b"{}")
+            except ValueError:
+                self._send(400, b"bad json", "text/plain")
+                return
+            offset = str(req.get("dateOffset", 0))
+            data = days.get(offset) or {"payload": {"date": req.get("date"), "rows": [],
+                                                    "affectedElements": {}, "lastUpdate": ""}}
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self._send(200, body, "application/json;charset=UTF-8")
+
+        def log_message(self, fmt: str, *args) -> None:
+            print(f"[stub] {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline-Stub des WebUntis-Monitor-Datenendpunkts.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--payload", help="gespeicherte Payload-Datei (webuntis_subst_payload.json)")
+    src.add_argument("--from-html", help="gespeichertes Monitor-HTML (webuntis_subst_raw_1.html)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args(argv)
+
+    if args.payload:
+        days = json.loads(Path(args.payload).read_text(encoding="utf-8")).get("days", {})
+    else:
+        days = payloads_from_html(Path(args.from_html).read_text(encoding="utf-8", errors="ignore"))
+    if not days:
+        print("[stub] keine Payload gefunden", file=sys.stderr)
+        return 1
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(days))
+    print(f"[stub] {datetime.now().isoformat(timespec='seconds')} listening on "
+          f"http://{args.host}:{server.server_address[1]}{DATA_PATH} ({len(days)} Tage)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
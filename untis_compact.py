@@ -0,0 +1,141 @@
+# untis_compact.py
+# Spaltenformat für veröffentlichte Tabellen (untis_subst_normalized.json, webuntis_subst.json,
+# Shards): statt einer Liste von Objekten, die jeden Schlüssel und jede Klasse/jedes Datum
+# je Zeile wiederholt, eine Spalte je Schlüssel. Ganzzahl-Spalten bleiben Listen,
+# alle anderen werden wörterbuchkodiert (Werteliste "dict" + Indizes "idx").
+#
+#   {"$n": 3, "$cols": {"gruppe": [2, 2, 2],
+#                       "datum": {"dict": ["31.10.2025"], "idx": [0, 0, 0]}, ...}}
+#
+# encode_doc()/decode_doc() wandeln verschachtelte Dokumente (jede nicht-leere Liste von
+# Objekten wird zur Spaltentabelle). precompress() legt .gz- und – falls das Paket brotli
+# installiert ist – .br-Geschwister ab; gzip ohne Zeitstempel, damit docs/ nicht bei jedem
+# Lauf abweicht.
+#
+# Beispiele:
+#   python untis_compact.py untis_subst_normalized.json                 # → untis_subst_normalized.columnar.json
+#   python untis_compact.py webuntis_subst.json --gz                    # zusätzlich .gz/.br
+#   python untis_compact.py untis_subst_normalized.columnar.json --decode -o roundtrip.json
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: ohne brotli nur .gz
+    brotli = None
+
+SUFFIX = ".columnar.json"
+
+
+def _is_table(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(r, dict) for r in value)
+
+
+def encode_table(records: list[dict]) -> dict:
+    """Liste gleichartiger Objekte → {"$n", "$cols"}; fehlende Schlüssel werden null."""
+    names = list(dict.fromkeys(k for r in records for k in r))
+    cols: dict[str, list | dict] = {}
+    for name in names:
+        values = [r.get(name) for r in records]
+        if all(v is None or (isinstance(v, int) and not isinstance(v, bool)) for v in values):
+            cols[name] = values
+            continue
+        index: dict = {}
+        idx = []
+        for v in values:
+            key = (type(v).__name__, v if not isinstance(v, (list, dict)) else json.dumps(v, sort_keys=True))
+            if key not in index:
+                index[key] = (len(index), v)
+            idx.append(index[key][0])
+        cols[name] = {"dict": [v for _, v in index.values()], "idx": idx}
+    return {"$n": len(records), "$cols": cols}
+
+
+def decode_table(table: dict) -> list[dict]:
+    cols = {name: (col if isinstance(col, list) else [col["dict"][i] for i in col["idx"]])
+            for name, col in table["$cols"].items()}
+    return [{name: values[i] for name, values in cols.items()} for i in range(table["$n"])]
+
+
+def encode_doc(doc):
+    if _is_table(doc):
+        return encode_table(doc)
+    if isinstance(doc, dict):
+        return {k: encode_doc(v) for k, v in doc.items()}
+    return doc
+
+
+def decode_doc(doc):
+    if isinstance(doc, dict):
+        if "$cols" in doc and "$n" in doc:
+            return decode_table(doc)
+        return {k: decode_doc(v) for k, v in doc.items()}
+    return doc
+
+
+def dumps(doc) -> str:
+    return json.dumps(encode_doc(doc), ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def columnar_path(path: Path) -> Path:
+    return path.with_name(path.name[: -len(".json")] + SUFFIX if path.name.endswith(".json") else path.name + SUFFIX)
+
+
+def write_columnar(doc, path: Path) -> Path:
+    path.write_text(dumps(doc), encoding="utf-8")
+    return path
+
+
+def precompress(paths, min_size: int = 256) -> list[Path]:
+    """Schreibt <datei>.gz (und .br) neben jede Datei ab min_size Bytes; gibt die neuen Dateien zurück."""
+    written = []
+    for p in paths:
+        p = Path(p)
+        data = p.read_bytes()
+        if len(data) < min_size:
+            continue
+        gz = p.with_name(p.name + ".gz")
+        gz.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        written.append(gz)
+        if brotli is not None:
+            br = p.with_name(p.name + ".br")
+            br.write_bytes(brotli.compress(data, quality=11))
+            written.append(br)
+    return written
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="JSON-Tabellen ins Spaltenformat wandeln (und zurück).")
+    ap.add_argument("src", type=Path)
+    ap.add_argument("-o", "--out", type=Path, help=f"Ausgabe (default: <name>{SUFFIX} bzw. <name>.json)")
+    ap.add_argument("--decode", action="store_true", help="Spaltenformat → Liste von Objekten")
+    ap.add_argument("--gz", action="store_true", help=".gz/.br-Geschwister der Ausgabe schreiben")
+    args = ap.parse_args(argv)
+
+    if not args.src.exists():
+        print(f"[error] {args.src} nicht gefunden", file=sys.stderr)
+        return 1
+    doc = json.loads(args.src.read_text(encoding="utf-8"))
+    if args.decode:
+        name = args.src.name
+        out = args.out or args.src.with_name(
+            name[: -len(SUFFIX)] + ".json" if name.endswith(SUFFIX) else args.src.stem + ".decoded.json")
+        out.write_text(json.dumps(decode_doc(doc), ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        out = write_columnar(doc, args.out or columnar_path(args.src))
+    extra = precompress([out]) if args.gz else []
+    if args.gz and brotli is None:
+        print("[skip] .br: Paket brotli nicht installiert")
+    sizes = ", ".join(f"{p.name} {p.stat().st_size:,} B" for p in [args.src, out, *extra])
+    print(f"OK. {sizes}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
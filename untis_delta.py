@@ -0,0 +1,133 @@
+# untis_delta.py
+# Zeilen-Delta zwischen zwei normalisierten Ständen (untis_subst_normalized.json).
+# Jede Zeile bekommt einen stabilen Schlüssel aus datum | klasse | stunde | fach (Klartext);
+# mehrfach vorkommende Schlüssel werden in Reihenfolge durchnummeriert (…#2, …#3).
+# Ergebnis: delta.json mit fortlaufender Sequenznummer und den Listen added/removed/changed.
+#
+# Clients, die den Stand mit Hash "base" kennen, wenden das Delta an; sonst laden sie den
+# vollen Stand neu. Ohne Änderung wird delta.json nicht neu geschrieben (seq bleibt).
+#
+# Beispiele:
+#   python untis_delta.py alt.json untis_subst_normalized.json      # → delta.json
+#   python untis_delta.py alt.json neu.json -o /tmp/delta.json --print
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from untis_text import FIELDS, content_hash, plain
+
+DELTA_JSON = Path("delta.json")
+
+
+def row_key(r: dict) -> str:
+    return " | ".join([
+        str(r.get("datum") or "").strip(),
+        str(r.get("klasse") or "").strip(),
+        str(r.get("stunde") or "").strip(),
+        plain(r.get("fach")),
+    ])
+
+
+def keyed(records: list[dict]) -> dict[str, dict]:
+    """Schlüssel → Zeile; Wiederholungen desselben Schlüssels erhalten #2, #3, …"""
+    out: dict[str, dict] = {}
+    seen: dict[str, int] = {}
+    for r in records:
+        k = row_key(r)
+        seen[k] = seen.get(k, 0) + 1
+        if seen[k] > 1:
+            k = f"{k}#{seen[k]}"
+        out[k] = {f: r.get(f) for f in FIELDS}
+    return out
+
+
+def diff(prev: list[dict], new: list[dict]) -> dict:
+    """added/removed/changed zwischen zwei Ständen (changed: mit Liste der geänderten Felder)."""
+    a, b = keyed(prev), keyed(new)
+    added = [{"key": k, "row": b[k]} for k in b if k not in a]
+    removed = [k for k in a if k not in b]
+    changed = []
+    for k in b:
+        if k in a and a[k] != b[k]:
+            fields = [f for f in FIELDS if a[k].get(f) != b[k].get(f)]
+            changed.append({"key": k, "row": b[k], "fields": fields})
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+def build_delta(prev: list[dict] | None, new: list[dict], prev_delta: dict | None = None) -> dict | None:
+    """Delta-Dokument für new gegenüber prev; None, wenn sich inhaltlich nichts geändert hat.
+
+    Ohne prev (erster Lauf) ist jede Zeile "added"."""
+    base = content_hash(prev) if prev is not None else None
+    target = content_hash(new)
+    if base == target:
+        return None
+    d = diff(prev or [], new)
+    seq = int((prev_delta or {}).get("seq", 0)) + 1
+    return {
+        "seq": seq,
+        "base": base,
+        "hash": target,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "counts": {k: len(v) for k, v in d.items()},
+        **d,
+    }
+
+
+def _load_json(path: Path | None):
+    if path is None or not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        print(f"[warn] {path} ist kein gültiges JSON – ignoriert")
+        return None
+
+
+def load_previous(path: Path, published: Path | None = None):
+    """Vorheriger Stand: lokale Datei, sonst die veröffentlichte Kopie (frischer CI-Checkout)."""
+    if not path.exists() and published is not None:
+        path = published / path.name
+    return _load_json(path)
+
+
+def update_delta(prev: list[dict] | None, new: list[dict], out: Path = DELTA_JSON,
+                 published: Path | None = None) -> dict | None:
+    """Schreibt delta.json (seq = vorheriges seq + 1), falls sich etwas geändert hat."""
+    delta = build_delta(prev, new, load_previous(out, published))
+    if delta is None:
+        print(f"[delta] keine Änderung, {out.name} bleibt")
+        return None
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps(delta, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(out)
+    c = delta["counts"]
+    print(f"[delta] seq {delta['seq']}: +{c['added']} −{c['removed']} ~{c['changed']} → {out.name}")
+    return delta
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Delta zwischen zwei normalisierten Ständen.")
+    ap.add_argument("prev", type=Path, help="vorheriger Stand (JSON)")
+    ap.add_argument("new", type=Path, help="neuer Stand (JSON)")
+    ap.add_argument("-o", "--out", type=Path, default=DELTA_JSON, help="Ausgabe (default: %(default)s)")
+    ap.add_argument("--print", action="store_true", help="Delta zusätzlich ausgeben")
+    args = ap.parse_args(argv)
+
+    new = _load_json(args.new)
+    if new is None:
+        print(f"[error] {args.new} fehlt oder ist ungültig", file=sys.stderr)
+        return 1
+    delta = update_delta(_load_json(args.prev), new, args.out)
+    if args.print and delta is not None:
+        print(json.dumps(delta, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# untis_extract.py
+# HTML einmal parsen, daraus beide Frame-Varianten bauen:
+# - scrape_frames():     Textzellen wie in webuntis_subst.json (untis_monitor_scrape.py)
+# - normalize_frames():  Text + sanitisiertes Zell-HTML + dessen Klartext (untis_normalize.py)
+# parse_tables() ist der einzige Parser-Aufruf je HTML-Dokument; Zell-HTML und Klartext
+# entstehen in einem Durchlauf über den Originalbaum (html_keep_strike.sanitize_cell).
+#
+# Zwei Parser mit identischem Ergebnis (siehe bench/bench_extract.py):
+#   "bs4"  – BeautifulSoup (lxml-Treebuilder), Referenz
+#   "lxml" – lxml.html direkt, auf den Repo-Snapshots etwa 2–6x schneller
+#            (bench/bench_extract.py --scale 1 10 100: 2,1–5,8x, Median ~3,6x)
+#
+# pandas, BeautifulSoup und lxml werden erst beim ersten Parsen/Frame-Bau geladen:
+# untis_monitor_scrape.py importiert dieses Modul, lange bevor der Browser etwas liefert.
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PARSERS = ("bs4", "lxml")
+
+# Kopfzeilen-Erkennung in untis_normalize (erste Zeile als Header, auch mit <td>)
+EXPECTED_HEADER_TOKENS = {"stunde", "klassen", "klasse", "fach", "lehrkraft", "vertretungstext"}
+
+# Spalten-Suffixe in normalize_frames: <spalte>__html (sanitisiert), <spalte>__txt (dessen Klartext)
+HTML_SUFFIX = "__html"
+PLAIN_SUFFIX = "__txt"
+
+
+@dataclass
+class ParsedRow:
+    texts: list[str]                     # get_text(" ", strip=True) je Zelle
+    cells: list = field(repr=False)      # Zell-Elemente (für HTML der Zellen)
+
+
+@dataclass
+class ParsedTable:
+    index: int                           # Position im Dokument (table_index)
+    head: list[str]                      # Texte aus <thead>, leer wenn keins
+    first_th: list[str]                  # <th>-Texte der ersten Zeile
+    first_cells: list[str]               # <th>/<td>-Texte der ersten Zeile
+    rows: list[ParsedRow | None]         # je <tr>; None = Zeile ohne Zellen
+
+
+def _uniq_headers(headers):
+    out, seen = [], {}
+    for i, h in enumerate(headers):
+        name = (h or "").strip() or f"col_{i+1}"
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}_{seen[name]}"
+        out.append(name)
+    return out
+
+
+def parse_tables(html: str, parser: str = "bs4") -> list[ParsedTable]:
+    if parser == "lxml":
+        return _parse_tables_lxml(html)
+    if parser != "bs4":
+        raise ValueError(f"unbekannter Parser: {parser} (erlaubt: {', '.join(PARSERS)})")
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    tables = []
+    for ti, table in enumerate(soup.find_all("table")):
+        head = []
+        thead = table.find("thead")
+        if thead:
+            head = [h.get_text(strip=True) for h in thead.find_all(["th", "td"])]
+        trs = table.find_all("tr")
+        first_th, first_cells = [], []
+        if trs:
+            first_th = [th.get_text(strip=True) for th in trs[0].find_all("th")]
+            first_cells = [c.get_text(strip=True) for c in trs[0].find_all(["th", "td"])]
+        rows = []
+        for r in trs:
+            cells = r.find_all(["td", "th"])
+            rows.append(ParsedRow([c.get_text(separator=" ", strip=True) for c in cells], cells) if cells else None)
+        tables.append(ParsedTable(ti, head, first_th, first_cells, rows))
+    return tables
+
+
+# ---------- lxml ----------
+_SKIP_TEXT_TAGS = {"script", "style"}
+
+
+def _strings(el, out: list[str]) -> None:
+    """Textstücke in Dokumentreihenfolge wie bs4 get_text(): ohne Kommentare und script/style."""
+    if el.text:
+        out.append(el.text)
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            _strings(child, out)
+        if child.tail:
+            out.append(child.tail)
+
+
+def _text(el, sep: str = "") -> str:
+    """Entspricht Tag.get_text(separator=sep, strip=True)."""
+    parts: list[str] = []
+    _strings(el, parts)
+    return sep.join(p for p in (s.strip() for s in parts) if p)
+
+
+def _parse_tables_lxml(html: str) -> list[ParsedTable]:
+    if not html.strip():
+        return []
+    import lxml.html
+
+    doc = lxml.html.document_fromstring(html)
+    tables = []
+    for ti, table in enumerate(doc.iter("table")):
+        head = []
+        thead = next(table.iterdescendants("thead"), None)
+        if thead is not None:
+            head = [_text(h) for h in thead.iterdescendants("th", "td")]
+        trs = list(table.iterdescendants("tr"))
+        first_th, first_cells = [], []
+        if trs:
+            first_th = [_text(th) for th in trs[0].iterdescendants("th")]
+            first_cells = [_text(c) for c in trs[0].iterdescendants("th", "td")]
+        rows = []
+        for r in trs:
+            cells = list(r.iterdescendants("td", "th"))
+            rows.append(ParsedRow([_text(c, " ") for c in cells], cells) if cells else None)
+        tables.append(ParsedTable(ti, head, first_th, first_cells, rows))
+    return tables
+
+
+def _data_rows(table: ParsedTable, start_idx: int) -> list[ParsedRow]:
+    return [r for r in table.rows[start_idx:] if r is not None and any(r.texts)]
+
+
+def scrape_frames(tables: list[ParsedTable]) -> list[pd.DataFrame]:
+    """Frames für webuntis_subst.json/.csv (nur Text)."""
+    import pandas as pd
+
+    frames = []
+    for table in tables:
+        headers = table.head
+        start_idx = 0
+        if not headers and table.rows and table.first_th:
+            headers = table.first_th
+            start_idx = 1
+        data_rows = [r.texts for r in _data_rows(table, start_idx)]
+        if not data_rows:
+            continue
+        maxlen = max(len(r) for r in data_rows)
+        if not headers or len(headers) != maxlen:
+            headers = [f"col_{i+1}" for i in range(maxlen)]
+        headers = _uniq_headers(headers)
+        normalized = [r + [""] * (maxlen - len(r)) for r in data_rows]
+        df = pd.DataFrame(normalized, columns=headers)
+        df.insert(0, "table_index", table.index)
+        df.columns = _uniq_headers(list(df.columns))
+        frames.append(df)
+    return frames
+
+
+def normalize_frames(tables: list[ParsedTable]) -> list[pd.DataFrame]:
+    """Frames für untis_normalize: Textspalten + <spalte>__html mit erhaltenen Durchstreichungen
+    + <spalte>__txt (Klartext des sanitisierten HTML, für Dedupe ohne erneutes Parsen)."""
+    import pandas as pd
+
+    from tools.html_keep_strike import sanitize_cell
+
+    frames = []
+    for table in tables:
+        headers = table.head
+        start_idx = 0
+        # Fallback: erste Zeile als Header verwenden, wenn sie wie ein Header aussieht
+        if not headers and table.rows and table.first_cells:
+            tokens = [t.lower() for t in table.first_cells]
+            if len(EXPECTED_HEADER_TOKENS.intersection(tokens)) >= 2:
+                headers = table.first_cells
+                start_idx = 1
+        rows = _data_rows(table, start_idx)
+        if not rows:
+            continue
+        data_rows_text = [r.texts for r in rows]
+        sanitized = [[sanitize_cell(c) for c in r.cells] for r in rows]
+        data_rows_html = [[h for h, _ in r] for r in sanitized]
+        data_rows_plain = [[t for _, t in r] for r in sanitized]
+        maxlen = max(len(r) for r in data_rows_text)
+        if headers:
+            if len(headers) < maxlen:
+                headers = headers + [f"col_{i+1}" for i in range(len(headers), maxlen)]
+            elif len(headers) > maxlen:
+                headers = headers[:maxlen]
+        else:
+            headers = [f"col_{i+1}" for i in range(maxlen)]
+        headers = _uniq_headers(headers)
+        normalized_text = [r + [""] * (maxlen - len(r)) for r in data_rows_text]
+        normalized_html = [r + [""] * (maxlen - len(r)) for r in data_rows_html]
+        normalized_plain = [r + [""] * (maxlen - len(r)) for r in data_rows_plain]
+        df_text = pd.DataFrame(normalized_text, columns=headers)
+        df_html = pd.DataFrame(normalized_html, columns=[h + HTML_SUFFIX for h in headers])
+        df_plain = pd.DataFrame(normalized_plain, columns=[h + PLAIN_SUFFIX for h in headers])
+        df = pd.concat([df_text, df_html, df_plain], axis=1)
+        df.insert(0, "table_index", table.index)
+        df.columns = _uniq_headers(list(df.columns))
+        frames.append(df)
+    return frames
@@ -5,15 +5,28 @@
 # Beispiele:
 #   python untis_filter.py -c 8c
 #   python untis_filter.py -c 5a 5b 5c -d 17.09.2025
+#   python untis_filter.py -c 8c -c 5a 5b          # zwei Ausgaben aus einem Ladevorgang
+#   python untis_filter.py --all-classes           # je Klasse eine Ausgabe
+#   python untis_filter.py --grep "Mül entfällt"   # Volltext, ohne -c → untis_subst_suche_clean.*
+#   python untis_filter.py -c 8c --grep Klausur
+#
+# Klassen werden als Tokens verglichen ("5a" trifft nicht "15a"); ohne exakten Treffer
+# gilt ein Präfix ("8" → "8a", "8b", …).
+# --grep sucht im Klartext von Fach/Lehrkraft/Vertretungstext (alle Wörter, auch Teilwörter)
+# über den Trigramm-Index untis_subst_normalized.search.json (untis_search.py).
+#
+# Nur Standardbibliothek (json/csv, Listen von Zeilen-Dicts): es geht um wenige hundert
+# Zeilen, der Start (Kiosk-PC, Raspberry Pi) zählt mehr als Vektorisierung. untis_search
+# wird erst bei --grep geladen.
 
 import argparse
+import csv
 import json
+import os
 import re
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-
 IN_JSON = "untis_subst_normalized.json"
 RAW_HTML = "webuntis_subst_raw.html"
 
@@ -33,14 +46,38 @@ def detect_date_from_html() -> str | None:
     return None
 
 
-def class_matches(klasse: str, wanted: list[str]) -> bool:
-    if not klasse:
-        return False
-    k = str(klasse).lower()
-    tokens = re.split(r"[,\s;/|]+", k)
-    tokens = [t for t in tokens if t]
-    wl = [w.lower() for w in wanted]
-    return any((w in tokens) or (w in k) for w in wl)
+CLASS_SPLIT = re.compile(r"[,\s;/|]+")
+
+
+def class_index(klassen: list[str | None]) -> tuple[dict[str, list[int]], dict[str, str]]:
+    """Invertierter Index: Klassen-Token (klein) → Zeilenpositionen (aufsteigend).
+
+    Jeder verschiedene klasse-Wert wird genau einmal zerlegt. Zweiter Rückgabewert:
+    Token → Schreibweise des ersten Vorkommens (für Dateinamen/Ausgabe)."""
+    rows_by_value: dict[str, list[int]] = {}
+    for i, value in enumerate(klassen):
+        rows_by_value.setdefault("" if value is None else str(value), []).append(i)
+    rows_by_token: dict[str, list[int]] = {}
+    display: dict[str, str] = {}
+    for value, rows in rows_by_value.items():
+        for t in dict.fromkeys(t for t in CLASS_SPLIT.split(value) if t):
+            key = t.lower()
+            rows_by_token.setdefault(key, []).extend(rows)
+            display.setdefault(key, t)
+    return {t: sorted(rows) for t, rows in rows_by_token.items()}, display
+
+
+def select(index: dict[str, list[int]], wanted: list[str]) -> list[int]:
+    """Zeilenpositionen für die gewünschten Klassen (Vereinigung, aufsteigend)."""
+    hits: set[int] = set()
+    for w in (w.lower() for w in wanted):
+        if w in index:  # Normalfall: exakter Token
+            hits.update(index[w])
+        else:  # sonst Präfix ("8" → "8a"), nie mitten im Token ("5a" ≠ "15a")
+            for t, rows in index.items():
+                if t.startswith(w):
+                    hits.update(rows)
+    return sorted(hits)
 
 
 def to_int_or_none(x):
@@ -50,68 +87,126 @@ def to_int_or_none(x):
         return None
 
 
-def main():
-    ap = argparse.ArgumentParser(description="Filtert Vertretungen nach Klassen/Datum und erzeugt Clean-CSV.")
-    ap.add_argument("-c", "--class", dest="classes", nargs="+", required=True,
-                    help="Eine oder mehrere Klassen, z. B. 8c oder 5a 5b 5c")
-    ap.add_argument("-d", "--date", dest="date", default=None,
-                    help='Optionales Datum, z. B. "17.09.2025" (Teiltreffer erlaubt).')
-    args = ap.parse_args()
+RENAME = {
+    "datum": "Datum",
+    "klasse": "Klassen",
+    "stunde": "Stunde",
+    "fach": "Fach",
+    "lehrkraft": "Lehrkraft",
+    "text": "Vertretungstext",
+}
+KEEP_ORDER = ["Datum", "Klassen", "Stunde", "Fach", "Lehrkraft", "Vertretungstext"]
 
-    data = json.loads(Path(IN_JSON).read_text(encoding="utf-8"))
-    df = pd.DataFrame(data)
-    if df.empty:
-        print("Keine Daten in", IN_JSON)
-        return
 
-    # Datum aus HTML ableiten, wenn leer
-    detected = detect_date_from_html()
+def load(path: str | Path = IN_JSON) -> tuple[list[dict], str | None]:
+    """Normalisierte Zeilen; leeres Datum wird (falls möglich) aus dem HTML ergänzt.
+
+    Gibt (Zeilen, erkanntes Datum oder None) zurück."""
+    records = json.loads(Path(path).read_text(encoding="utf-8"))
+    detected = detect_date_from_html() if records else None
     if detected:
-        mask_empty = df["datum"].isna() | (df["datum"].astype(str).str.strip() == "")
-        df.loc[mask_empty, "datum"] = detected
+        for r in records:
+            if not str(r.get("datum") or "").strip():
+                r["datum"] = detected
+    return records, detected
 
-    # Datum (optional) filtern
-    if args.date:
-        df = df[df["datum"].fillna("").str.contains(re.escape(args.date), case=False, na=False)]
 
-    # Klassen filtern
-    df = df[df["klasse"].apply(lambda x: class_matches(str(x), args.classes))]
+def _number(x) -> float | None:
+    try:
+        n = float(x)
+    except (TypeError, ValueError):
+        return None
+    return n if n == n else None  # NaN
 
-    # Offensichtliche Meta-/Kopfzeilen entfernen
-    df["stunde_num"] = pd.to_numeric(df["stunde"], errors="coerce")
-    df = df[df["stunde_num"].notna()]
-    df = df[~df["klasse"].astype(str).str.startswith("Klassen:")]
 
-    if df.empty:
-        print("Keine Zeilen nach Filter.")
-        return
+def _sort_key(r: dict) -> tuple:
+    """Datum, Klassen, Stunde (numerisch), Fach, Lehrkraft; fehlende Werte zuletzt."""
+    return tuple((r[c] is None, r[c] or "") for c in ("Datum", "Klassen")) + (_number(r["Stunde"]),) + \
+        tuple((r[c] is None, r[c] or "") for c in ("Fach", "Lehrkraft"))
+
+
+def clean(records: list[dict]) -> list[dict]:
+    """Meta-/Kopfzeilen entfernen, Spalten benennen (KEEP_ORDER) und sortieren."""
+    rows = [{new: r.get(old) for old, new in RENAME.items()} for r in records
+            if _number(r.get("stunde")) is not None and not str(r.get("klasse")).startswith("Klassen:")]
+    rows.sort(key=_sort_key)
+    return rows
+
+
+def natural_key(name: str):
+    return [(0, int(t), "") if t.isdigit() else (1, 0, t) for t in re.split(r"(\d+)", name.lower()) if t]
+
 
-    # Spalten sauber benennen und sortieren
-    rename = {
-        "datum": "Datum",
-        "klasse": "Klassen",
-        "stunde": "Stunde",
-        "fach": "Fach",
-        "lehrkraft": "Lehrkraft",
-        "text": "Vertretungstext",
-    }
-    keep_order = ["Datum", "Klassen", "Stunde", "Fach", "Lehrkraft", "Vertretungstext"]
-
-    df_clean = df.rename(columns=rename)
-    df_clean = df_clean[keep_order].copy()
-
-    df_clean["Stunde_num"] = pd.to_numeric(df_clean["Stunde"], errors="coerce")
-    df_clean.sort_values(["Datum", "Klassen", "Stunde_num", "Fach", "Lehrkraft"], inplace=True, na_position="last")
-    df_clean.drop(columns=["Stunde_num"], inplace=True)
-
-    base = "untis_subst_" + "_".join(args.classes)
+def write_clean(rows: list[dict], classes: list[str]) -> tuple[str, str]:
+    base = "untis_subst_" + "_".join(classes)
     out_csv = base + "_clean.csv"
     out_json = base + "_clean.json"
+    # Format wie bisher mit pandas (to_csv/to_json): Zeilenende der Plattform, JSON ohne
+    # Leerzeichen nach ":" und mit "\/" – bestehende Abnehmer der Dateien sehen keinen Unterschied
+    with open(out_csv, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=KEEP_ORDER, lineterminator=os.linesep)
+        writer.writeheader()
+        writer.writerows(rows)
+    text = json.dumps(rows, ensure_ascii=False, indent=2, separators=(",", ":")).replace("/", "\\/")
+    Path(out_json).write_text(text, encoding="utf-8")
+    return out_csv, out_json
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Filtert Vertretungen nach Klassen/Datum und erzeugt Clean-CSV.")
+    ap.add_argument("-c", "--class", dest="classes", nargs="+", action="append",
+                    help="Eine oder mehrere Klassen, z. B. 8c oder 5a 5b 5c; mehrfach angegeben "
+                         "entsteht je -c eine eigene Ausgabe")
+    ap.add_argument("--all-classes", action="store_true",
+                    help="je vorkommender Klasse eine Ausgabe (untis_subst_<klasse>_clean.*)")
+    ap.add_argument("-d", "--date", dest="date", default=None,
+                    help='Optionales Datum, z. B. "17.09.2025" (Teiltreffer erlaubt).')
+    ap.add_argument("-g", "--grep", default=None,
+                    help='Volltextsuche in Fach/Lehrkraft/Vertretungstext, z. B. "Mül entfällt" '
+                         '(alle Wörter müssen vorkommen)')
+    args = ap.parse_args(argv)
+    if not args.classes and not args.all_classes and not args.grep:
+        ap.error("-c/--class, --all-classes oder --grep angeben")
+
+    records, detected = load(IN_JSON)
+    if not records:
+        print("Keine Daten in", IN_JSON)
+        return
+
+    # Volltext (optional): Zeilen-IDs des Index = Positionen in der geladenen JSON
+    if args.grep:
+        import untis_search  # nur hier gebraucht
 
-    df_clean.to_csv(out_csv, index=False, encoding="utf-8-sig")
-    df_clean.to_json(out_json, orient="records", force_ascii=False, indent=2)
+        hit = untis_search.Searcher.for_records(records, untis_search.search_path(Path(IN_JSON))).search(args.grep)
+        if hit is not None:
+            records = [records[i] for i in hit]
 
-    print(f"OK. {len(df_clean)} Zeilen → {out_csv} / {out_json}")
+    # Datum (optional) filtern
+    if args.date:
+        want = args.date.lower()
+        records = [r for r in records if want in str(r.get("datum") or "").lower()]
+
+    # Einmal bereinigen/sortieren und die Klassen einmal indizieren; jede Ausgabe ist ein Ausschnitt
+    rows = clean(records)
+    index, display = class_index([r["Klassen"] for r in rows])
+    groups = list(args.classes or [])
+    if args.all_classes:
+        groups += [[display[t]] for t in sorted(index, key=natural_key)]
+    if not groups:  # nur --grep: eine Ausgabe über alle Klassen
+        groups = [None]
+
+    written = 0
+    for classes in groups:
+        selected = rows if classes is None else [rows[i] for i in select(index, classes)]
+        classes = classes or ["suche"]
+        if not selected:
+            print("Keine Zeilen nach Filter." if len(groups) == 1 else f"[skip] {' '.join(classes)}: keine Zeilen")
+            continue
+        out_csv, out_json = write_clean(selected, classes)
+        written += 1
+        print(f"OK. {len(selected)} Zeilen → {out_csv} / {out_json}")
+    if len(groups) > 1:
+        print(f"OK. {written} von {len(groups)} Ausgaben geschrieben")
     if detected:
         print(f"Hinweis: Datum automatisch erkannt: {detected}")
 
@@ -1,8 +1,16 @@
 # untis_inspect.py
 # Zweck: Analysiert webuntis_subst.json, zeigt Spalten/Zeilen je Tabelle
 # und bewertet, welche Tabelle wahrscheinlich die Vertretungen enthält.
+# Mit einer normalisierten JSON (untis_subst_normalized.json, Liste von Zeilen) stattdessen:
+# Zeilen je Datum, Füllgrad je Feld, Zeilen je Klasse und eine kleine Vorschau.
+# Nur Standardbibliothek – startet auch auf Kiosk-PC/Raspberry Pi ohne spürbare Wartezeit.
+#
+# Beispiele:
+#   python untis_inspect.py
+#   python untis_inspect.py untis_subst_normalized.json
 
 import json
+import sys
 from collections import Counter
 
 JSON_PATH = "webuntis_subst.json"
@@ -24,10 +32,45 @@ def score_columns(cols):
                 break
     return score, sorted(set(hits))
 
-def main():
-    with open(JSON_PATH, "r", encoding="utf-8") as f:
+def inspect_normalized(records):
+    """Übersicht über einen normalisierten Stand (Liste von Zeilen-Dicts)."""
+    from untis_filter import natural_key, class_index
+
+    data = [r for r in records if r.get("gruppe") != 1]
+    print(f"Normalisierter Stand: {len(records)} Zeilen "
+          f"({len(data)} Vertretungen, {len(records) - len(data)} Info-Zeilen)\n")
+
+    print("Zeilen je Datum:")
+    for datum, n in sorted(Counter(r.get("datum") or "—" for r in data).items()):
+        print(f"  {datum:<12} {n:>5}")
+
+    keys = list(dict.fromkeys(k for r in records for k in r))
+    print("\nFüllgrad je Feld (Vertretungen):")
+    for k in keys:
+        filled = sum(1 for r in data if str(r.get(k) if r.get(k) is not None else "").strip())
+        print(f"  {k:<20} {filled:>5}/{len(data)}")
+
+    index, display = class_index([r.get("klasse") for r in data])
+    print(f"\nKlassen: {len(index)}")
+    print("  " + ", ".join(f"{display[t]} ({len(index[t])})" for t in sorted(index, key=natural_key)))
+
+    if data:
+        print("\nVorschau (erste 1–2 Zeilen):")
+        for i, r in enumerate(data[:2], 1):
+            nonempty = {k: v for k, v in r.items() if str(v).strip()}
+            print(f"  {i}: {nonempty}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv  # ohne argparse: schnellerer Start
+    path = argv[0] if argv else JSON_PATH
+    with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
+    if isinstance(data, list):  # normalisierter Stand
+        inspect_normalized(data)
+        return
+
     tables = data.get("tables", {})
     if not tables:
         print("Keine 'tables' im JSON gefunden. Prüfe webuntis_subst_raw.html oder Skript.")
@@ -1,71 +1,69 @@
 # untis_monitor_scrape.py
-# Lädt "heute", versucht dann zum nächsten Slide ("morgen") zu wechseln,
-# extrahiert beide Zustände und führt die Tabellen zusammen.
-# JSON wird NaN-frei geschrieben.
-
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
-import pandas as pd
-import json, re, time, hashlib
-from datetime import datetime
+# Lädt den Monitor und liest jeden Slide (Tag: "heute", "morgen", …) direkt aus dem
+# Widget-DOM, verwirft inhaltsgleiche Slides und führt die Tabellen zusammen.
+# Je Slide entsteht webuntis_subst_raw_<n>.html. JSON wird NaN-frei geschrieben.
+#
+# Modi:
+#   --mode browser  (Standard) Chromium via Playwright, liest das gerenderte DOM
+#   --mode http     ruft den JSON-Datenendpunkt des Monitors direkt ab (ohne Browser)
+#   --mode auto     erst HTTP, bei Fehler Fallback auf Browser
+#
+# Offline-Test des HTTP-Modus:
+#   python tools/untis_stub_server.py --from-html webuntis_subst_raw_1.html
+#   python untis_monitor_scrape.py --mode http --url "http://127.0.0.1:8765/WebUntis/monitor?school=Barmstedt%20Schule&monitorType=subst&format=Homepage"
+#
+# pandas/BeautifulSoup/lxml laden erst beim Extrahieren (nach dem Lesen der Seite),
+# Playwright erst beim Browser-Start – der Start bis zum Seitenaufruf bleibt schlank.
+
+from __future__ import annotations
+
+import argparse, json, os, re, time, hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlsplit
+
+from tools.instrument import RECORDER, stage
+from untis_extract import PARSERS, ParsedTable, parse_tables, scrape_frames
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 URL = "https://nessa.webuntis.com/WebUntis/monitor?school=Barmstedt%20Schule&monitorType=subst&format=Homepage"
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
 
 OUT_CSV  = "webuntis_subst.csv"
 OUT_JSON = "webuntis_subst.json"
-RAW1_HTML = "webuntis_subst_raw_1.html"
-RAW2_HTML = "webuntis_subst_raw_2.html"  # optional, nur wenn Slide 2 gefunden
+RAW_HTML_PATTERN = "webuntis_subst_raw_{}.html"  # ein Dokument je Slide (Tag), 1 = heute
+RAW1_HTML = RAW_HTML_PATTERN.format(1)
+RAW2_HTML = RAW_HTML_PATTERN.format(2)  # optional, nur wenn Slide 2 gefunden
+OUT_PAYLOAD = "webuntis_subst_payload.json"  # optional (--save-payload), Fixture für den Stub-Server
+
+# ---------- HTTP-Modus: JSON-Datenendpunkt des Monitors ----------
+DATA_PATH = "/WebUntis/monitor/substitution/data"
+HTTP_DAYS = 2  # heute + morgen, entspricht Slide 1/2
+HTTP_COLUMNS = ["Stunde", "Klassen", "Fach", "Lehrkraft", "Vertretungstext"]
+# Anzeige-Optionen, die der Monitor-Client mitsendet (Format "Homepage")
+HTTP_REQUEST_DEFAULTS = {
+    "strikethrough": True, "mergeBlocks": True, "showOnlyFutureSub": False,
+    "showBreakSupervisions": False, "showTeacher": True, "showClass": True,
+    "showHour": True, "showInfo": True, "showRoom": False, "showSubject": True,
+    "groupBy": 1, "hideAbsent": False, "departmentIds": [], "departmentElementType": -1,
+    "hideCancelWithSubstitution": True, "hideCancelCausedByEvent": False,
+    "showTime": False, "showSubstText": True, "showAbsentElements": [],
+    "showAffectedElements": [1], "showUnitTime": False, "showMessages": True,
+    "showStudentgroup": False, "enableSubstitutionFrom": False, "showSubstitutionFrom": 0,
+    "showTeacherOnEvent": False, "showAbsentTeacher": True, "strikethroughAbsentTeacher": True,
+    "activityTypeIds": [], "showEvent": True, "showCancel": True, "showOnlyCancel": False,
+    "showSubstTypeColor": False, "showExamSupervision": False, "showUnheraldedExams": False,
+}
+WEEKDAYS_DE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
 
 # ---------- HTML -> DataFrames ----------
-def _uniq_headers(headers):
-    out, seen = [], {}
-    for i, h in enumerate(headers):
-        name = (h or "").strip() or f"col_{i+1}"
-        if name in seen:
-            seen[name] += 1
-            name = f"{name}_{seen[name]}"
-        else:
-            seen[name] = 1
-        out.append(name)
-    return out
-
-def extract_tables(html: str):
-    soup = BeautifulSoup(html, "lxml")
-    tables = soup.find_all("table")
-    frames = []
-    for ti, table in enumerate(tables):
-        headers = []
-        thead = table.find("thead")
-        if thead:
-            headers = [h.get_text(strip=True) for h in thead.find_all(["th", "td"])]
-        rows = table.find_all("tr")
-        start_idx = 0
-        if not headers and rows:
-            ths = rows[0].find_all("th")
-            if ths:
-                headers = [th.get_text(strip=True) for th in ths]
-                start_idx = 1
-        data_rows = []
-        for r in rows[start_idx:]:
-            cells = r.find_all(["td", "th"])
-            if not cells:
-                continue
-            row = [c.get_text(separator=" ", strip=True) for c in cells]
-            if any(cell for cell in row):
-                data_rows.append(row)
-        if not data_rows:
-            continue
-        maxlen = max(len(r) for r in data_rows)
-        if not headers or len(headers) != maxlen:
-            headers = [f"col_{i+1}" for i in range(maxlen)]
-        headers = _uniq_headers(headers)
-        normalized = [r + [""] * (maxlen - len(r)) for r in data_rows]
-        df = pd.DataFrame(normalized, columns=headers)
-        df.insert(0, "table_index", ti)
-        df.columns = _uniq_headers(list(df.columns))
-        frames.append(df)
-    return frames
+def extract_tables(html: str, parser: str = "bs4"):
+    return scrape_frames(parse_tables(html, parser))
 
 # ---------- Warten / Slides ----------
 def _counts_from_html(html: str):
@@ -75,102 +73,586 @@ def _counts_from_html(html: str):
         html, flags=re.S | re.I))
     return tables, headers
 
-def _wait_ready(page, min_tables=4, min_headers=1, timeout_s=90):
-    deadline = time.time() + timeout_s
-    html = page.content()
-    while time.time() < deadline:
-        html = page.content()
-        t, h = _counts_from_html(html)
-        if t >= min_tables and h >= min_headers:
-            break
-        page.wait_for_timeout(700)
-    return html
-
-def _try_next_slide(page):
-    """Versucht, zum 'Morgen'-Slide zu wechseln: Pfeil rechts & gängige Next-Buttons."""
-    # 1) Tastatur (viele Slider reagieren auf ArrowRight/PageDown)
-    for key in ["ArrowRight", "PageDown"]:
-        try:
-            page.keyboard.press(key)
-            page.wait_for_timeout(1200)
-            return True
-        except Exception:
-            pass
-    # 2) typische Next-Selectoren durchprobieren
-    selectors = [
-        ".slick-next", ".swiper-button-next", ".carousel-control-next",
-        "[aria-label*='weiter' i]", "[aria-label*='next' i]",
-        "button:has-text('Weiter')", "button:has-text('Nächste')",
-        ".next", ".arrow-right"
-    ]
-    for sel in selectors:
-        try:
-            loc = page.locator(sel)
-            if loc.count() > 0:
-                loc.first.click()
-                page.wait_for_timeout(1200)
-                return True
-        except Exception:
+# Wird im Browser ausgewertet (page.wait_for_function): kein page.content()-Polling mehr
+READY_JS = """({minTables, minHeaders}) => {
+  const tables = document.querySelectorAll('.gp_SubstitutionMonitor table').length;
+  if (tables < minTables) return false;
+  const want = ['Stunde', 'Klassen', 'Fach', 'Lehrkraft', 'Vertretungstext'];
+  let headers = 0;
+  for (const tr of document.querySelectorAll('.gp_SubstitutionMonitor thead tr')) {
+    const cells = Array.from(tr.querySelectorAll('th, td'), c => c.textContent.trim());
+    if (want.every(h => cells.includes(h))) headers++;
+  }
+  return headers >= minHeaders;
+}"""
+
+# Liest alle Monitor-Blöcke (ein Block = ein Tag) direkt aus dem Widget-DOM – ohne Tastendruck
+# und ohne feste Wartezeit. "bodies" sind alle tbody-Inhalte der AutoScrollingTable; das Widget
+# dupliziert seinen Body für endloses Scrollen, Dubletten werden in Python per Hash verworfen.
+CAPTURE_SLIDES_JS = """() => Array.from(document.querySelectorAll('.gp_SubstitutionMonitor'))
+  .filter(m => m.querySelector('.grupet_widget_AutoScrollingTable'))  // Ticker-Block hat keine Tabelle
+  .map(m => {
+  const text = sel => ((m.querySelector(sel) || {}).textContent || '').trim();
+  const widget = m.querySelector('.grupet_widget_AutoScrollingTable');
+  const tables = widget ? Array.from(widget.querySelectorAll('table')) : [];
+  return {
+    date: text('.title span'),
+    status: text('.status'),
+    absence: (m.querySelector('.gp_SubstitutionMonitor_AbsenceHeader') || {}).outerHTML || '',
+    thead: (tables.find(t => t.tHead) || {}).outerHTML || '',
+    bodies: tables.filter(t => t.tBodies.length).map(t => t.tBodies[0].innerHTML),
+  };
+  })"""
+
+
+def _remaining_ms(deadline: float | None, cap_s: float) -> float:
+    """Timeout für den nächsten Schritt: höchstens cap_s, höchstens bis zur Gesamt-Deadline."""
+    cap_ms = cap_s * 1000
+    if deadline is None:
+        return cap_ms
+    return max(0.0, min(cap_ms, (deadline - time.monotonic()) * 1000))
+
+
+def _wait_ready(page, min_tables=4, min_headers=1, timeout_s=90, deadline=None) -> bool:
+    """Wartet im Browser, bis Monitor-Tabellen und Kopfzeile existieren (False bei Timeout)."""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    timeout = _remaining_ms(deadline, timeout_s)
+    if timeout <= 0:
+        return False
+    try:
+        page.wait_for_function(READY_JS, arg={"minTables": min_tables, "minHeaders": min_headers},
+                               timeout=timeout, polling="mutation")
+        return True
+    except PlaywrightTimeoutError:
+        return False  # Timeout → Teilergebnis; Absturz/geschlossene Seite/JS-Fehler → Eskalation im Aufrufer
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _monitor_document(date_text: str, status: str, absence_html: str, thead_html: str,
+                      body_tables: list[str]) -> str:
+    """Eigenständiges HTML-Dokument für einen Slide im DOM-Format des Monitors."""
+    parts = ['<div class="gp_SubstitutionMonitor">',
+             f'<div class="title">Vertretungen:<span> {date_text}</span></div>',
+             f'<div class="status">{status}</div>',
+             absence_html,
+             '<div class="grupet_widget_ScrollableTable grupet_widget_AutoScrollingTable">',
+             f"<div>{thead_html}</div>"]
+    parts += [f"<div><table>{body}</table></div>" for body in body_tables]
+    parts.append("</div></div>")
+    body = "\n".join(parts)
+    return f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"/></head><body class="WebUntisMonitor">\n{body}\n</body></html>\n'
+
+
+def slides_from_blocks(blocks: list[dict]) -> list[str]:
+    """Baut aus den per CAPTURE_SLIDES_JS gelesenen Monitor-Blöcken je Tag ein Slide-Dokument.
+
+    Gleiche tbody-Inhalte (Scroll-Kopie des Widgets) werden über ihren Hash nur einmal übernommen.
+    """
+    slides = []
+    for block in blocks:
+        seen, bodies = set(), []
+        for body in block.get("bodies") or []:
+            h = _content_hash(body)
+            if h not in seen:
+                seen.add(h)
+                bodies.append(f"<tbody>{body}</tbody>")
+        slides.append(_monitor_document(block.get("date", ""), block.get("status", ""),
+                                        block.get("absence", ""), block.get("thead", ""), bodies))
+    return slides
+
+
+def dedupe_slides(slides: list[str]) -> tuple[list[str], list[str], int]:
+    """Verwirft inhaltsgleiche Slides vor dem Parsen/Schreiben.
+
+    Gibt (eindeutige Slides, deren Hashes, Anzahl verworfener Slides) zurück.
+    """
+    unique, hashes = [], []
+    for html in slides:
+        if not html:
+            continue
+        h = _content_hash(html)
+        if h in hashes:
             continue
-    return False
+        unique.append(html)
+        hashes.append(h)
+    return unique, hashes, len(slides) - len(unique)
+
+
+@dataclass
+class Snapshot:
+    """Eindeutige Slides eines Laufs, jeder genau einmal geparst."""
+    slides: list[str]
+    hashes: list[str]
+    dropped: int
+    tables: list[list[ParsedTable]]  # je Slide
+
+
+def make_snapshot(slides: list[str], parser: str = "bs4") -> Snapshot:
+    with stage("extract", parser=parser) as m:
+        slides, hashes, dropped = dedupe_slides(slides)
+        snap = Snapshot(slides, hashes, dropped, [parse_tables(html, parser) for html in slides])
+        m["rows"] = sum(len(t.rows) for tables in snap.tables for t in tables)
+    return snap
+
+# ---------- HTTP-Modus ----------
+class HttpSession:
+    """Eine Keep-Alive-Verbindung pro Host, wiederverwendet für alle Requests eines Laufs.
+
+    Merkt sich Cookies (JSESSIONID, schoolname), die der Monitor beim ersten Aufruf setzt.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30):
+        import http.client  # nur im HTTP-Modus (zieht email/ssl nach, ~35 ms Start)
+
+        self._http = http.client
+        parts = urlsplit(base_url)
+        self.scheme, self.host = parts.scheme, parts.netloc
+        self.timeout = timeout
+        self.cookies: dict[str, str] = {}
+        self.requests = 0
+        self.bytes_in = 0
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            cls = self._http.HTTPSConnection if self.scheme == "https" else self._http.HTTPConnection
+            self._conn = cls(self.host, timeout=self.timeout)
+        return self._conn
+
+    def request(self, method: str, path: str, body: dict | None = None) -> bytes:
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/json, text/html, */*"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json;charset=UTF-8"
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        # zweiter Versuch mit frischer Verbindung, falls der Server Keep-Alive beendet hat
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+                break
+            except (self._http.HTTPException, OSError):
+                self.close()
+                if attempt == 2:
+                    raise
+        self.requests += 1
+        self.bytes_in += len(raw)
+        for cookie in resp.headers.get_all("Set-Cookie") or []:
+            name, _, rest = cookie.partition("=")
+            self.cookies[name.strip()] = rest.split(";", 1)[0]
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status} für {method} {path}")
+        return raw
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _http_request_body(url: str, day: date, offset: int) -> dict:
+    query = parse_qs(urlsplit(url).query)
+    return {
+        "formatName": query.get("format", ["Homepage"])[0],
+        "schoolName": query.get("school", [""])[0],
+        "date": int(day.strftime("%Y%m%d")),
+        "dateOffset": offset,
+        **HTTP_REQUEST_DEFAULTS,
+    }
+
+
+def _payload_date(payload: dict, fallback: date) -> date:
+    try:
+        return datetime.strptime(str(payload.get("date")), "%Y%m%d").date()
+    except (TypeError, ValueError):
+        return fallback
+
+
+def payload_to_html(payload: dict, day: date) -> str:
+    """Baut aus einer Monitor-Payload das DOM-Gerüst nach, das der Browser rendert.
+
+    So liefern extract_tables() und untis_normalize.py für beide Modi dieselben Frames
+    (Gruppen-Spalte, Trenner-Spalte, danach HTTP_COLUMNS).
+    """
+    day = _payload_date(payload, day)
+    title = f"{WEEKDAYS_DE[day.weekday()]}, {day.strftime('%d.%m.%Y')}"
+    affected = payload.get("affectedElements") or {}
+    classes = affected.get("1") or []
+
+    absence = ['<div class="gp_SubstitutionMonitor_AbsenceHeader"><table>']
+    if classes:
+        absence.append('<tr class="odd"><td><span class="bold">Klassen: </span>'
+                       f'<span>{", ".join(classes)}</span></td></tr>')
+    absence.append('</table></div>')
+    ths = "".join(f"<th><div>{c}</div></th>" for c in HTTP_COLUMNS)
+    thead = f"<table><thead><tr><th><div>&nbsp;</div></th><th><div>&nbsp;</div></th>{ths}</tr></thead></table>"
+
+    rows = []
+    last_group = None
+    for row in payload.get("rows") or []:
+        group = row.get("group") or ""
+        if last_group is not None and group != last_group:
+            rows.append('<tr class="grupet_widget_ScrollableTable_separator" data-untis-separator="true"></tr>')
+        last_group = group
+        cell_classes = row.get("cellClasses") or {}
+        cells = list(row.get("data") or [])
+        cells += [""] * (len(HTTP_COLUMNS) - len(cells))
+        tds = "".join(
+            f'<td class="{" ".join(cell_classes.get(str(i), []))}">{v or ""}</td>'
+            for i, v in enumerate(cells)
+        )
+        rows.append(f'<tr><td>{group}</td><td class="grupet_widget_ScrollableTable_separator"></td>{tds}</tr>')
+    status = f'Stand: {payload.get("lastUpdate") or ""}'
+    return _monitor_document(title, status, "".join(absence), thead, [f"<tbody>{''.join(rows)}</tbody>"])
+
+
+def scrape_http(url: str, days: int = HTTP_DAYS, save_payload: str | None = None):
+    """Holt die Vertretungen ohne Browser direkt vom Datenendpunkt.
+
+    Gibt (html_slides, info) zurück; je Tag ein HTML-Dokument im DOM-Format des Monitors.
+    """
+    parts = urlsplit(url)
+    data_path = f"{DATA_PATH}?{parts.query}" if parts.query else DATA_PATH
+    t0 = time.perf_counter()
+    session = HttpSession(url)
+    with stage("http_fetch", days=days) as m:
+        try:
+            # erster Aufruf setzt Session-Cookies (wie im Browser)
+            session.request("GET", f"{parts.path}?{parts.query}" if parts.query else parts.path)
+            today = date.today()
+            slides, payloads = [], {}
+            for offset in range(days):
+                raw = session.request("POST", data_path, body=_http_request_body(url, today, offset))
+                data = json.loads(raw.decode("utf-8"))
+                payload = data.get("payload") if isinstance(data, dict) else None
+                if not isinstance(payload, dict):
+                    raise ValueError(f"unerwartete Antwort vom Datenendpunkt (dateOffset={offset})")
+                payloads[str(offset)] = data
+                slides.append(payload_to_html(payload, today + timedelta(days=offset)))
+        finally:
+            session.close()
+        m.update(requests=session.requests, net_bytes=session.bytes_in)
+
+    if save_payload:
+        Path(save_payload).write_text(
+            json.dumps({"url": url, "days": payloads}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    info = {
+        "requests": session.requests,
+        "bytes": session.bytes_in,
+        "elapsed_ms": round((time.perf_counter() - t0) * 1000),
+    }
+    return slides, info
+
 
 # ---------- JSON helper (NaN -> None) ----------
 def df_records(df: pd.DataFrame):
+    import pandas as pd
+
     return df.where(pd.notna(df), None).to_dict(orient="records")
 
-def main():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            locale="de-DE", timezone_id="Europe/Berlin",
-            viewport={"width": 2400, "height": 1400},  # breit: zweiter Tag hat Platz
-            user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
-        )
-        page = context.new_page()
-        page.goto(URL, wait_until="networkidle", timeout=120000)
-        page.wait_for_timeout(2500)  # Grundpuffer
-
-        # ---- Slide 1 (heute)
-        html1 = _wait_ready(page, min_tables=4, min_headers=1, timeout_s=60)
-        Path(RAW1_HTML).write_text(html1, encoding="utf-8")
-        t1, h1 = _counts_from_html(html1)
-
-        # ---- Slide 2 (morgen) erzwingen
-        had_next = _try_next_slide(page)
-        page.wait_for_timeout(1200)
-        html2 = page.content()
-        # wenn HTML wirklich anders ist: erneut auf readiness warten
-        if hashlib.md5(html1.encode("utf-8")).hexdigest() != hashlib.md5(html2.encode("utf-8")).hexdigest():
-            html2 = _wait_ready(page, min_tables=4, min_headers=1, timeout_s=30)
-            Path(RAW2_HTML).write_text(html2, encoding="utf-8")
-            t2, h2 = _counts_from_html(html2)
+# ---------- Request-Routing (Browser-Modus) ----------
+# Profile legen fest, was der Browser gar nicht erst lädt. Geprüft wird in dieser Reihenfolge:
+#   1. block_hosts / block_urls (Teilstring) → abbrechen
+#   2. allow_urls (Teilstring) → laden
+#   3. block_types → abbrechen
+#   4. block_scripts_not_allowed: übrige Skripte abbrechen
+# Eigene Profile: JSON-Datei mit denselben Schlüsseln an --route-profile übergeben.
+ROUTE_PROFILES = {
+    "off": None,
+    "lean": {
+        "block_types": ["image", "font", "media"],
+        "block_hosts": ["www.google-analytics.com", "www.googletagmanager.com"],
+        "block_urls": [],
+        "allow_urls": [],
+        "block_scripts_not_allowed": False,
+    },
+    "strict": {
+        "block_types": ["image", "font", "media", "stylesheet"],
+        "block_hosts": ["www.google-analytics.com", "www.googletagmanager.com"],
+        "block_urls": ["/TickerMonitor.js", "/Ticker.js", "socket.io"],
+        # Skripte, ohne die der SubstitutionMonitor nicht rendert (dojo-Loader + Widgets)
+        "allow_urls": ["/js/lib/dojo/", "/js/lib/dijit/", "/js/lib/dojox/", "/js/lib/put-selector/",
+                       "/js/grupet/", "/js/webuntis-monitor/", "/js/untis/", "/js/clusterize"],
+        "block_scripts_not_allowed": True,
+    },
+}
+ROUTE_SIZES = ".route_sizes.json"  # zuletzt gesehene Größen je URL → Schätzung eingesparter Bytes
+
+
+def load_route_profile(name_or_path: str) -> dict | None:
+    if name_or_path in ROUTE_PROFILES:
+        return ROUTE_PROFILES[name_or_path]
+    return json.loads(Path(name_or_path).read_text(encoding="utf-8"))
+
+
+def _route_blocked(profile: dict, url: str, resource_type: str) -> bool:
+    if resource_type == "document":
+        return False
+    if urlsplit(url).hostname in profile.get("block_hosts", []):
+        return True
+    if any(pat in url for pat in profile.get("block_urls", [])):
+        return True
+    if any(pat in url for pat in profile.get("allow_urls", [])):
+        return False
+    if resource_type in profile.get("block_types", []):
+        return True
+    return resource_type == "script" and profile.get("block_scripts_not_allowed", False)
+
+
+class RouteStats:
+    """page.route-Handler: bricht nicht benötigte Requests ab und zählt mit."""
+
+    def __init__(self, name: str, profile: dict, sizes_path: str | Path = ROUTE_SIZES):
+        self.name = name
+        self.profile = profile
+        self.sizes_path = Path(sizes_path)
+        try:
+            self.sizes: dict[str, int] = json.loads(self.sizes_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.sizes = {}
+        self.requests = 0
+        self.blocked = 0
+        self.blocked_by_type: dict[str, int] = {}
+        self.bytes_loaded = 0
+        self.bytes_saved = 0
+        self.saved_known = 0
+
+    def _count(self, req) -> bool:
+        """Zählt den Request mit; True = abbrechen."""
+        self.requests += 1
+        if not _route_blocked(self.profile, req.url, req.resource_type):
+            return False
+        self.blocked += 1
+        self.blocked_by_type[req.resource_type] = self.blocked_by_type.get(req.resource_type, 0) + 1
+        if req.url in self.sizes:
+            self.bytes_saved += self.sizes[req.url]
+            self.saved_known += 1
+        return True
+
+    def handle(self, route) -> None:
+        if self._count(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def handle_async(self, route) -> None:
+        """Wie handle, für die async-API von Playwright (untis_multi.py)."""
+        if self._count(route.request):
+            await route.abort()
         else:
-            html2, t2, h2 = "", 0, 0
+            await route.continue_()
+
+    def on_response(self, response) -> None:
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            self.bytes_loaded += int(length)
+            self.sizes[response.url] = int(length)
+
+    def as_meta(self) -> dict:
+        try:
+            self.sizes_path.write_text(json.dumps(self.sizes), encoding="utf-8")
+        except OSError:
+            pass
+        return {
+            "profile": self.name,
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "blocked_by_type": self.blocked_by_type,
+            "bytes_loaded": self.bytes_loaded,
+            # nur für blockierte URLs, deren Größe aus einem früheren Lauf bekannt ist
+            "bytes_saved_est": self.bytes_saved,
+            "bytes_saved_known_requests": self.saved_known,
+        }
+
+
+def _install_routing(page, route_profile: str | None):
+    profile = load_route_profile(route_profile) if route_profile else None
+    if not profile:
+        return None
+    stats = RouteStats(route_profile, profile)
+    page.route("**/*", stats.handle)
+    page.on("response", stats.on_response)
+    return stats
+
+
+# ---------- Browser-Modus ----------
+CONTEXT_OPTIONS = dict(
+    locale="de-DE", timezone_id="Europe/Berlin",
+    viewport={"width": 2400, "height": 1400},  # breit: zweiter Tag hat Platz
+    user_agent=USER_AGENT,
+)
+
+
+def _launch_browser(p):
+    browser = p.chromium.launch(headless=True)
+    context = browser.new_context(**CONTEXT_OPTIONS)
+    return browser, context
+
+
+def _navigate(page, deadline: float | None, url: str | None = None) -> bool:
+    """page.goto(url) bzw. ohne url page.reload(), begrenzt durch die Gesamt-Deadline.
+
+    False, wenn keine Zeit mehr bleibt oder die Navigation abläuft; read_monitor liefert
+    dann das bis dahin geladene Dokument als Teilergebnis."""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    timeout = _remaining_ms(deadline, 120)
+    if timeout <= 0:
+        return False
+    try:
+        # Bereitschaft prüft _wait_ready im DOM; auf networkidle muss nicht gewartet werden
+        if url is None:
+            page.reload(wait_until="domcontentloaded", timeout=timeout)
+        else:
+            page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def _open_monitor(context, url: str, deadline: float | None = None, route_profile: str | None = None):
+    """Öffnet den Monitor in einer neuen Seite; gibt (page, route_stats) zurück."""
+    page = context.new_page()
+    stats = _install_routing(page, route_profile)
+    _navigate(page, deadline, url)
+    return page, stats
+
+
+def read_monitor(page, deadline: float | None = None, t_start: float | None = None, stats=None):
+    """Liest alle Slides (Tage) der offenen Monitor-Seite direkt aus dem Widget-DOM.
 
+    Gibt (slides, info) zurück; je Tag ein HTML-Dokument. Ist der Monitor bis zur
+    Gesamt-Deadline nicht bereit, wird das bis dahin gerenderte HTML als einziger Slide
+    zurückgegeben (info["partial"] = True).
+    """
+    t_start = time.monotonic() if t_start is None else t_start
+
+    with stage("ready_wait") as m:
+        ready = _wait_ready(page, min_tables=4, min_headers=1, timeout_s=60, deadline=deadline)
+        m["ready"] = ready
+    info = {
+        "ready": ready,
+        "time_to_ready_ms": round((time.monotonic() - t_start) * 1000) if ready else None,
+        "partial": not ready,
+        "elapsed_ms": round((time.monotonic() - t_start) * 1000),
+    }
+    # Slides direkt aus dem DOM (statt Weiterschalten per Tastendruck)
+    with stage("slides") as m:
+        slides = slides_from_blocks(page.evaluate(CAPTURE_SLIDES_JS)) if ready else []
+        if not slides:
+            slides = [page.content()]  # Diagnose: ganzes Dokument
+        m["slides"] = len(slides)
+    if stats is not None:
+        info["routing"] = stats.as_meta()
+    return slides, info
+
+
+def scrape_browser(url: str, deadline_s: float | None = None, route_profile: str | None = "lean"):
+    """Einmaliger Lauf: Chromium starten, Monitor laden, alle Slides lesen, Browser schließen.
+
+    deadline_s begrenzt den gesamten Lauf ab Browserstart (None = unbegrenzt).
+    """
+    from playwright.sync_api import sync_playwright  # nur im Browser-Modus nötig
+
+    t_start = time.monotonic()
+    deadline = t_start + deadline_s if deadline_s else None
+    with sync_playwright() as p:
+        with stage("browser_launch"):
+            browser, context = _launch_browser(p)
+        with stage("goto"):
+            page, stats = _open_monitor(context, url, deadline, route_profile)
+        result = read_monitor(page, deadline, t_start, stats)
         context.close()
         browser.close()
+    return result
+
 
+def _close_quietly(obj) -> None:
+    if obj is None:
+        return
+    try:
+        obj.close()
+    except Exception:
+        pass
+
+
+# ---------- Ausgabe ----------
+def _write_text_atomic(path: str | Path, text: str, encoding: str = "utf-8", newline: str | None = None) -> None:
+    """Schreibt über eine temporäre Datei + os.replace, Leser sehen nie halbe Dateien."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(text, encoding=encoding, newline=newline)
+    os.replace(tmp, path)
+
+
+def write_outputs(url: str, mode: str, snap: Snapshot | list[str], info: dict, parser: str = "bs4",
+                  out_dir: str | Path | None = None) -> dict:
+    """Schreibt Raw-HTML je Slide, CSV und JSON (jeweils atomar) und gibt die Meta-Daten zurück.
+
+    Inhaltsgleiche Slides werden vorher verworfen (make_snapshot) und weder geparst noch geschrieben.
+    out_dir legt die Dateien dort statt im Arbeitsverzeichnis ab (ein Ordner je Monitor).
+    """
+    if not isinstance(snap, Snapshot):
+        snap = make_snapshot(snap, parser)
+    base = Path(out_dir) if out_dir is not None else Path()
+    slides = snap.slides
+    slide_meta = []
+    frames_all = []
+    with stage("write_raw", files=len(slides)):
+        for i, html in enumerate(slides, start=1):
+            _write_text_atomic(base / RAW_HTML_PATTERN.format(i), html)
+            t, h = _counts_from_html(html)
+            m = re.search(r"\d{1,2}\.\d{1,2}\.\d{4}", html)
+            slide_meta.append({"file": RAW_HTML_PATTERN.format(i), "hash": snap.hashes[i - 1],
+                               "date": m.group(0) if m else None, "tables": t, "headers": h})
     # ---- Tabellen extrahieren & zusammenführen
-    frames_all = extract_tables(html1)
-    if html2:
-        frames_all += extract_tables(html2)
+    with stage("frames") as m:
+        for tables in snap.tables:
+            frames_all += scrape_frames(tables)
+        m["rows"] = sum(len(f) for f in frames_all)
+    # veraltete Slides eines früheren Laufs nicht weiterverarbeiten
+    i = len(slides) + 1
+    while (base / RAW_HTML_PATTERN.format(i)).exists():
+        (base / RAW_HTML_PATTERN.format(i)).unlink()
+        i += 1
+    html1 = slides[0] if slides else ""
 
     # Diagnose
     meta = {
-        "url": URL,
+        "url": url,
+        "mode": mode,
         "scraped_at": datetime.now().isoformat(timespec="seconds"),
-        "slide1": {"tables": t1, "headers": h1},
-        "slide2": {"tried_next": had_next, "tables": t2, "headers": h2, "captured": bool(html2)},
+        "slides": slide_meta,
+        "slides_dropped_duplicates": snap.dropped,
+        "time_to_ready_ms": info.get("time_to_ready_ms"),
+        "partial": bool(info.get("partial", False)),
+        "elapsed_ms": info.get("elapsed_ms"),
         "frames_total": len(frames_all),
         "locale": "de-DE",
         "timezone": "Europe/Berlin",
     }
+    if mode == "http":
+        meta["http"] = {k: info[k] for k in ("requests", "bytes", "elapsed_ms") if k in info}
+    if info.get("routing"):
+        meta["routing"] = info["routing"]
+    meta["perf"] = RECORDER.as_meta()  # Stufen bis hier (tools/instrument.py); build_site.py ergänzt den Rest
 
     # CSV + JSON schreiben
     if frames_all:
+        import pandas as pd
+
         df_all = pd.concat(frames_all, ignore_index=True, join="outer")
-        df_all.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+        with stage("write_csv", file=OUT_CSV, rows=len(df_all)):
+            _write_text_atomic(base / OUT_CSV, df_all.to_csv(index=False), encoding="utf-8-sig", newline="")
 
         json_obj = {
             "meta": meta,
@@ -179,14 +661,153 @@ def main():
         }
     else:
         # Fallback: gar keine Tabellen
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html1 or "", "lxml")
         items = [el.get_text(" ", strip=True) for el in soup.select("div, li, p") if el.get_text(strip=True)]
         json_obj = {"meta": {**meta, "note": "no tables found, raw text extracted"},
                     "text_blocks": items[:500]}
 
     # Striktes JSON (kein NaN)
-    Path(OUT_JSON).write_text(json.dumps(json_obj, ensure_ascii=False, indent=2, allow_nan=False), encoding="utf-8")
+    with stage("write_json", file=OUT_JSON):
+        _write_text_atomic(base / OUT_JSON, json.dumps(json_obj, ensure_ascii=False, indent=2, allow_nan=False))
+    return meta
+
+
+def fetch_slides(url: str, mode: str = "browser", deadline_s: float | None = None,
+                 route_profile: str | None = "lean", save_payload: str | None = None):
+    """Ein Lauf im gewählten Modus; gibt (slides, info, tatsächlich genutzter Modus) zurück."""
+    if mode in ("http", "auto"):
+        try:
+            slides, info = scrape_http(url, save_payload=save_payload)
+            return slides, info, "http"
+        except Exception as e:
+            if mode == "http":
+                raise
+            print(f"[warn] HTTP-Modus fehlgeschlagen ({e}) – Fallback auf Browser.")
+    slides, info = scrape_browser(url, deadline_s=deadline_s, route_profile=route_profile)
+    return slides, info, "browser"
+
+
+# ---------- Daemon ----------
+RETRY_BASE_S = 2.0  # erste Pause nach wiederholtem Fehler, verdoppelt sich bis höchstens interval
+
+
+def _retry_delay(failures: int, interval: float) -> float:
+    """Pause vor dem nächsten Versuch nach `failures` Fehlern in Folge.
+
+    Nach dem ersten Fehler sofort (Seite neu laden), danach 2, 4, 8 … s, höchstens interval –
+    ein Ausfall des Servers wird so nicht zur Dauerschleife mit Browser-Neustarts."""
+    if failures <= 1:
+        return 0.0
+    return min(interval, RETRY_BASE_S * 2 ** (failures - 2))
+
+
+def run_daemon(url: str, interval: float, mode: str = "browser", deadline_s: float | None = None,
+               route_profile: str | None = "lean", parser: str = "bs4") -> None:
+    """Pollt den Monitor alle `interval` Sekunden und schreibt jede Aktualisierung atomar.
+
+    Browser und Seite bleiben zwischen den Läufen offen; der Monitor aktualisiert sich
+    selbst, daher wird nur das DOM neu gelesen. Fehler-Eskalation:
+    1. Fehler → Seite neu laden, 2. Fehler → neue Seite, ab 3. Fehler → Browser neu starten,
+    Pausen dazwischen nach _retry_delay.
+    Mit mode="http" wird ohne Browser direkt der Datenendpunkt abgefragt; mode="auto" fragt
+    ebenso per HTTP ab und liest nur bei einem HTTP-Fehler über den Browser (wie fetch_slides).
+    """
+    pw = browser = context = page = stats = None
+    failures = 0
+    try:
+        while True:
+            t0 = time.monotonic()
+            deadline = t0 + deadline_s if deadline_s else None
+            RECORDER.reset()  # Messwerte je Lauf
+            try:
+                slides = None
+                if mode in ("http", "auto"):
+                    try:
+                        slides, info = scrape_http(url)
+                        mode_used = "http"
+                    except Exception as e:
+                        if mode == "http":
+                            raise
+                        print(f"[warn] HTTP-Modus fehlgeschlagen ({e}) – Fallback auf Browser.")
+                if slides is None:
+                    if pw is None:
+                        from playwright.sync_api import sync_playwright  # nur im Browser-Modus nötig
+
+                        pw = sync_playwright().start()
+                    if browser is None or not browser.is_connected():
+                        with stage("browser_launch"):
+                            browser, context = _launch_browser(pw)
+                        page = None
+                    if page is None or page.is_closed():
+                        with stage("goto"):
+                            page, stats = _open_monitor(context, url, deadline, route_profile)
+                    elif failures == 1:
+                        with stage("reload"):
+                            _navigate(page, deadline)
+                    slides, info = read_monitor(page, deadline, t0, stats)
+                    if not info["ready"]:
+                        raise RuntimeError("Monitor nicht bereit (Deadline erreicht)")
+                    mode_used = "browser"
+                meta = write_outputs(url, mode_used, slides, info, parser=parser)
+                failures = 0
+                print(f"[daemon] {meta['scraped_at']} {mode_used} frames={meta['frames_total']} "
+                      f"in {time.monotonic() - t0:.1f}s")
+            except Exception as e:
+                failures += 1
+                delay = _retry_delay(failures, interval)
+                print(f"[daemon] Fehler #{failures}: {e}" + (f" – nächster Versuch in {delay:.0f}s" if delay else ""))
+                if failures >= 2:
+                    _close_quietly(page)
+                    page = None
+                if failures >= 3:
+                    _close_quietly(context)
+                    _close_quietly(browser)
+                    browser = context = None
+                time.sleep(delay)
+                continue
+            time.sleep(max(0.0, interval - (time.monotonic() - t0)))
+    except KeyboardInterrupt:
+        print("[daemon] beendet.")
+    finally:
+        _close_quietly(context)
+        _close_quietly(browser)
+        if pw is not None:
+            pw.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Liest den WebUntis-Vertretungsmonitor aus.")
+    ap.add_argument("--mode", choices=["browser", "http", "auto"], default="browser",
+                    help="browser = Playwright, http = Datenendpunkt direkt, auto = http mit Browser-Fallback "
+                         "(default: %(default)s)")
+    ap.add_argument("--url", default=URL, help="Monitor-URL (default: Barmstedt, monitorType=subst)")
+    ap.add_argument("--save-payload", nargs="?", const=OUT_PAYLOAD, default=None,
+                    help="HTTP-Modus: Rohantworten speichern (default-Datei: %(const)s)")
+    ap.add_argument("--daemon", action="store_true",
+                    help="dauerhaft laufen und den Monitor regelmäßig neu lesen (Browser bleibt offen)")
+    ap.add_argument("--interval", type=float, default=60,
+                    help="Daemon: Sekunden zwischen zwei Lesevorgängen (default: %(default)s)")
+    ap.add_argument("--deadline", type=float, default=150,
+                    help="Browser: Gesamtzeit je Lauf in Sekunden, danach Teilergebnis (0 = aus, "
+                         "default: %(default)s)")
+    ap.add_argument("--route-profile", default="lean",
+                    help="Browser: Request-Blocking, " + "/".join(ROUTE_PROFILES) +
+                         " oder Pfad zu einer JSON-Profildatei (default: %(default)s)")
+    ap.add_argument("--parser", choices=PARSERS, default="bs4",
+                    help="HTML-Parser für die Tabellen (default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    if args.daemon:
+        run_daemon(args.url, args.interval, mode=args.mode, deadline_s=args.deadline or None,
+                   route_profile=args.route_profile, parser=args.parser)
+        return
 
+    slides, info, mode_used = fetch_slides(args.url, args.mode, deadline_s=args.deadline or None,
+                                           route_profile=args.route_profile,
+                                           save_payload=args.save_payload)
+    meta = write_outputs(args.url, mode_used, slides, info, parser=args.parser)
     print("Fertig. Meta:", meta)
 
 if __name__ == "__main__":
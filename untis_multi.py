@@ -0,0 +1,257 @@
+# untis_multi.py
+# Mehrere Monitore (Schulen, monitorType/format-Varianten) in einem Lauf.
+# Die Liste steht in monitors.json (Vorlage: monitors.example.json); jeder Monitor bekommt
+# einen eigenen Ordner out/<name>/ mit denselben Dateien wie ein Einzellauf
+# (webuntis_subst_raw_<n>.html, webuntis_subst.json, untis_subst_normalized.*, delta.json,
+# report_all.html, .stage_manifest.json).
+#
+# Scrape: asyncio + Playwright-async – ein gemeinsamer Chromium, je Monitor ein eigener,
+# isolierter Browser-Kontext (Cookies/Cache getrennt); höchstens "concurrency" Monitore
+# gleichzeitig. Monitore mit mode http/auto fragen zuerst den Datenendpunkt ab (ohne Browser).
+# Danach laufen extract → normalize → delta → report je Monitor in einem Prozess-Pool
+# (untis_pipeline.run mit out_dir), sobald sein Scrape fertig ist – parallel zu den übrigen.
+#
+# Ohne monitors.json: ein Monitor "default" mit der URL aus untis_monitor_scrape.py.
+#
+# Beispiele:
+#   python untis_multi.py                                   # monitors.json, alle Monitore
+#   python untis_multi.py --config monitors.example.json --only barmstedt-subst
+#   python untis_multi.py --from-raw -j 4                   # vorhandene out/<name>/ neu verarbeiten
+#
+# monitors.json:
+#   {"out_dir": "out", "concurrency": 3, "jobs": 0,
+#    "defaults": {"mode": "auto", "route_profile": "lean", "deadline": 150, "parser": "bs4"},
+#    "monitors": [{"name": "barmstedt-subst", "url": "https://…/WebUntis/monitor?school=…"}, …]}
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+import untis_monitor_scrape as scraper
+
+MONITORS_JSON = Path("monitors.json")
+OUT_DIR = Path("out")
+CONCURRENCY = 3  # gleichzeitig offene Monitore (Browser-Kontexte bzw. HTTP-Sitzungen)
+MODES = ("browser", "http", "auto")
+
+_NAME_RE = re.compile(r"^[0-9A-Za-z_-]+$")
+
+
+@dataclass
+class Monitor:
+    name: str
+    url: str
+    mode: str = "auto"
+    route_profile: str | None = "lean"
+    deadline: float | None = 150
+    parser: str = "bs4"
+
+
+def load_config(path: Path = MONITORS_JSON) -> tuple[list[Monitor], dict]:
+    """(Monitore, Einstellungen) aus der Konfigurationsdatei; fehlt sie, der Standard-Monitor."""
+    if not path.exists():
+        return [Monitor("default", scraper.URL)], {}
+    cfg = json.loads(path.read_text(encoding="utf-8"))
+    known = {f.name for f in fields(Monitor)}
+    defaults = cfg.get("defaults", {})
+    monitors: list[Monitor] = []
+    for entry in cfg.get("monitors", []):
+        spec = {**defaults, **entry}
+        unknown = sorted(set(spec) - known)
+        if unknown:
+            raise ValueError(f"{path}: unbekannte Felder {unknown} bei {entry.get('name', '?')}")
+        mon = Monitor(**spec)
+        if not _NAME_RE.match(mon.name):
+            raise ValueError(f"{path}: Name {mon.name!r} – nur Buchstaben, Ziffern, _ und - (wird Ordnername)")
+        if mon.mode not in MODES:
+            raise ValueError(f"{path}: {mon.name}: mode muss {'/'.join(MODES)} sein")
+        if any(m.name == mon.name for m in monitors):
+            raise ValueError(f"{path}: Name {mon.name!r} doppelt")
+        monitors.append(mon)
+    settings = {k: cfg[k] for k in ("out_dir", "concurrency", "jobs") if k in cfg}
+    return monitors, settings
+
+
+# ---------- Scrape (async) ----------
+
+async def _read_browser(browser, mon: Monitor, out: Path) -> tuple[list[str], dict]:
+    """Wie scraper.scrape_browser, aber im eigenen Kontext des gemeinsamen Browsers."""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    t_start = time.monotonic()
+    deadline = t_start + mon.deadline if mon.deadline else None
+    context = await browser.new_context(**scraper.CONTEXT_OPTIONS)
+    try:
+        page = await context.new_page()
+        profile = scraper.load_route_profile(mon.route_profile) if mon.route_profile else None
+        stats = None
+        if profile:
+            stats = scraper.RouteStats(mon.route_profile, profile, out / scraper.ROUTE_SIZES)
+            await page.route("**/*", stats.handle_async)
+            page.on("response", stats.on_response)
+        timeout = scraper._remaining_ms(deadline, 120)
+        if timeout > 0:
+            try:
+                await page.goto(mon.url, wait_until="domcontentloaded", timeout=timeout)
+            except PlaywrightTimeoutError:
+                pass  # Deadline während der Navigation → Teilergebnis
+        timeout = scraper._remaining_ms(deadline, 60)
+        ready = False
+        if timeout > 0:
+            try:
+                await page.wait_for_function(scraper.READY_JS, arg={"minTables": 4, "minHeaders": 1},
+                                             timeout=timeout, polling="mutation")
+                ready = True
+            except PlaywrightTimeoutError:
+                pass  # Timeout → Teilergebnis
+        elapsed_ms = round((time.monotonic() - t_start) * 1000)
+        info = {"ready": ready, "partial": not ready,
+                "time_to_ready_ms": elapsed_ms if ready else None, "elapsed_ms": elapsed_ms}
+        slides = scraper.slides_from_blocks(await page.evaluate(scraper.CAPTURE_SLIDES_JS)) if ready else []
+        if not slides:
+            slides = [await page.content()]  # Diagnose: ganzes Dokument
+        if stats is not None:
+            info["routing"] = stats.as_meta()
+        return slides, info
+    finally:
+        await context.close()
+
+
+class _Browser:
+    """Startet Chromium erst, wenn ein Monitor ihn braucht – und dann nur einmal."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._pw = None
+        self.browser = None
+
+    async def get(self):
+        async with self._lock:
+            if self.browser is None:
+                from playwright.async_api import async_playwright  # nur wenn ein Monitor den Browser braucht
+
+                if self._pw is None:
+                    self._pw = await async_playwright().start()
+                self.browser = await self._pw.chromium.launch(headless=True)
+            return self.browser
+
+    async def close(self) -> None:
+        if self.browser is not None:
+            await self.browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+
+
+async def scrape_one(mon: Monitor, shared: _Browser, sem: asyncio.Semaphore,
+                     out: Path) -> tuple[list[str], dict, str]:
+    """(slides, info, genutzter Modus) eines Monitors; wie scraper.fetch_slides."""
+    async with sem:
+        if mon.mode in ("http", "auto"):
+            try:
+                slides, info = await asyncio.to_thread(scraper.scrape_http, mon.url)
+                return slides, info, "http"
+            except Exception as e:
+                if mon.mode == "http":
+                    raise
+                print(f"[warn] {mon.name}: HTTP-Modus fehlgeschlagen ({e}) – Fallback auf Browser.")
+        slides, info = await _read_browser(await shared.get(), mon, out)
+        return slides, info, "browser"
+
+
+# ---------- Verarbeitung je Monitor (Prozess-Pool) ----------
+
+def process_monitor(mon: dict, out: str, scraped: tuple | None, force: bool = False) -> dict:
+    """extract → normalize → delta → report für einen Monitor in out/ (eigener Stufen-Cache)."""
+    import untis_pipeline
+    from tools.stage_cache import MANIFEST, StageCache
+
+    out_dir = Path(out)
+    cache = StageCache.load(out_dir / MANIFEST.name)
+    if force:
+        cache.invalidate("normalize", "report")
+    meta = untis_pipeline.run(mon["url"], mon["mode"], from_raw=scraped is None, parser=mon["parser"],
+                              cache=cache, out_dir=out_dir, scraped=scraped)
+    cache.save()
+    return meta
+
+
+async def run_all(monitors: list[Monitor], out_dir: Path = OUT_DIR, concurrency: int = CONCURRENCY,
+                  jobs: int = 0, from_raw: bool = False, force: bool = False) -> dict[str, dict]:
+    """Alle Monitore; Ergebnis je Name: {"ok", "rows", "stages", "mode", "seconds"} oder {"ok": False, "error"}."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    shared = _Browser()
+    loop = asyncio.get_running_loop()
+    results: dict[str, dict] = {}
+
+    with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+        async def one(mon: Monitor) -> None:
+            t0 = time.monotonic()
+            out = out_dir / mon.name
+            out.mkdir(parents=True, exist_ok=True)
+            try:
+                scraped = None if from_raw else await scrape_one(mon, shared, sem, out)
+                meta = await loop.run_in_executor(pool, process_monitor, asdict(mon), str(out), scraped, force)
+                results[mon.name] = {"ok": True, "rows": meta.get("rows_normalized"), "stages": meta.get("stages"),
+                                     "mode": meta.get("mode"), "seconds": round(time.monotonic() - t0, 2)}
+            except BaseException as e:  # SystemExit aus normalize (keine Tabellen) eingeschlossen
+                if isinstance(e, (KeyboardInterrupt, asyncio.CancelledError)):
+                    raise
+                results[mon.name] = {"ok": False, "error": f"{type(e).__name__}: {e}",
+                                     "seconds": round(time.monotonic() - t0, 2)}
+                print(f"[warn] {mon.name}: {type(e).__name__}: {e}")
+
+        try:
+            await asyncio.gather(*(one(m) for m in monitors))
+        finally:
+            await shared.close()
+    return {m.name: results[m.name] for m in monitors}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Mehrere WebUntis-Monitore parallel lesen und verarbeiten.")
+    ap.add_argument("--config", type=Path, default=MONITORS_JSON, help="Monitor-Liste (default: %(default)s)")
+    ap.add_argument("--only", action="append", metavar="NAME", help="nur diese Monitore (mehrfach)")
+    ap.add_argument("--out", type=Path, help=f"Basisordner (default: out_dir der Konfiguration oder {OUT_DIR})")
+    ap.add_argument("--concurrency", type=int, help=f"gleichzeitige Scrapes (default: {CONCURRENCY})")
+    ap.add_argument("-j", "--jobs", type=int, help="Prozesse für normalize/report (0 = alle Kerne; default: 0)")
+    ap.add_argument("--from-raw", action="store_true", help="nicht scrapen, vorhandene out/<name>/ neu verarbeiten")
+    ap.add_argument("--force", action="store_true", help="Stufen-Cache ignorieren")
+    args = ap.parse_args(argv)
+
+    try:
+        monitors, settings = load_config(args.config)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[error] {e}", file=sys.stderr)
+        return 1
+    if args.only:
+        missing = sorted(set(args.only) - {m.name for m in monitors})
+        if missing:
+            print(f"[error] unbekannte Monitore: {', '.join(missing)}", file=sys.stderr)
+            return 1
+        monitors = [m for m in monitors if m.name in args.only]
+
+    out_dir = args.out or Path(settings.get("out_dir", OUT_DIR))
+    concurrency = args.concurrency or settings.get("concurrency", CONCURRENCY)
+    jobs = args.jobs if args.jobs is not None else settings.get("jobs", 0)
+    t0 = time.monotonic()
+    results = asyncio.run(run_all(monitors, out_dir, concurrency, jobs, args.from_raw, args.force))
+
+    print(f"{'Monitor':<24} {'Zeilen':>6} {'Sek.':>6}  Stufen")
+    for name, r in results.items():
+        detail = " ".join(f"{k}={v}" for k, v in (r.get("stages") or {}).items()) if r["ok"] else r["error"]
+        print(f"{name:<24} {r.get('rows') or '–':>6} {r['seconds']:>6.1f}  {detail}")
+    failed = [n for n, r in results.items() if not r["ok"]]
+    print(f"OK. {len(results) - len(failed)}/{len(results)} Monitore in {time.monotonic() - t0:.1f}s → {out_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,116 +1,133 @@
 # untis_normalize.py
 # Normalisierung + Dubletten-Entfernung, jetzt mit Erhalt von Durchstreichungen (HTML)
-# Liest webuntis_subst_raw_1.html (heute) und webuntis_subst_raw_2.html (morgen)
-# und schreibt untis_subst_normalized.json / .csv
+# Liest alle webuntis_subst_raw_<n>.html (ein Slide je Tag, untis_pipeline.load_raw); das Datum
+# jeder Tabelle stammt aus dem Titel ihres Monitor-Blocks, nur ohne Titel gilt Slide n = heute + (n-1).
+# Schreibt untis_subst_normalized.json / .csv
+# sowie untis_subst_normalized.index.json (Klasse/Datum → Zeilen-IDs, untis_shards.build_index)
+# und untis_subst_normalized.search.json (Trigramm-Suchindex, untis_search.py)
+#
+# --reprocess DIR: Archiv roher Snapshots (z. B. nach einem Normalisierungs-Fix) neu
+# ableiten. Jede *raw*.html unter DIR wird in einem Prozess-Pool geparst und normalisiert;
+# das Datum stammt aus dem Snapshot selbst, je Monitor-Block aus dessen Titel
+# ("Vertretungen: Mittwoch, 17.09.2025" – ältere Vollseiten enthalten heute + morgen),
+# für Blöcke ohne Titel aus webuntis_subst.json daneben oder einem Zeitstempel im Pfad, nie aus der Uhr.
+# Die Zeilen werden in Snapshot-Reihenfolge, über alle Snapshots dedupliziert, in eine
+# JSON/CSV gestreamt (Spalte "snapshot" = erste Fundstelle); mit --store wird jeder Snapshot
+# mit seinem "Stand:"-Zeitpunkt an die Historie angehängt.
+#
+# Beispiele:
+#   python untis_normalize.py --parser lxml
+#   python untis_normalize.py --reprocess archive/ -j 4 --out history_reprocessed.json
+#   python untis_normalize.py --reprocess out/ --glob "*/webuntis_subst_raw_*.html" --store
 
 from pathlib import Path
+import argparse
+import csv
+import os
+import re
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from datetime import date, timedelta
 import json
 
-# Neu: HTML-Sanitizer für Strikethrough erhalten
-from tools.html_keep_strike import extract_cell_html, extract_cell_text
+# Einmal parsen, Zell-HTML mit erhaltenen Durchstreichungen (tools/html_keep_strike)
+import untis_extract
+from untis_extract import HTML_SUFFIX, PARSERS, PLAIN_SUFFIX, ParsedTable, normalize_frames, parse_tables
+import untis_search
+import untis_shards
+from tools import html_keep_strike
+from tools.instrument import stage
+from tools.stage_cache import StageCache, code_hash, hash_values
+from untis_text import plain
 
-RAW1 = Path("webuntis_subst_raw_1.html")  # heute
-RAW2 = Path("webuntis_subst_raw_2.html")  # morgen (optional)
+LEGACY_RAW = (Path("raw_1.html"), Path("raw_2.html"))  # ältere Dateinamen, falls keine webuntis_subst_raw_*.html
 
 OUT_JSON = Path("untis_subst_normalized.json")
 OUT_CSV  = Path("untis_subst_normalized.csv")
+OUT_INDEX = Path("untis_subst_normalized.index.json")  # Klasse/Datum → Zeilen-IDs für report_all.html
+OUT_SEARCH = untis_search.search_path(OUT_JSON)  # Trigramm → Zeilen-IDs (Suche)
+OUT_REPROCESSED = Path("untis_subst_reprocessed.json")  # --reprocess (CSV daneben)
 
 # ---------- HTML -> DataFrames ----------
 
-def _uniq_headers(headers):
-    out, seen = [], {}
-    for i, h in enumerate(headers):
-        name = (h or "").strip() or f"col_{i+1}"
-        seen[name] = seen.get(name, 0) + 1
-        if seen[name] > 1:
-            name = f"{name}_{seen[name]}"
-        out.append(name)
-    return out
-
-
-def extract_tables_from_html(html: str):
-    soup = BeautifulSoup(html, "lxml")
-    tables = soup.find_all("table")
-    frames = []
-    for ti, table in enumerate(tables):
-        headers = []
-        thead = table.find("thead")
-        if thead:
-            headers = [h.get_text(strip=True) for h in thead.find_all(["th", "td"])]
-        rows = table.find_all("tr")
-        start_idx = 0
-        # Fallback: erste Zeile als Header verwenden, wenn sie wie ein Header aussieht
-        if not headers and rows:
-            cells0 = rows[0].find_all(["th", "td"])  # TD erlauben
-            if cells0:
-                cand = [c.get_text(strip=True) for c in cells0]
-                tokens = [t.lower() for t in cand]
-                expected = {"stunde", "klassen", "klasse", "fach", "lehrkraft", "vertretungstext"}
-                if len(expected.intersection(tokens)) >= 2:
-                    headers = cand
-                    start_idx = 1
-        data_rows_text = []
-        data_rows_html = []
-        for r in rows[start_idx:]:
-            cells = r.find_all(["td", "th"])
-            if not cells:
-                continue
-            row_text = [c.get_text(separator=" ", strip=True) for c in cells]
-            row_html = [extract_cell_html(c) for c in cells]
-            if any(cell for cell in row_text):
-                data_rows_text.append(row_text)
-                data_rows_html.append(row_html)
-        if not data_rows_text:
-            continue
-        maxlen = max(len(r) for r in data_rows_text)
-        if headers:
-            if len(headers) < maxlen:
-                headers = headers + [f"col_{i+1}" for i in range(len(headers), maxlen)]
-            elif len(headers) > maxlen:
-                headers = headers[:maxlen]
-        else:
-            headers = [f"col_{i+1}" for i in range(maxlen)]
-        headers = _uniq_headers(headers)
-        normalized_text = [r + [""] * (maxlen - len(r)) for r in data_rows_text]
-        normalized_html = [r + [""] * (maxlen - len(r)) for r in data_rows_html]
-        df_text = pd.DataFrame(normalized_text, columns=headers)
-        df_html = pd.DataFrame(normalized_html, columns=[h + "__html" for h in headers])
-        df = pd.concat([df_text, df_html], axis=1)
-        df.insert(0, "table_index", ti)
-        df.columns = _uniq_headers(list(df.columns))
-        frames.append(df)
-    return frames
+def extract_tables_from_html(html: str, parser: str = "bs4"):
+    return normalize_frames(parse_tables(html, parser))
 
 
-def load_frames_for_day(path: Path, datum_str: str):
-    if not path.exists():
-        return []
-    html = path.read_text(encoding="utf-8", errors="ignore")
-    frames = extract_tables_from_html(html)
+def frames_for_day(tables: list[ParsedTable], datum_str: str):
+    """Frames eines bereits geparsten Slides, mit Datum versehen."""
+    frames = normalize_frames(tables)
     for df in frames:
         df["__datum"] = datum_str
     return frames
 
 
+def frames_for_slide(tables: list[ParsedTable], html: str, fallback: str):
+    """Frames eines geparsten Slides; Datum je Tabelle aus dem Titel ihres Monitor-Blocks
+    (table_dates), fallback nur für Tabellen ohne Titel davor."""
+    dates = table_dates(html, fallback)
+    frames = normalize_frames(tables)
+    for df in frames:
+        ti = int(df["table_index"].iat[0])
+        df["__datum"] = dates[ti] if ti < len(dates) else fallback
+    return frames
+
+
+def slide_dates(n: int, today: date | None = None) -> list[str]:
+    """Ersatzdatum je Slide ohne Titel: Slide 1 = heute, Slide 2 = morgen, …"""
+    today = today or date.today()
+    return [(today + timedelta(days=i)).strftime("%d.%m.%Y") for i in range(n)]
+
+
 # ---------- Normalisierung / Mapping ----------
 
 def _nz_series(s: pd.Series) -> pd.Series:
     return s.fillna("").astype(str)
 
 
-def _pick_best_name(df_all: pd.DataFrame, *candidates: str):
+def _per_unique(s: pd.Series, op) -> pd.Series:
+    """Wendet die Serien-Operation op nur auf die verschiedenen Werte von s an und verteilt
+    das Ergebnis zurück. Klassen, Stunden, Lehrkräfte und Datum wiederholen sich stark,
+    die .str-Methoden laufen dagegen je Element in Python."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    result = op(pd.Series(uniques, dtype=object)).to_numpy()
+    return pd.Series(result[codes], index=s.index)
+
+
+class _Columns:
+    """Spalten von df_all als nz-/getrimmte Serien; jede wird höchstens einmal berechnet."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._nz: dict[str | None, pd.Series] = {}
+        self._stripped: dict[str | None, pd.Series] = {}
+
+    def nz(self, col: str | None) -> pd.Series:
+        if col not in self._nz:
+            if col is None or col not in self.df.columns:
+                self._nz[col] = pd.Series([""] * len(self.df))
+            else:
+                self._nz[col] = _nz_series(self.df[col])
+        return self._nz[col]
+
+    def stripped(self, col: str | None) -> pd.Series:
+        if col not in self._stripped:
+            self._stripped[col] = _per_unique(self.nz(col), lambda u: u.str.strip())
+        return self._stripped[col]
+
+
+def _pick_best_name(cols: _Columns, *candidates: str):
     """Wie _pick_best, aber gibt den Spaltennamen zurück (für HTML-Mapping)."""
-    normcols = {c.lower(): c for c in df_all.columns}
+    columns = [c for c in cols.df.columns if not c.endswith(PLAIN_SUFFIX)]
+    normcols = {c.lower(): c for c in columns}
     cand_cols = []
     for cand in candidates:
         key = cand.lower()
         if key in normcols:
             cand_cols.append(normcols[key])
         else:
-            for col in df_all.columns:
+            for col in columns:
                 if col.lower().startswith(key):
                     cand_cols.append(col)
     seen = set()
@@ -119,159 +136,383 @@ def _pick_best_name(df_all: pd.DataFrame, *candidates: str):
         return None
     scored = []
     for col in cand_cols:
-        s = _nz_series(df_all[col])
-        non_empty = (s.str.strip() != "").sum()
+        non_empty = (cols.stripped(col) != "").sum()
         scored.append((non_empty, col))
     scored.sort(reverse=True)
     return scored[0][1]
 
 
-def _series_text(df: pd.DataFrame, col_name: str | None) -> pd.Series:
-    if not col_name or col_name not in df.columns:
-        return pd.Series([""] * len(df))
-    return _nz_series(df[col_name])
-
-
-def _series_html(df: pd.DataFrame, col_name: str | None) -> pd.Series:
+def _series_html(cols: _Columns, col_name: str | None) -> pd.Series:
     if not col_name:
-        return pd.Series([""] * len(df))
-    html_col = f"{col_name}__html"
-    if html_col in df.columns:
-        return _nz_series(df[html_col])
+        return cols.nz(None)
+    html_col = f"{col_name}{HTML_SUFFIX}"
+    if html_col in cols.df.columns:
+        return cols.nz(html_col)
     # Fallback: Text
-    return _series_text(df, col_name)
-
+    return cols.nz(col_name)
 
-def _clean_ws(val: str) -> str:
-    s = str(val)
-    return " ".join(s.split())
 
+def _series_plain(cols: _Columns, col_name: str | None) -> pd.Series:
+    """Klartext des sanitisierten HTML (für Dedupe), von normalize_frames mitgeliefert."""
+    if not col_name:
+        return cols.nz(None)
+    plain_col = f"{col_name}{PLAIN_SUFFIX}"
+    if plain_col in cols.df.columns:
+        return cols.nz(plain_col)
+    # Fallback für Frames ohne __txt-Spalten: HTML parsen
+    return _clean_ws(_series_html(cols, col_name)).map(
+        lambda v: BeautifulSoup(v, "lxml").get_text(" ", strip=True))
+
+
+def _clean_ws(s: pd.Series) -> pd.Series:
+    """Whitespace-Folgen → ein Leerzeichen, außen getrimmt (wie " ".join(v.split()))."""
+    return _per_unique(s, lambda u: u.str.replace(r"\s+", " ", regex=True).str.strip())
+
+
+def _is_info(df: pd.DataFrame) -> pd.Series:
+    """Info-Zeilen: irgendeine (Text-)Zelle beginnt – nach führendem Whitespace – mit "Klassen:"."""
+    hit = pd.Series(False, index=df.index)
+    for col in df.columns:
+        s = df[col]
+        if col.endswith(PLAIN_SUFFIX) or pd.api.types.is_numeric_dtype(s):
+            continue
+        # Nicht-Strings (NaN aus fehlenden Spalten) ergeben NaN → False
+        hit |= _per_unique(s, lambda u: u.str.lstrip().str.startswith("Klassen:", na=False)).astype(bool)
+    return hit
 
-def main():
-    today = date.today()
-    datum1 = today.strftime("%d.%m.%Y")
-    datum2 = (today + timedelta(days=1)).strftime("%d.%m.%Y")
-
-    frames = []
-    frames += load_frames_for_day(RAW1, datum1)
-    frames += load_frames_for_day(RAW2, datum2)
 
-    if not frames:
-        alt1 = Path("raw_1.html")
-        alt2 = Path("raw_2.html")
-        frames += load_frames_for_day(alt1, datum1)
-        frames += load_frames_for_day(alt2, datum2)
-    if not frames:
-        raise SystemExit("Keine raw_HTML-Dateien gefunden (webuntis_subst_raw_1.html / _2.html).")
+def normalize(frames: list[pd.DataFrame], datum1: str) -> pd.DataFrame:
+    """Normalisiert die Frames aller Slides zu den Ausgabezeilen (gruppe 1 = Info, 2 = Daten).
 
+    datum1 ist das Datum für Zeilen ohne eigenes __datum.
+    """
     df_all = pd.concat(frames, ignore_index=True, sort=False)
 
-    # Spaltenwahl (Textebene), ermittelt die besten Spaltennamen
-    klasse_col = _pick_best_name(df_all, "Klassen", "Klasse", "Klasse(n)", "klassen", "klasse", "klasse(n)", "col_4")
-    stunde_col = _pick_best_name(df_all, "Stunde", "stunde", "std", "col_3")
-    fach_col   = _pick_best_name(df_all, "Fach", "fach", "col_5")
-    lehr_col   = _pick_best_name(df_all, "Lehrkraft", "lehrkraft", "lehrer", "vertretung", "col_6")
-    text_col   = _pick_best_name(df_all, "Vertretungstext", "vertretungstext", "bemerkung", "bemerkungen", "col_7")
+    cols = _Columns(df_all)
 
-    # Serien holen (Text & HTML)
-    klasse   = _series_text(df_all, klasse_col)
-    stunde   = _series_text(df_all, stunde_col)
-    fach_txt = _series_text(df_all, fach_col)
-    leh_txt  = _series_text(df_all, lehr_col)
-    txt_txt  = _series_text(df_all, text_col)
+    # Spaltenwahl (Textebene), ermittelt die besten Spaltennamen
+    klasse_col = _pick_best_name(cols, "Klassen", "Klasse", "Klasse(n)", "klassen", "klasse", "klasse(n)", "col_4")
+    stunde_col = _pick_best_name(cols, "Stunde", "stunde", "std", "col_3")
+    fach_col   = _pick_best_name(cols, "Fach", "fach", "col_5")
+    lehr_col   = _pick_best_name(cols, "Lehrkraft", "lehrkraft", "lehrer", "vertretung", "col_6")
+    text_col   = _pick_best_name(cols, "Vertretungstext", "vertretungstext", "bemerkung", "bemerkungen", "col_7")
 
-    fach_html = _series_html(df_all, fach_col)
-    leh_html  = _series_html(df_all, lehr_col)
-    txt_html  = _series_html(df_all, text_col)
+    # Serien holen (Text & HTML), jeweils einmal
+    klasse = cols.nz(klasse_col)
+    stunde = cols.nz(stunde_col)
 
-    datum    = df_all.get("__datum", pd.Series([datum1] * len(df_all)))
+    datum = _nz_series(df_all["__datum"]) if "__datum" in df_all.columns \
+        else pd.Series([datum1] * len(df_all))
+    table_index = df_all.get("table_index", pd.Series([None] * len(df_all)))
 
     # Header-Zeilen erkennen (falls "Stunde"/"Klassen" als Zellen auftauchen)
     is_header = (
-        _nz_series(stunde).str.strip().str.lower().eq("stunde") &
-        _nz_series(klasse).str.strip().str.lower().isin(["klassen", "klasse", "klasse(n)"])
+        cols.stripped(stunde_col).str.lower().eq("stunde") &
+        cols.stripped(klasse_col).str.lower().isin(["klassen", "klasse", "klasse(n)"])
     )
 
     # Info-Zeilen: irgendeine Zelle beginnt mit "Klassen:"
-    def _row_is_info(row) -> bool:
-        for v in row.values.tolist():
-            if isinstance(v, str) and v.strip().startswith("Klassen:"):
-                return True
-        return False
-
-    is_info = df_all.apply(_row_is_info, axis=1)
+    is_info = _is_info(df_all)
 
     # Datenzeilen: nicht Header, nicht Info, und mind. ein Nutzfeld gefüllt
     has_any = (
-        _nz_series(klasse).str.strip().ne("") |
-        _nz_series(stunde).str.strip().ne("") |
-        _nz_series(fach_txt).str.strip().ne("") |
-        _nz_series(leh_txt).str.strip().ne("") |
-        _nz_series(txt_txt).str.strip().ne("")
+        cols.stripped(klasse_col).ne("") |
+        cols.stripped(stunde_col).ne("") |
+        cols.stripped(fach_col).ne("") |
+        cols.stripped(lehr_col).ne("") |
+        cols.stripped(text_col).ne("")
     )
     mask_data = (~is_header) & (~is_info) & has_any
 
     df_data = pd.DataFrame({
         "gruppe": 2,
-        "datum": _nz_series(datum),
-        "quelle_table_index": df_all.get("table_index", pd.Series([None] * len(df_all))),
-        "klasse": _nz_series(klasse),
-        "stunde": _nz_series(stunde),
+        "datum": datum,
+        "quelle_table_index": table_index,
+        "klasse": klasse,
+        "stunde": stunde,
         # WICHTIG: diese Felder enthalten HTML (Strikethrough sichtbar)
-        "fach":   _nz_series(fach_html),
-        "lehrkraft": _nz_series(leh_html),
-        "text":   _nz_series(txt_html),
+        "fach":   _series_html(cols, fach_col),
+        "lehrkraft": _series_html(cols, lehr_col),
+        "text":   _series_html(cols, text_col),
+        # Klartext der HTML-Felder, nur für die Dubletten-Erkennung
+        "__fach_txt": _series_plain(cols, fach_col),
+        "__lehr_txt": _series_plain(cols, lehr_col),
+        "__txt_txt": _series_plain(cols, text_col),
     })
-    df_data = df_data[mask_data].copy()
+    df_data = df_data[mask_data]
 
     # Info-Zeilen (gruppe=1)
-    col1 = df_all.get("col_1", pd.Series([""] * len(df_all)))
-    info_klasse = _nz_series(klasse)
-    fallback = _nz_series(col1)
-    info_text = info_klasse.where(info_klasse.str.startswith("Klassen:"), fallback)
+    info_text = klasse.where(klasse.str.startswith("Klassen:"), cols.nz("col_1"))
 
     df_info = pd.DataFrame({
         "gruppe": 1,
-        "datum": _nz_series(datum),
-        "quelle_table_index": df_all.get("table_index", pd.Series([None] * len(df_all))),
-        "klasse": _nz_series(info_text),
+        "datum": datum,
+        "quelle_table_index": table_index,
+        "klasse": info_text,
         "stunde": "",
         "fach": "",
         "lehrkraft": "",
         "text": "",
+        "__fach_txt": "",
+        "__lehr_txt": "",
+        "__txt_txt": "",
     })
-    df_info = df_info[is_info].copy()
+    df_info = df_info[is_info]
 
     # Zusammenführen & bereinigen
     df_out = pd.concat([df_data, df_info], ignore_index=True)
     for c in ["klasse", "stunde", "fach", "lehrkraft", "text", "datum"]:
-        df_out[c] = df_out[c].map(_clean_ws)
-
-    # Dubletten entfernen – nach TEXTINHALT (HTML vorher in Text umwandeln)
-    def _strip_html_series(s: pd.Series) -> pd.Series:
-        return s.apply(lambda v: BeautifulSoup(v or "", "lxml").get_text(" ", strip=True))
-
-    df_out["__fach_txt"] = _strip_html_series(df_out["fach"]) \
-        if "fach" in df_out.columns else ""
-    df_out["__lehr_txt"] = _strip_html_series(df_out["lehrkraft"]) \
-        if "lehrkraft" in df_out.columns else ""
-    df_out["__txt_txt"] = _strip_html_series(df_out["text"]) \
-        if "text" in df_out.columns else ""
+        df_out[c] = _clean_ws(df_out[c])
 
+    # Dubletten entfernen – nach TEXTINHALT (Klartext kommt aus dem Zell-Durchlauf mit)
     df_out = df_out.drop_duplicates(
         subset=["datum", "klasse", "stunde", "__fach_txt", "__lehr_txt", "__txt_txt"], keep="first"
     ).reset_index(drop=True)
 
     df_out = df_out.drop(columns=["__fach_txt", "__lehr_txt", "__txt_txt"], errors="ignore")
-
-    # Schreiben
-    OUT_JSON.write_text(
-        json.dumps(df_out.to_dict(orient="records"), ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
-    df_out.to_csv(OUT_CSV, index=False, encoding="utf-8-sig")
+    return df_out
+
+
+def stage_key(slides: list[str], dates: list[str], parser: str) -> str:
+    """Eingabe-Hash der Stufe "normalize": Slide-HTML, zugeordnetes Datum, Parser und Code."""
+    code = code_hash(__file__, untis_extract.__file__, html_keep_strike.__file__, untis_shards.__file__,
+                     untis_search.__file__)
+    return hash_values(code, parser, *dates[:len(slides)], *slides)
+
+
+def write_normalized(df_out: pd.DataFrame, out_json: Path = OUT_JSON, out_csv: Path = OUT_CSV,
+                     out_index: Path = OUT_INDEX, out_search: Path | None = None) -> None:
+    records = df_out.to_dict(orient="records")
+    rows = len(records)
+    with stage("write_normalized_json", rows=rows):
+        out_json.write_text(
+            json.dumps(records, ensure_ascii=False, indent=2),
+            encoding="utf-8"
+        )
+    with stage("write_normalized_csv", rows=rows):
+        df_out.to_csv(out_csv, index=False, encoding="utf-8-sig")
+    with stage("write_index", rows=rows):
+        out_index.write_text(
+            json.dumps(untis_shards.build_index(records), ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8"
+        )
+    with stage("write_search", rows=rows):
+        (out_search or untis_search.search_path(out_json)).write_text(
+            json.dumps(untis_search.build_search_index(records), ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8"
+        )
+
+
+def _store(records: list[dict], db: Path) -> None:
+    import untis_store  # nur bei --store
+
+    conn = untis_store.connect(db)
+    try:
+        sid, is_new = untis_store.append(conn, records, source="untis_normalize")
+    finally:
+        conn.close()
+    print(f"[store] Stand #{sid} {'neu' if is_new else 'unverändert'} → {db}")
+
+
+# ---------- Archiv neu verarbeiten (--reprocess) ----------
+
+REPROCESS_GLOB = "**/*raw*.html"
+REPROCESS_FIELDS = ["gruppe", "datum", "quelle_table_index", "klasse", "stunde", "fach", "lehrkraft", "text",
+                    "snapshot"]
+_TITLE_DATE_RE = re.compile(r'class="title"[^>]*>[^<]*<span[^>]*>[^<]*?(\d{1,2})\.(\d{1,2})\.(\d{4})')
+_STATUS_RE = re.compile(r'class="status"[^>]*>\s*Stand:\s*(\d{1,2})\.(\d{1,2})\.(\d{4})'
+                        r'(?:\s+(\d{1,2}:\d{2}(?::\d{2})?))?')
+_PATH_TS_RE = re.compile(r"(20\d\d)-?([01]\d)-?([0-3]\d)")
+_SLIDE_NO_RE = re.compile(r"_(\d+)\.html?$")
+_TABLE_RE = re.compile(r"<table\b", re.I)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+
+
+def _sidecar_meta(path: Path) -> dict:
+    """Scrape-Meta aus webuntis_subst.json neben dem Snapshot (leer, falls nicht vorhanden)."""
+    try:
+        return json.loads((path.parent / "webuntis_subst.json").read_text(encoding="utf-8")).get("meta") or {}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _datum(d: str, mo: str, y: str) -> str:
+    return f"{int(d):02d}.{int(mo):02d}.{y}"
+
+
+def snapshot_date(path: Path, html: str) -> tuple[str | None, str | None]:
+    """(Datum TT.MM.JJJJ, Stand als ISO-Zeitpunkt) eines Snapshots aus seinen eigenen Metadaten."""
+    stand = None
+    m = _STATUS_RE.search(html)
+    if m:
+        d, mo, y, t = m.groups()
+        h, mi, *s = (t or "0:00").split(":")
+        stand = f"{y}-{int(mo):02d}-{int(d):02d}T{int(h):02d}:{mi}:{s[0] if s else '00'}"
+    m = _TITLE_DATE_RE.search(html)
+    if m:
+        return _datum(*m.groups()), stand
+    meta = _sidecar_meta(path)
+    stand = stand or meta.get("scraped_at")
+    for s in meta.get("slides") or []:
+        if s.get("file") == path.name and s.get("date"):
+            return _datum(*s["date"].split(".")), stand
+    # Zeitstempel im Pfad = Aufnahmetag; Slide n zeigt wie bei slide_dates() Tag + (n-1)
+    m = _PATH_TS_RE.search(path.as_posix())
+    if m:
+        taken = date(*map(int, m.groups()))
+        n = _SLIDE_NO_RE.search(path.name)
+        return slide_dates(int(n.group(1)) if n else 1, taken)[-1], stand or taken.isoformat() + "T00:00:00"
+    return None, stand
+
+
+def table_dates(html: str, fallback: str) -> list[str]:
+    """Datum je <table> in Dokumentreihenfolge (= ParsedTable.index): Titel des Monitor-Blocks davor.
+
+    Ältere Vollseiten-Snapshots enthalten mehrere gp_SubstitutionMonitor-Blöcke (heute, morgen);
+    Tabellen vor dem ersten Titel bekommen fallback (Datum des Snapshots)."""
+    html = _COMMENT_RE.sub("", html)
+    titles = [(m.start(), _datum(*m.groups())) for m in _TITLE_DATE_RE.finditer(html)]
+    dates, i, current = [], 0, fallback
+    for m in _TABLE_RE.finditer(html):
+        while i < len(titles) and titles[i][0] < m.start():
+            current = titles[i][1]
+            i += 1
+        dates.append(current)
+    return dates
+
+
+def _reprocess_one(args: tuple[str, str]) -> tuple[str, str | None, str | None, list[dict]]:
+    """Worker: (Pfad, Datum, Stand, normalisierte Zeilen) eines Snapshots."""
+    path, parser = Path(args[0]), args[1]
+    html = path.read_text(encoding="utf-8", errors="ignore")
+    datum, stand = snapshot_date(path, html)
+    if datum is None:
+        return str(path), None, stand, []
+    frames = frames_for_slide(parse_tables(html, parser), html, datum)
+    records = normalize(frames, datum).to_dict(orient="records") if frames else []
+    return str(path), datum, stand, records
+
+
+def _dedupe_key(r: dict) -> tuple:
+    return (r.get("datum"), r.get("klasse"), r.get("stunde"),
+            plain(r.get("fach")), plain(r.get("lehrkraft")), plain(r.get("text")))
+
+
+def reprocess(src_dir: Path, out_json: Path = OUT_REPROCESSED, parser: str = "bs4", jobs: int = 0,
+              pattern: str = REPROCESS_GLOB, store: Path | None = None) -> dict:
+    """Alle Snapshots unter src_dir neu normalisieren; Ergebnis nach out_json + .csv (gestreamt).
+
+    Gibt Zähler zurück: snapshots, skipped (ohne Datum/Tabellen), rows (ausgegeben), duplicates."""
+    paths = sorted(p for p in src_dir.glob(pattern) if p.is_file())
+    out_csv = out_json.with_suffix(".csv")
+    tmp_json, tmp_csv = out_json.with_name(out_json.name + ".tmp"), out_csv.with_name(out_csv.name + ".tmp")
+    counts = {"snapshots": len(paths), "skipped": 0, "rows": 0, "duplicates": 0}
+    seen: set[tuple] = set()
+    conn = None
+    if store:
+        import untis_store
+        conn = untis_store.connect(store)
+
+    tasks = [(str(p), parser) for p in paths]
+    pool = ProcessPoolExecutor(max_workers=jobs or None) if jobs != 1 and len(tasks) > 1 else None
+    try:
+        results = pool.map(_reprocess_one, tasks, chunksize=max(1, len(tasks) // 64)) if pool \
+            else map(_reprocess_one, tasks)
+        with stage("reprocess", snapshots=len(paths)) as m, \
+                open(tmp_json, "w", encoding="utf-8") as fj, open(tmp_csv, "w", encoding="utf-8-sig", newline="") as fc:
+            writer = csv.DictWriter(fc, fieldnames=REPROCESS_FIELDS)
+            writer.writeheader()
+            fj.write("[")
+            for path, datum, stand, records in results:
+                rel = Path(path).relative_to(src_dir).as_posix()
+                if datum is None or not records:
+                    counts["skipped"] += 1
+                    print(f"[skip] {rel}: " + ("kein Datum in Titel/Meta/Pfad" if datum is None else "keine Tabellen"))
+                    continue
+                if conn is not None:
+                    untis_store.append(conn, records, scraped_at=stand, source=rel)
+                for r in records:
+                    key = _dedupe_key(r)
+                    if key in seen:
+                        counts["duplicates"] += 1
+                        continue
+                    seen.add(key)
+                    r["snapshot"] = rel
+                    fj.write(("," if counts["rows"] else "") + "\n  " + json.dumps(r, ensure_ascii=False))
+                    writer.writerow(r)
+                    counts["rows"] += 1
+            fj.write("\n]\n")
+            m["rows"] = counts["rows"]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if conn is not None:
+            conn.close()
+    os.replace(tmp_json, out_json)
+    os.replace(tmp_csv, out_csv)
+    return counts
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Normalisiert webuntis_subst_raw_<n>.html.")
+    ap.add_argument("--parser", choices=PARSERS, default="bs4",
+                    help="HTML-Parser für die Tabellen (default: %(default)s)")
+    ap.add_argument("--force", action="store_true",
+                    help="auch bei unveränderten Eingaben neu normalisieren")
+    ap.add_argument("--store", type=Path, nargs="?", const=Path("untis_history.sqlite"),
+                    help="Ergebnis an die Historie anhängen (untis_store.py)")
+    ap.add_argument("--reprocess", type=Path, metavar="DIR",
+                    help="Archiv roher Snapshots unter DIR neu normalisieren (Datum je Snapshot aus dessen Meta)")
+    ap.add_argument("--glob", default=REPROCESS_GLOB,
+                    help="Snapshot-Muster relativ zu DIR für --reprocess (default: %(default)s)")
+    ap.add_argument("--out", type=Path, default=OUT_REPROCESSED,
+                    help="Ausgabe für --reprocess, CSV daneben (default: %(default)s)")
+    ap.add_argument("-j", "--jobs", type=int, default=0,
+                    help="Prozesse für --reprocess (0 = alle Kerne; default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    if args.reprocess:
+        if not args.reprocess.is_dir():
+            raise SystemExit(f"Ordner nicht gefunden: {args.reprocess}")
+        c = reprocess(args.reprocess, args.out, args.parser, args.jobs, args.glob, args.store)
+        print(f"OK. {c['rows']} Zeilen aus {c['snapshots'] - c['skipped']}/{c['snapshots']} Snapshots "
+              f"({c['duplicates']} Dubletten) → {args.out.name} / {args.out.with_suffix('.csv').name}")
+        return
+
+    import untis_pipeline  # erst hier: untis_pipeline importiert dieses Modul
+
+    # Slides einlesen, inhaltsgleiche verwerfen und einmal parsen – wie build_site/untis_pipeline
+    snap = untis_pipeline.load_raw(args.parser)
+    if not snap.slides:
+        snap = untis_pipeline.extract([p.read_text(encoding="utf-8", errors="ignore")
+                                       for p in LEGACY_RAW if p.exists()], args.parser)
+    if not snap.slides:
+        raise SystemExit("Keine raw_HTML-Dateien gefunden (webuntis_subst_raw_<n>.html).")
+
+    # Stufen-Cache: gleiche Slides + gleiches Ersatzdatum → Ausgaben sind schon aktuell
+    key = stage_key(snap.slides, slide_dates(len(snap.slides)), args.parser)
+    cache = StageCache.load()
+    if args.force:
+        cache.invalidate("normalize")
+    if cache.fresh("normalize", key, [OUT_JSON, OUT_CSV, OUT_INDEX, OUT_SEARCH]):
+        print(cache.skip_message("normalize"))
+        if args.store:
+            _store(json.loads(OUT_JSON.read_text(encoding="utf-8")), args.store)
+        return
+
+    df_out = untis_pipeline.normalize(snap)
+
+    # Schreiben; der bisherige Stand wird vorher für delta.json festgehalten
+    import untis_delta
+    prev = untis_delta.load_previous(OUT_JSON)
+    write_normalized(df_out)
+    untis_delta.update_delta(prev, json.loads(OUT_JSON.read_text(encoding="utf-8")))
+    cache.record("normalize", key, [OUT_JSON, OUT_CSV, OUT_INDEX, OUT_SEARCH], rows=len(df_out))
+    cache.save()
 
     print(f"OK. {len(df_out)} Zeilen → {OUT_CSV.name} / {OUT_JSON.name}")
+    if args.store:
+        _store(df_out.to_dict(orient="records"), args.store)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,177 @@
+# untis_pipeline.py
+# Ein Prozess für scrape → extract → normalize → publish.
+# Die Stufen reichen ihr Ergebnis im Speicher weiter: jedes Slide-HTML wird genau einmal
+# geparst, und scrape/normalize/report laufen ohne eigene Interpreter.
+# untis_monitor_scrape.py, untis_normalize.py und untis_report_all.py bleiben als
+# Einzelskripte nutzbar und verwenden dieselben Funktionen.
+#
+# Beispiele:
+#   python untis_pipeline.py                  # Monitor lesen (HTTP, Browser-Fallback) und alles schreiben
+#   python untis_pipeline.py --from-raw       # ohne Scrape: vorhandene webuntis_subst_raw_*.html
+#
+# Stufen-Cache (tools/stage_cache.py): normalize und report werden übersprungen, wenn ihre
+# Eingaben (Slides + Datum bzw. Vorlage) seit dem letzten Lauf gleich geblieben sind.
+# Nach normalize schreibt die delta-Stufe delta.json (untis_delta.py: added/removed/changed
+# gegenüber dem vorherigen Stand, fortlaufende seq) – nur wenn normalize tatsächlich lief.
+# Mit --store wird jeder Stand zusätzlich in die Historie (untis_store.py, SQLite) angehängt.
+
+import argparse
+import json
+import shutil
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+import untis_monitor_scrape as scraper
+import untis_normalize as normalizer
+import untis_delta
+import untis_report_all
+from tools.instrument import stage
+from tools.stage_cache import StageCache
+from untis_extract import PARSERS
+
+
+def scrape(url: str = scraper.URL, mode: str = "auto", deadline_s: float | None = 150,
+           route_profile: str | None = "lean") -> tuple[list[str], dict, str]:
+    """Liest den Monitor; gibt (slides, info, tatsächlich genutzter Modus) zurück."""
+    return scraper.fetch_slides(url, mode, deadline_s=deadline_s, route_profile=route_profile)
+
+
+def extract(slides: list[str], parser: str = "bs4") -> scraper.Snapshot:
+    """Verwirft inhaltsgleiche Slides und parst die übrigen (einmal)."""
+    return scraper.make_snapshot(slides, parser)
+
+
+def load_raw(parser: str = "bs4", src_dir: Path = Path()) -> scraper.Snapshot:
+    """Snapshot aus den zuletzt geschriebenen webuntis_subst_raw_<n>.html (in src_dir)."""
+    slides = []
+    i = 1
+    while (src_dir / scraper.RAW_HTML_PATTERN.format(i)).exists():
+        slides.append((src_dir / scraper.RAW_HTML_PATTERN.format(i)).read_text(encoding="utf-8", errors="ignore"))
+        i += 1
+    return extract(slides, parser)
+
+
+def normalize(snap: scraper.Snapshot, today: date | None = None) -> pd.DataFrame:
+    """Normalisiert die bereits geparsten Slides; Datum aus dem Titel je Monitor-Block,
+    ohne Titel Slide 1 = heute, Slide 2 = morgen, …"""
+    dates = normalizer.slide_dates(len(snap.tables), today)
+    with stage("normalize") as m:
+        frames = []
+        for tables, html, datum in zip(snap.tables, snap.slides, dates):
+            frames += normalizer.frames_for_slide(tables, html, datum)
+        if not frames:
+            raise SystemExit("Keine Tabellen in den Slides gefunden.")
+        df_out = normalizer.normalize(frames, dates[0])
+        m["rows"] = len(df_out)
+    return df_out
+
+
+def publish(df_out: pd.DataFrame, cache: StageCache | None = None, out_dir: Path = Path()) -> bool:
+    """Schreibt untis_subst_normalized.json/.csv/.index.json/.search.json und report_all.html (nach out_dir).
+
+    Gibt zurück, ob report_all.html neu geschrieben wurde."""
+    normalizer.write_normalized(df_out, *(out_dir / p.name for p in
+                                          (normalizer.OUT_JSON, normalizer.OUT_CSV, normalizer.OUT_INDEX,
+                                           normalizer.OUT_SEARCH)))
+    return untis_report_all.build_report(cache, out_dir / untis_report_all.OUT_HTML.name)
+
+
+def _restore(outputs: list[Path], published: Path | None) -> None:
+    """Fehlende lokale Ausgaben aus der veröffentlichten Kopie holen (frischer CI-Checkout)."""
+    for out in outputs:
+        if not out.exists() and published is not None and (published / out.name).exists():
+            shutil.copy2(published / out.name, out)
+
+
+def run(url: str = scraper.URL, mode: str = "auto", from_raw: bool = False,
+        deadline_s: float | None = 150, route_profile: str | None = "lean", parser: str = "bs4",
+        cache: StageCache | None = None, published: Path | None = None,
+        store: Path | None = None, out_dir: Path = Path(),
+        scraped: tuple[list[str], dict, str] | None = None) -> dict:
+    """Kompletter Lauf; gibt die Scrape-Meta-Daten (inkl. Zeilenzahl) zurück.
+
+    Mit cache wird normalize übersprungen, wenn Slides, Datum, Parser und Code gleich sind
+    und die Ausgaben lokal (oder unter published) unverändert vorliegen; meta["stages"]
+    sagt, welche Stufen gelaufen sind ("ran") und welche nicht ("skipped").
+    Mit store wird der normalisierte Stand an die Historie angehängt.
+    out_dir: Ordner für alle Dateien (untis_multi.py: einer je Monitor); scraped: bereits
+    gelesene (slides, info, Modus) statt eines eigenen Scrapes."""
+    out_dir = Path(out_dir)
+    if from_raw:
+        snap = load_raw(parser, out_dir)
+        meta = {"mode": "raw", "slides": len(snap.slides)}
+    else:
+        slides, info, mode_used = scraped or scrape(url, mode, deadline_s, route_profile)
+        snap = extract(slides, parser)
+        meta = scraper.write_outputs(url, mode_used, snap, info, out_dir=out_dir)
+
+    out_json = out_dir / normalizer.OUT_JSON.name
+    delta_json = out_dir / untis_delta.DELTA_JSON.name
+    outputs = [out_json, *(out_dir / p.name for p in
+                           (normalizer.OUT_CSV, normalizer.OUT_INDEX, normalizer.OUT_SEARCH))]
+    key = normalizer.stage_key(snap.slides, normalizer.slide_dates(len(snap.slides)), parser)
+    if cache is not None and cache.fresh("normalize", key, outputs, published):
+        print(cache.skip_message("normalize"))
+        _restore(outputs + [delta_json], published)
+        rows = cache.info("normalize").get("rows")
+        report_written = untis_report_all.build_report(cache, out_dir / untis_report_all.OUT_HTML.name)
+        stages = {"normalize": "skipped", "delta": "skipped"}
+        records = None
+    else:
+        df_out = normalize(snap)
+        prev = untis_delta.load_previous(out_json, published)
+        report_written = publish(df_out, cache, out_dir)
+        rows = len(df_out)
+        if cache is not None:
+            cache.record("normalize", key, outputs, rows=rows)
+        stages = {"normalize": "ran"}
+        records = json.loads(out_json.read_text(encoding="utf-8"))
+        print(f"OK. {rows} Zeilen → {out_json}")
+        with stage("delta", rows=len(records)):
+            delta = untis_delta.update_delta(prev, records, delta_json, published=published)
+        stages["delta"] = "ran" if delta is not None else "skipped"
+    stages["report"] = "ran" if report_written else "skipped"
+    if store is not None:
+        import untis_store  # nur mit --store (SQLite)
+
+        if records is None:
+            records = json.loads(out_json.read_text(encoding="utf-8"))
+        with stage("store", rows=len(records)):
+            conn = untis_store.connect(store)
+            try:
+                sid, is_new = untis_store.append(conn, records, meta.get("scraped_at"), source=meta.get("mode", ""))
+            finally:
+                conn.close()
+        print(f"[store] Stand #{sid} {'neu' if is_new else 'unverändert'} → {store}")
+    meta["rows_normalized"] = rows
+    meta["stages"] = stages
+    return meta
+
+
+def main(argv=None):
+    import untis_store  # nur für den Default-Pfad von --store
+
+    ap = argparse.ArgumentParser(description="scrape → extract → normalize → publish in einem Prozess.")
+    ap.add_argument("--mode", choices=["browser", "http", "auto"], default="auto",
+                    help="Scrape-Modus (default: %(default)s)")
+    ap.add_argument("--url", default=scraper.URL, help="Monitor-URL")
+    ap.add_argument("--from-raw", action="store_true",
+                    help="nicht scrapen, sondern vorhandene webuntis_subst_raw_*.html verarbeiten")
+    ap.add_argument("--parser", choices=PARSERS, default="bs4",
+                    help="HTML-Parser für die Tabellen (default: %(default)s)")
+    ap.add_argument("--force", action="store_true",
+                    help="Stufen-Cache ignorieren, alle Stufen ausführen")
+    ap.add_argument("--store", type=Path, nargs="?", const=untis_store.DB_PATH,
+                    help=f"Stand an die Historie anhängen (default-Datei: {untis_store.DB_PATH})")
+    args = ap.parse_args(argv)
+    cache = StageCache.load()
+    if args.force:
+        cache.invalidate("normalize", "report")
+    run(args.url, args.mode, from_raw=args.from_raw, parser=args.parser, cache=cache, store=args.store)
+    cache.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 # untis_report.py
 # Erzeugt einen HTML-Report mit Suche/Sortierung aus einer Clean-CSV.
 # Robust: prüft Eingabe, meldet Fehler, gibt absoluten Ausgabe-Pfad aus.
+# --render static: Tabelle vorgerendert, CSS/Skript inline (tools/static_report.py),
+# keine CDN-Anfragen – die Zeilen stehen schon beim ersten Paint da.
+# --batch: normalisierte JSON einmal lesen, je Klasse eine Seite (report_<klasse>.html),
+# blockweise geschrieben, optional im Prozess-Pool (-j).
+# Nur Standardbibliothek (csv/json, Zeilen als Dicts, untis_filter); webbrowser und der
+# Prozess-Pool werden erst bei --open bzw. -j geladen – kurzer Start auf Kiosk-PC/Raspberry Pi.
+#
+# Beispiele:
+#   python untis_report.py -i untis_subst_8c_clean.csv -o report_8c.html
+#   python untis_report.py --batch --out-dir reports -j 4
+#   python untis_report.py --batch -c 8c 9a --render static
 
-import argparse, html, sys, traceback
+import argparse, csv, html, re, sys, traceback
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
-import webbrowser
+
+import untis_filter
+from tools.static_report import SCRIPT, STYLE
 
 DEF_IN  = "untis_subst_8c_clean.csv"
 DEF_OUT = "report_8c.html"
@@ -63,49 +75,160 @@ TPL = """<!doctype html>
 </html>
 """
 
-def run(input_csv: Path, output_html: Path, title: str|None, refresh: int, do_open: bool):
-    if not input_csv.exists():
-        raise FileNotFoundError(f"Eingabedatei nicht gefunden: {input_csv}")
+TPL_STATIC = """<!doctype html>
+<html lang="de">
+<head>
+<meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width, initial-scale=1"/>
+<title>{title}</title>
+{style}
+{meta_refresh}
+</head>
+<body>
+<header>
+  <div>
+    <h1 style="margin:0 0 4px 0">{h1}</h1>
+    <div class="meta muted">Datum: <strong>{datum}</strong>
+      &nbsp;•&nbsp; Klasse(n): <strong>{klassen}</strong>
+      &nbsp;•&nbsp; Stand: {now}
+    </div>
+  </div>
+  <input type="search" data-search placeholder="Suchen …" aria-label="Suchen"/>
+  <div class="muted" id="status"></div>
+</header>
+
+<table id="tbl">
+  <thead>
+    <tr>
+{thead}
+    </tr>
+  </thead>
+  <tbody>
+{tbody}
+  </tbody>
+</table>
+{script}
+</body>
+</html>
+"""
+
+RENDERS = ("datatables", "static")
 
-    df = pd.read_csv(input_csv, dtype=str, encoding="utf-8-sig").fillna("")
-    expected = ["Datum","Klassen","Stunde","Fach","Lehrkraft","Vertretungstext"]
-    missing = [c for c in expected if c not in df.columns]
-    if missing:
-        raise ValueError(f"Fehlende Spalten in {input_csv.name}: {missing}")
 
-    datum_set   = sorted({x for x in df["Datum"].astype(str) if x.strip()})
-    klasse_set  = sorted({x.strip() for x in df["Klassen"].astype(str) if x.strip()})
+def _stunde_key(v: str):
+    """Sortierung wie DataTables type 'num': führende Zahl, Rest (z. B. "3 - 4") als Text."""
+    head = v.strip().split(" ")[0].split("-")[0]
+    return (0, float(head), v) if head.replace(".", "", 1).isdigit() else (1, 0.0, v)
+
+
+COLUMNS = ["Datum", "Klassen", "Stunde", "Fach", "Lehrkraft", "Vertretungstext"]
+CHUNK_ROWS = 500  # Zeilen je Schreibvorgang
+
+
+def _cell(v) -> str:
+    return html.escape("" if v is None else str(v))
+
+
+def _tbody_chunks(rows: list[dict], chunk: int = CHUNK_ROWS):
+    """<tr>-Zeilen, in Blöcken zu chunk Zeilen."""
+    for i in range(0, len(rows), chunk):
+        yield "".join("    <tr>" + "".join(f"<td>{_cell(r.get(c))}</td>" for c in COLUMNS) + "</tr>\n"
+                      for r in rows[i:i + chunk])
+
+
+def write_page(rows: list[dict], output_html: Path, title: str | None = None, refresh: int = 0,
+               render: str = "datatables") -> Path:
+    """Schreibt eine Report-Seite für rows (Schlüssel COLUMNS) blockweise nach output_html."""
+    datum_set   = sorted({str(x) for x in (r.get("Datum") for r in rows) if x is not None and str(x).strip()})
+    klasse_set  = sorted({str(x).strip() for x in (r.get("Klassen") for r in rows) if x is not None and str(x).strip()})
     datum_info  = ", ".join(datum_set) if datum_set else "—"
     klassen_info= ", ".join(klasse_set) if klasse_set else "—"
     now_str     = datetime.now().strftime("%d.%m.%Y %H:%M")
 
     page_title = title or (f"Vertretungen {('/'.join(klasse_set) or '')}".strip() or "Vertretungen")
 
-    thead = "".join(f"      <th>{html.escape(c)}</th>\n" for c in expected)
-    tbody = ""
-    for _, row in df.iterrows():
-        cells = [row.get(c,"") for c in expected]
-        tds = "".join(f"<td>{html.escape(str(v))}</td>" for v in cells)
-        tbody += f"    <tr>{tds}</tr>\n"
+    if render == "static":
+        # Vorsortiert wie die DataTables-Vorgabe (Stunde aufsteigend)
+        rows = sorted(rows, key=lambda r: _stunde_key("" if r.get("Stunde") is None else str(r["Stunde"])))
 
-    meta_refresh = f'<meta http-equiv="refresh" content="{refresh}"/>' if refresh > 0 else ""
-
-    html_out = TPL.format(
+    fields = dict(
+        style=STYLE,
+        script=SCRIPT,
         title=html.escape(page_title),
         h1=html.escape(page_title),
         datum=html.escape(datum_info),
         klassen=html.escape(klassen_info),
         now=html.escape(now_str),
-        thead=thead,
-        tbody=tbody,
-        meta_refresh=meta_refresh
+        thead="".join(f"      <th>{html.escape(c)}</th>\n" for c in COLUMNS),
+        meta_refresh=f'<meta http-equiv="refresh" content="{refresh}"/>' if refresh > 0 else "",
     )
+    head, tail = (TPL_STATIC if render == "static" else TPL).split("{tbody}")
+    with output_html.open("w", encoding="utf-8") as f:
+        f.write(head.format(**fields))
+        for chunk in _tbody_chunks(rows):
+            f.write(chunk)
+        f.write(tail.format(**fields))
+    return output_html
+
 
-    output_html.write_text(html_out, encoding="utf-8")
+def run(input_csv: Path, output_html: Path, title: str|None, refresh: int, do_open: bool,
+        render: str = "datatables"):
+    if not input_csv.exists():
+        raise FileNotFoundError(f"Eingabedatei nicht gefunden: {input_csv}")
+
+    with input_csv.open(encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    missing = [c for c in COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Fehlende Spalten in {input_csv.name}: {missing}")
+
+    write_page(rows, output_html, title, refresh, render)
     print(f"OK: {output_html.resolve()}")
     if do_open:
+        import webbrowser
+
         webbrowser.open(output_html.resolve().as_uri())
 
+
+# ---------- Batch: alle (oder ausgewählte) Klassen aus einem Ladevorgang ----------
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_-]+", "_", name).strip("_") or "x"
+
+
+def by_class(rows: list[dict]) -> dict[str, list[dict]]:
+    """Klasse → Zeilen (Reihenfolge von rows); eine Zeile "8a, 8b" gehört zu beiden."""
+    index, display = untis_filter.class_index([r["Klassen"] for r in rows])
+    return {display[t]: [rows[i] for i in ids] for t, ids in index.items()}
+
+
+def _write_task(args) -> Path:
+    return write_page(*args)
+
+
+def run_batch(src: Path, out_dir: Path, classes: list[str] | None = None, jobs: int = 1,
+              refresh: int = 0, render: str = "datatables") -> list[Path]:
+    """Liest die normalisierten Daten einmal und schreibt report_<klasse>.html je Klasse.
+
+    classes schränkt auf diese Klassen ein (exakt, ohne Groß-/Kleinschreibung);
+    jobs > 1 verteilt die Seiten auf einen Prozess-Pool (0 = alle Kerne)."""
+    records, _ = untis_filter.load(src)
+    groups = by_class(untis_filter.clean(records))
+    if classes:
+        wanted = {c.lower() for c in classes}
+        groups = {c: g for c, g in groups.items() if c.lower() in wanted}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [(g, out_dir / f"report_{_slug(c)}.html", f"Vertretungen {c}", refresh, render)
+             for c, g in sorted(groups.items())]
+    if jobs == 1 or len(tasks) < 2:
+        return [_write_task(t) for t in tasks]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+        return list(pool.map(_write_task, tasks))
+
+
 def main():
     ap = argparse.ArgumentParser(description="Erzeuge HTML-Report aus Clean-CSV.")
     ap.add_argument("-i","--input", default=DEF_IN, help="CSV-Eingabe (default: %(default)s)")
@@ -113,10 +236,22 @@ def main():
     ap.add_argument("-t","--title", default=None, help="Seitentitel/Überschrift")
     ap.add_argument("-r","--refresh", type=int, default=0, help="Auto-Refresh in Sekunden (0=aus)")
     ap.add_argument("--open", action="store_true", help="Nach dem Erzeugen im Browser öffnen")
+    ap.add_argument("--render", choices=RENDERS, default="datatables",
+                    help="datatables (CDN) oder static (vorgerendert, ohne externe Anfragen; default: %(default)s)")
+    ap.add_argument("--batch", action="store_true",
+                    help="statt einer CSV: alle Klassen aus --src, je Klasse eine Seite in --out-dir")
+    ap.add_argument("--src", default=untis_filter.IN_JSON, help="normalisierte JSON für --batch (default: %(default)s)")
+    ap.add_argument("--out-dir", default="reports", help="Zielordner für --batch (default: %(default)s)")
+    ap.add_argument("-c", "--class", dest="classes", nargs="+", help="--batch nur für diese Klassen")
+    ap.add_argument("-j", "--jobs", type=int, default=1, help="Prozesse für --batch (0 = alle Kerne; default: %(default)s)")
     args = ap.parse_args()
 
     try:
-        run(Path(args.input), Path(args.output), args.title, args.refresh, args.open)
+        if args.batch:
+            pages = run_batch(Path(args.src), Path(args.out_dir), args.classes, args.jobs, args.refresh, args.render)
+            print(f"OK. {len(pages)} Seiten → {Path(args.out_dir).resolve()}")
+            return
+        run(Path(args.input), Path(args.output), args.title, args.refresh, args.open, args.render)
     except Exception:
         traceback.print_exc()
         sys.exit(1)
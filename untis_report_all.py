@@ -2,9 +2,37 @@
 # Erzeugt ein rein clientseitiges Report-HTML, das untis_subst_normalized.json lädt,
 # sowohl alte (Großbuchstaben) als auch neue (klein) Schlüssel versteht
 # und Datum/Klasse filtert. Tabellenlinien inkl.
+# Mit ?cls= / ?date= wird nur das passende Shard aus shards/ geladen (untis_shards.py,
+# von build_site.py veröffentlicht); ohne shards/manifest.json der Gesamtstand.
+# Gefiltert wird über den mitgelieferten Index (Klasse/Datum → Zeilen-IDs,
+# untis_subst_normalized.index.json) per Schnittmenge; nur die Auswahl geht an DataTables.
+# Die Suche (Fach, Lehrkraft, Text; ?q=) nutzt den Trigramm-Index aus untis_search.py
+# (untis_subst_normalized.search.json, erst bei der ersten Eingabe geladen); für Shards und
+# ältere Stände ohne Index wird er im Browser gebaut. DataTables' eigene Suche ist aus.
+#
+# --render static: Standardansicht (alle Tage/Klassen) serverseitig vorgerendert, Filter,
+# Suche und Sortierung als kleines Inline-Skript (tools/static_report.py), keine externen
+# Anfragen. build_site.py veröffentlicht diese Variante als index.html.
+#
+# Beispiele:
+#   python untis_report_all.py                                  # report_all.html (dynamisch)
+#   python untis_report_all.py --render static -o index.html    # vorgerendert aus untis_subst_normalized.json
 
+import argparse
+import html
+import json
+import re
 from pathlib import Path
 
+import untis_shards
+from tools.instrument import stage
+from tools.stage_cache import StageCache, hash_values
+from tools.static_report import SCRIPT, STYLE, options, table_rows
+
+OUT_HTML = Path("report_all.html")
+SRC_JSON = Path("untis_subst_normalized.json")
+RENDERS = ("dynamic", "static")
+
 TPL = r"""<!doctype html>
 <html lang="de">
 <head>
@@ -16,7 +44,7 @@ TPL = r"""<!doctype html>
 <style>
   body{font-family:system-ui,-apple-system,Segoe UI,Roboto,Ubuntu,Arial,sans-serif;margin:16px}
   header{display:flex;gap:12px;flex-wrap:wrap;align-items:center;margin-bottom:10px}
-  select{padding:6px 8px}
+  select,input{padding:6px 8px}
   table.dataTable{border-collapse:collapse !important}
   table.dataTable th, table.dataTable td{border:1px solid #ccc !important}
   .muted{color:#666;font-size:0.9em}
@@ -26,6 +54,7 @@ TPL = r"""<!doctype html>
   <header>
     <div><strong>Datum:</strong> <select id="dateSel"><option value="">Alle Tage</option></select></div>
     <div><strong>Klasse:</strong> <select id="classSel"><option value="">Alle Klassen</option></select></div>
+    <input type="search" id="q" placeholder="Suchen (Fach, Lehrkraft, Text) …" aria-label="Suchen"/>
     <div class="muted" id="status"></div>
   </header>
 
@@ -46,11 +75,17 @@ TPL = r"""<!doctype html>
     const v = params.get('v') || Date.now().toString(); // Cache-Buster
     const wantCls = params.get('cls') || '';
 
-    const url = 'untis_subst_normalized.json?v=' + encodeURIComponent(v);
+    const full = 'untis_subst_normalized.json?v=' + encodeURIComponent(v);
+    // Spaltenformat (untis_compact.py) – deutlich kleiner; fehlt es, die Liste oben
+    const fullColumnar = 'untis_subst_normalized.columnar.json?v=' + encodeURIComponent(v);
+    // Klasse/Datum → Zeilen-IDs (untis_normalize.py); fehlt er, wird er hier gebaut
+    const indexUrl = 'untis_subst_normalized.index.json?v=' + encodeURIComponent(v);
+    // Shards je Klasse/Datum (untis_shards.py); fehlt das Manifest (lokal, ältere Seite),
+    // wird wie bisher der Gesamtstand geladen
+    const manifestUrl = 'shards/manifest.json?v=' + encodeURIComponent(v);
+    // Trigramm → Zeilen-IDs über Fach/Lehrkraft/Text (untis_search.py)
+    const searchUrl = 'untis_subst_normalized.search.json?v=' + encodeURIComponent(v);
 
-    function escapeRegex(s){
-      return s.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
-    }
     function uniqueSorted(arr){
       return Array.from(new Set(arr.filter(Boolean))).sort((a,b)=>{
         // DD.MM.YYYY natürlich sortieren
@@ -59,94 +94,352 @@ TPL = r"""<!doctype html>
         return pa.localeCompare(pb);
       });
     }
+    function own(o, k){
+      return !!k && Object.prototype.hasOwnProperty.call(o, k);
+    }
+    function getJSON(u){
+      return fetch(u).then(r => { if (!r.ok) throw new Error(r.status + ' ' + u); return r.json(); });
+    }
 
-    fetch(url)
-      .then(r => r.json())
-      .then(raw => {
-        const arr = Array.isArray(raw) ? raw
-                   : Array.isArray(raw?.rows) ? raw.rows
-                   : Array.isArray(raw?.data) ? raw.data
-                   : [];
+    // Spaltentabelle {"$n", "$cols"} → Liste von Objekten
+    function decodeColumnar(t){
+      const names = Object.keys(t.$cols);
+      const cols = names.map(n => { const c = t.$cols[n]; return Array.isArray(c) ? c : c.idx.map(i => c.dict[i]); });
+      const out = new Array(t.$n);
+      for (let i = 0; i < t.$n; i++){
+        const r = {};
+        for (let j = 0; j < names.length; j++) r[names[j]] = cols[j][i];
+        out[i] = r;
+      }
+      return out;
+    }
+    function toRecords(raw){
+      if (raw && raw.$cols) return decodeColumnar(raw);
+      return Array.isArray(raw) ? raw
+           : Array.isArray(raw?.rows) ? raw.rows
+           : Array.isArray(raw?.data) ? raw.data
+           : [];
+    }
 
-        // Map auf einheitliche Keys + nur gruppe==2 (Datenzeilen)
-        const rows = [];
-        for (const r of arr){
-          const grp = Number((r.gruppe ?? r.Gruppe ?? 2));
-          if (!Number.isNaN(grp) && grp !== 2) continue;
+    // Map auf einheitliche Keys
+    function toRow(r){
+      return {
+        Datum: String(r.Datum ?? r.datum ?? '').trim(),
+        Klassen: String(r.Klassen ?? r.klasse ?? '').trim(),
+        Stunde: String(r.Stunde ?? r.stunde ?? '').trim(),
+        Fach: String(r.Fach ?? r.fach ?? '').trim(),
+        Lehrkraft: String(r.Lehrkraft ?? r.lehrkraft ?? '').trim(),
+        Vertretungstext: String(r.Vertretungstext ?? r.text ?? '').trim(),
+      };
+    }
+    // nur gruppe==2 (Datenzeilen) mit mind. einem Feld – wie untis_shards.shown()
+    function shown(r, row){
+      const grp = Number((r.gruppe ?? r.Gruppe ?? 2));
+      if (!Number.isNaN(grp) && grp !== 2) return false;
+      return !!(row.Klassen || row.Stunde || row.Fach || row.Lehrkraft || row.Vertretungstext);
+    }
+    // wie untis_shards.build_index(), für Shards und ältere Stände ohne Index-Datei
+    function buildIndex(records){
+      const index = {rows: records.length, shown: [], classes: {}, dates: {}};
+      records.forEach((r, i) => {
+        const row = toRow(r);
+        if (!shown(r, row)) return;
+        index.shown.push(i);
+        for (const c of new Set(row.Klassen.split(',').map(s => s.trim()).filter(Boolean))){
+          (own(index.classes, c) ? index.classes[c] : (index.classes[c] = [])).push(i);
+        }
+        if (row.Datum) (own(index.dates, row.Datum) ? index.dates[row.Datum] : (index.dates[row.Datum] = [])).push(i);
+      });
+      return index;
+    }
+    // Schnittmenge zweier aufsteigender ID-Listen
+    function intersect(a, b){
+      const out = [];
+      for (let i = 0, j = 0; i < a.length && j < b.length;){
+        if (a[i] === b[j]) { out.push(a[i]); i++; j++; }
+        else if (a[i] < b[j]) i++;
+        else j++;
+      }
+      return out;
+    }
 
-          const Datum = String(r.Datum ?? r.datum ?? '').trim();
-          const Klassen = String(r.Klassen ?? r.klasse ?? '').trim();
-          const Stunde = String(r.Stunde ?? r.stunde ?? '').trim();
-          const Fach = String(r.Fach ?? r.fach ?? '').trim();
-          const Lehrkraft = String(r.Lehrkraft ?? r.lehrkraft ?? '').trim();
-          const Vertretungstext = String(r.Vertretungstext ?? r.text ?? '').trim();
+    // ---- Suche: wie untis_search.py (Klartext, klein, Trigramme je Feld mit Rand-Leerzeichen)
+    const N = 3;
+    const ENT = {amp: '&', lt: '<', gt: '>', quot: '"', apos: "'", nbsp: ' '};
+    function plainText(s){
+      return String(s ?? '').replace(/<[^>]+>/g, ' ')
+        .replace(/&(#x[0-9a-f]+|#\d+|[a-z]+);/gi, (m, e) =>
+          e[0] !== '#' ? (ENT[e.toLowerCase()] ?? m)
+          : String.fromCodePoint(e[1] === 'x' || e[1] === 'X' ? parseInt(e.slice(2), 16) : parseInt(e.slice(1), 10)))
+        .split(/\s+/).filter(Boolean).join(' ').toLowerCase();
+    }
+    function rowParts(r){
+      const row = toRow(r);
+      return [row.Fach, row.Lehrkraft, row.Vertretungstext].map(plainText);
+    }
+    function buildSearch(records){
+      const grams = {};
+      records.forEach((r, i) => {
+        const seen = new Set();
+        for (const part of rowParts(r)){
+          if (!part) continue;
+          const p = ' ' + part + ' ';
+          for (let k = 0; k + N <= p.length; k++) seen.add(p.substr(k, N));
+        }
+        for (const g of seen) (own(grams, g) ? grams[g] : (grams[g] = [])).push(i);
+      });
+      return {n: N, rows: records.length, grams};
+    }
+    // Index für den geladenen Datensatz: Gesamtstand → veröffentlichte Datei, sonst gebaut
+    function ensureSearch(){
+      if (data.search) return Promise.resolve(data.search);
+      const d = data;
+      const got = d.src === full ? getJSON(searchUrl).catch(() => null) : Promise.resolve(null);
+      return got.then(sx => {
+        if (!sx || sx.rows !== d.records.length || sx.n !== N) sx = buildSearch(d.records);
+        sx.text = [];
+        sx.sets = {};
+        return (d.search = sx);
+      });
+    }
+    function setOf(sx, key, make){
+      return own(sx.sets, key) ? sx.sets[key] : (sx.sets[key] = new Set(make()));
+    }
+    // IDs (aufsteigend), die alle Wörter enthalten; null = keine Suche
+    function searchIds(sx, q){
+      const words = Array.from(new Set(q.toLowerCase().split(/\s+/).filter(Boolean)));
+      if (!words.length) return null;
+      const grams = new Set();
+      for (const w of words) for (let k = 0; k + N <= w.length; k++) grams.add(w.substr(k, N));
+      for (const g of grams) if (!own(sx.grams, g)) return [];
+      let tests = words.filter(w => w.length < N).map(w => setOf(sx, '\0' + w, () =>
+        Object.keys(sx.grams).filter(g => g.includes(w)).flatMap(g => sx.grams[g])));
+      let base;
+      if (grams.size) {
+        const ordered = Array.from(grams).sort((a, b) => sx.grams[a].length - sx.grams[b].length);
+        base = sx.grams[ordered[0]];
+        tests = tests.concat(ordered.slice(1).map(g => setOf(sx, g, () => sx.grams[g])));
+      } else {
+        tests.sort((a, b) => a.size - b.size);
+        base = Array.from(tests.shift()).sort((a, b) => a - b);
+      }
+      tests.sort((a, b) => a.size - b.size);
+      const long = words.filter(w => w.length > N);
+      const text = i => sx.text[i] ?? (sx.text[i] = rowParts(data.records[i]).join('\n'));
+      return base.filter(i => tests.every(t => t.has(i)) && long.every(w => text(i).includes(w)));
+    }
 
-          // Min. Felder nötig, sonst ignorieren
-          if (!(Klassen || Stunde || Fach || Lehrkraft || Vertretungstext)) continue;
+    let manifest = null;
+    // geladener Datensatz: {src, records, index, rows}; rows = bereits gemappte Zeilen je ID
+    let data = null;
+    // kleinste Datei, die die Auswahl abdeckt: Klassen-Shard, sonst Datums-Shard, sonst alles;
+    // ist der Gesamtstand schon geladen, deckt er jede Auswahl ab
+    function sourceFor(c, d){
+      if (data && data.src === full) return full;
+      const s = manifest && ((own(manifest.classes, c) && manifest.classes[c]) || (own(manifest.dates, d) && manifest.dates[d]));
+      return s ? 'shards/' + s.file + '?h=' + s.hash : full;
+    }
 
-          rows.push({Datum,Klassen,Stunde,Fach,Lehrkraft,Vertretungstext});
-        }
+    function load(src){
+      if (src !== full) {
+        return getJSON(src).then(raw => {
+          const records = toRecords(raw);
+          return {src, records, index: buildIndex(records), rows: []};
+        });
+      }
+      return Promise.all([
+        getJSON(fullColumnar).catch(() => getJSON(full)),
+        getJSON(indexUrl).catch(() => null),
+      ]).then(([raw, index]) => {
+        const records = toRecords(raw);
+        if (!index || index.rows !== records.length) index = buildIndex(records);
+        return {src, records, index, rows: []};
+      });
+    }
+
+    const dateSel = document.getElementById('dateSel');
+    const classSel = document.getElementById('classSel');
+    const qInput = document.getElementById('q');
+    const wantDate = params.get('date') || '';
+    qInput.value = params.get('q') || '';
+    let table = null;
 
-        // Dropdowns füllen
-        const dates = uniqueSorted(rows.map(r => r.Datum));
-        const classes = uniqueSorted(
-          rows.flatMap(r => r.Klassen.split(',').map(s => s.trim()))
-        );
+    function fillSelects(dates, classes){
+      dateSel.innerHTML = '<option value="">Alle Tage</option>' + dates.map(d=>`<option value="${d}">${d}</option>`).join('');
+      classSel.innerHTML = '<option value="">Alle Klassen</option>' + classes.map(c=>`<option value="${c}">${c}</option>`).join('');
+      // Permalink-Vorauswahl
+      if (wantCls && classes.includes(wantCls)) classSel.value = wantCls;
+      if (wantDate && dates.includes(wantDate)) dateSel.value = wantDate;
+    }
 
-        const dateSel = document.getElementById('dateSel');
-        const classSel = document.getElementById('classSel');
-        dateSel.innerHTML = '<option value="">Alle Tage</option>' + dates.map(d=>`<option value="${d}">${d}</option>`).join('');
-        classSel.innerHTML = '<option value="">Alle Klassen</option>' + classes.map(c=>`<option value="${c}">${c}</option>`).join('');
+    // Zeilen-IDs der Auswahl per Schnittmenge aus dem Index
+    function selectIds(c, d){
+      const ix = data.index;
+      let ids = ix.shown;
+      if (c) ids = own(ix.classes, c) ? ix.classes[c] : [];
+      if (d) ids = intersect(ids, own(ix.dates, d) ? ix.dates[d] : []);
+      return ids;
+    }
 
-        // Permalink-Vorauswahl
-        if (wantCls && classes.includes(wantCls)) classSel.value = wantCls;
-        const wantDate = params.get('date');
-        if (wantDate && dates.includes(wantDate)) dateSel.value = wantDate;
+    // nur die ausgewählten Zeilen an die Tabelle geben
+    function applyFilters(){
+      let ids = selectIds(classSel.value.trim(), dateSel.value.trim());
+      const hit = data.search ? searchIds(data.search, qInput.value) : null;
+      if (hit) ids = intersect(ids, hit);
+      const rows = ids.map(i => data.rows[i] || (data.rows[i] = toRow(data.records[i])));
+      table.clear().rows.add(rows).draw();
+      document.getElementById('status').textContent = rows.length + ' Einträge';
+    }
+
+    // lädt bei Bedarf ein anderes Shard und filtert dann
+    function update(){
+      const src = sourceFor(classSel.value.trim(), dateSel.value.trim());
+      const searching = () => qInput.value.trim() ? ensureSearch() : null;
+      if (src === data.src) return Promise.resolve(searching()).then(applyFilters);
+      document.getElementById('status').textContent = 'Lade …';
+      return load(src).then(d => { data = d; return searching(); }).then(applyFilters);
+    }
+
+    getJSON(manifestUrl)
+      .catch(() => null)
+      .then(m => {
+        manifest = m && m.classes && m.dates ? m : null;
+        return load(sourceFor(wantCls, wantDate));
+      })
+      .then(d => {
+        data = d;
+        // Dropdowns füllen: aus dem Manifest bzw. dem Index (alle Klassen/Tage)
+        const keys = manifest || data.index;
+        fillSelects(uniqueSorted(Object.keys(keys.dates)), uniqueSorted(Object.keys(keys.classes)));
 
         // Tabelle
-        const table = $('#tbl').DataTable({
-          data: rows,
+        table = $('#tbl').DataTable({
+          data: [],
           deferRender: true,
           pageLength: 50,
           order: [[0,'asc'],[1,'asc'],[2,'asc']],
+          searching: false,  // Suche über den Trigramm-Index (#q)
           columns: [
             {data:'Datum'},{data:'Klassen'},{data:'Stunde'},{data:'Fach'},{data:'Lehrkraft'},{data:'Vertretungstext'}
           ],
           language: { url: 'https://cdn.datatables.net/plug-ins/1.13.8/i18n/de-DE.json' }
         });
 
-        function applyFilters(){
-          const d = dateSel.value.trim();
-          const c = classSel.value.trim();
-
-          // exaktes Datum
-          table.column(0).search(d ? '^'+escapeRegex(d)+'$' : '', true, false);
-          // Klasse als Teil in kommaseparierter Liste
-          table.column(1).search(c ? '(^|,\\s*)'+escapeRegex(c)+'(\\s*,|$)' : '', true, false);
-
-          table.draw();
-          const cnt = table.rows({filter:'applied'}).data().length;
-          document.getElementById('status').textContent = cnt + ' Einträge';
-        }
-
-        $('#dateSel, #classSel').on('change', applyFilters);
+        $('#dateSel, #classSel').on('change', () => update().catch(fail));
+        $('#q').on('input', () => update().catch(fail));
 
         // Wichtig: Initial anwenden (Permalink)
-        applyFilters();
+        return update();
       })
-      .catch(err=>{
-        console.error(err);
-        document.getElementById('status').textContent = 'Fehler beim Laden der Daten.';
-      });
+      .catch(fail);
+
+    function fail(err){
+      console.error(err);
+      document.getElementById('status').textContent = 'Fehler beim Laden der Daten.';
+    }
   })();
   </script>
 </body>
 </html>
 """
 
-def main():
-    Path("report_all.html").write_text(TPL, encoding="utf-8")
-    print("OK: report_all.html geschrieben")
+def build_report(cache: StageCache | None = None, out: Path = OUT_HTML) -> bool:
+    """Schreibt report_all.html; False (übersprungen), wenn Vorlage und Datei unverändert sind."""
+    key = hash_values(TPL)
+    if cache is not None and cache.fresh("report", key, [out]):
+        print(cache.skip_message("report"))
+        return False
+    with stage("write_report"):
+        out.write_text(TPL, encoding="utf-8")
+    if cache is not None:
+        cache.record("report", key, [out])
+    print(f"OK: {out.name} geschrieben")
+    return True
+
+
+TPL_STATIC = """<!doctype html>
+<html lang="de">
+<head>
+<meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width,initial-scale=1"/>
+<title>Vertretungen (alle Klassen / Tage)</title>
+{style}
+</head>
+<body>
+  <header>
+    <div><strong>Datum:</strong> <select id="dateSel" data-filter="d">{date_options}</select></div>
+    <div><strong>Klasse:</strong> <select id="classSel" data-filter="c">{class_options}</select></div>
+    <input type="search" data-search placeholder="Suchen …" aria-label="Suchen"/>
+    <div class="muted" id="status">{count} Einträge</div>
+  </header>
+
+  <table id="tbl">
+    <thead>
+      <tr>
+        <th>Datum</th><th>Klassen</th><th>Stunde</th><th>Fach</th><th>Lehrkraft</th><th>Vertretungstext</th>
+      </tr>
+    </thead>
+    <tbody>
+{tbody}
+    </tbody>
+  </table>
+{script}
+</body>
+</html>
+"""
+
+
+def _natural(value: str) -> list:
+    return [(0, int(t), "") if t.isdigit() else (1, 0, t.lower()) for t in re.split(r"(\d+)", value) if t]
+
+
+def _date_key(datum: str) -> str:
+    return "".join(reversed(datum.split(".")))
+
+
+def render_static(records: list[dict]) -> str:
+    """Standardansicht als fertiges HTML: alle angezeigten Zeilen, sortiert nach Datum, Klasse,
+    Stunde. Datum/Klasse/Stunde werden escaped, Fach/Lehrkraft/Text sind sanitisiertes
+    Zell-HTML (Durchstreichungen) und werden – wie in der dynamischen Seite – übernommen."""
+    index = untis_shards.build_index(records)
+    rows = [records[i] for i in index["shown"]]
+    s = lambda r, k: str(r.get(k) or "").strip()
+    rows.sort(key=lambda r: (_date_key(s(r, "datum")), _natural(s(r, "klasse")), _natural(s(r, "stunde"))))
+    tbody = table_rows(
+        rows,
+        cells=lambda r: [html.escape(s(r, "datum")), html.escape(s(r, "klasse")), html.escape(s(r, "stunde")),
+                         s(r, "fach"), s(r, "lehrkraft"), s(r, "text")],
+        attrs=lambda r: {"d": s(r, "datum"), "c": "|" + "|".join(untis_shards.classes_of(r)) + "|"},
+    )
+    return TPL_STATIC.format(
+        style=STYLE,
+        script=SCRIPT,
+        date_options=options(sorted(index["dates"], key=_date_key), "Alle Tage"),
+        class_options=options(sorted(index["classes"], key=_natural), "Alle Klassen"),
+        count=len(rows),
+        tbody=tbody.rstrip("\n"),
+    )
+
+
+def build_static(records: list[dict], out: Path = OUT_HTML) -> None:
+    with stage("static_render", rows=len(records)):
+        out.write_text(render_static(records), encoding="utf-8")
+    print(f"OK: {out} (vorgerendert) geschrieben")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Report über alle Klassen/Tage.")
+    ap.add_argument("--render", choices=RENDERS, default="dynamic",
+                    help="dynamic (lädt JSON, DataTables) oder static (vorgerendert; default: %(default)s)")
+    ap.add_argument("--src", type=Path, default=SRC_JSON, help="Daten für --render static (default: %(default)s)")
+    ap.add_argument("-o", "--output", type=Path, default=OUT_HTML, help="Ausgabe (default: %(default)s)")
+    args = ap.parse_args(argv)
+    if args.render == "static":
+        build_static(json.loads(args.src.read_text(encoding="utf-8")), args.output)
+        return
+    cache = StageCache.load()
+    build_report(cache, args.output)
+    cache.save()
 
 if __name__ == "__main__":
     main()
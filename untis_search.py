@@ -0,0 +1,161 @@
+# untis_search.py
+# Volltext-Index für die Suche in Fach, Lehrkraft und Vertretungstext.
+# Grundlage ist der Klartext (untis_text.plain: Durchstreichungs-HTML entfernt, Entities
+# aufgelöst), klein geschrieben; je Feld werden alle Trigramme des mit Leerzeichen
+# umrahmten Texts indiziert (" mül", "mül", "üll" …), ohne Feldgrenzen zu überschreiten.
+#
+#   {"version": 1, "n": 3, "rows": N, "fields": ["fach", "lehrkraft", "text"],
+#    "grams": {"mül": [3, 17, 40], …}}            # Zeilen-IDs = Position im Gesamtstand
+#
+# Suche: jedes Wort der Anfrage muss als Teilstring in einem der Felder stehen (wie die
+# DataTables-Suche). Wörter ab 3 Zeichen → Schnittmenge der Trigramm-Listen, kürzere →
+# Vereinigung der Trigramme, die das Wort enthalten. Wörter über 3 Zeichen werden am
+# Klartext bestätigt (Trigramme allein liefern falsche Treffer, z. B. "abcd" in "abc bcd").
+# untis_normalize.py schreibt den Index als untis_subst_normalized.search.json;
+# report_all.html und untis_filter.py --grep benutzen ihn.
+#
+# Beispiele:
+#   python untis_search.py "entfällt"                      # IDs + Zeilen aus untis_subst_normalized.json
+#   python untis_search.py "Mül Ma" --src docs/untis_subst_normalized.json --bench
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from untis_text import plain
+
+SRC_JSON = Path("untis_subst_normalized.json")
+SUFFIX = ".search.json"
+FIELDS = ("fach", "lehrkraft", "text")
+N = 3
+VERSION = 1
+
+
+def search_path(src: Path) -> Path:
+    """untis_subst_normalized.json → untis_subst_normalized.search.json"""
+    return src.with_name(src.stem + SUFFIX)
+
+
+def row_parts(r: dict) -> list[str]:
+    """Klartext der indizierten Felder, klein geschrieben."""
+    return [plain(r.get(f)).lower() for f in FIELDS]
+
+
+def _grams(part: str) -> set[str]:
+    padded = f" {part} "
+    return {padded[i:i + N] for i in range(len(padded) - N + 1)}
+
+
+def build_search_index(records: list[dict]) -> dict:
+    """Trigramm → aufsteigende Zeilen-IDs über alle Zeilen (Filter wie "shown" macht der Leser)."""
+    grams: dict[str, list[int]] = {}
+    for i, r in enumerate(records):
+        seen: set[str] = set()
+        for part in row_parts(r):
+            if part:
+                seen |= _grams(part)
+        for g in seen:
+            grams.setdefault(g, []).append(i)
+    return {"version": VERSION, "n": N, "rows": len(records), "fields": list(FIELDS),
+            "grams": dict(sorted(grams.items()))}
+
+
+class Searcher:
+    """Suche über einen Index; der Klartext je Zeile wird erst bei Bedarf gebildet."""
+
+    def __init__(self, index: dict, records: list[dict]):
+        if index.get("rows") != len(records) or index.get("n") != N:
+            raise ValueError("Suchindex passt nicht zu den Zeilen")
+        self.grams: dict[str, list[int]] = index["grams"]
+        self.records = records
+        self._text: dict[int, str] = {}
+        self._sets: dict[str, frozenset[int]] = {}
+
+    @classmethod
+    def for_records(cls, records: list[dict], path: Path | None = None) -> "Searcher":
+        """Index aus path, falls vorhanden und passend; sonst im Speicher gebaut."""
+        if path is not None and path.exists():
+            try:
+                return cls(json.loads(path.read_text(encoding="utf-8")), records)
+            except (ValueError, KeyError):
+                print(f"[warn] {path} veraltet oder unlesbar – baue Suchindex neu")
+        return cls(build_search_index(records), records)
+
+    def _row_text(self, i: int) -> str:
+        text = self._text.get(i)
+        if text is None:
+            text = self._text[i] = "\n".join(row_parts(self.records[i]))
+        return text
+
+    def _set(self, gram: str) -> frozenset[int]:
+        ids = self._sets.get(gram)
+        if ids is None:
+            ids = self._sets[gram] = frozenset(self.grams.get(gram, ()))
+        return ids
+
+    def _short(self, w: str) -> frozenset[int]:
+        """Wörter unter N Zeichen: Vereinigung aller Trigramme, die das Wort enthalten."""
+        key = "\0" + w
+        ids = self._sets.get(key)
+        if ids is None:
+            ids = self._sets[key] = frozenset(i for g, rows in self.grams.items() if w in g for i in rows)
+        return ids
+
+    def search(self, query: str) -> list[int] | None:
+        """Zeilen-IDs (aufsteigend), die alle Wörter enthalten; None bei leerer Anfrage.
+
+        Die kürzeste Trigramm-Liste aller Wörter liefert die Kandidaten, die übrigen werden
+        nur per Mengen-Test geprüft; am Klartext bestätigt wird nur bei Wörtern über N Zeichen."""
+        words = list(dict.fromkeys(query.lower().split()))
+        if not words:
+            return None
+        grams = {w[i:i + N] for w in words if len(w) >= N for i in range(len(w) - N + 1)}
+        if any(g not in self.grams for g in grams):
+            return []
+        tests = [self._short(w) for w in words if len(w) < N]
+        if grams:
+            ordered = sorted(grams, key=lambda g: len(self.grams[g]))
+            base: list[int] = self.grams[ordered[0]]
+            tests += [self._set(g) for g in ordered[1:]]
+        else:
+            tests.sort(key=len)
+            base, tests = sorted(tests[0]), tests[1:]
+        tests.sort(key=len)
+        hit = [i for i in base if all(i in t for t in tests)]
+        long_words = [w for w in words if len(w) > N]
+        if long_words:
+            hit = [i for i in hit if all(w in self._row_text(i) for w in long_words)]
+        return hit
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Volltextsuche in Fach/Lehrkraft/Vertretungstext.")
+    ap.add_argument("query", help="Suchbegriffe (alle müssen vorkommen)")
+    ap.add_argument("--src", type=Path, default=SRC_JSON, help="normalisierter Stand (default: %(default)s)")
+    ap.add_argument("--bench", action="store_true", help="Dauer je Abfrage messen (1000 Wiederholungen)")
+    args = ap.parse_args(argv)
+    if not args.src.exists():
+        print(f"[error] {args.src} nicht gefunden", file=sys.stderr)
+        return 1
+    records = json.loads(args.src.read_text(encoding="utf-8"))
+    searcher = Searcher.for_records(records, search_path(args.src))
+    ids = searcher.search(args.query) or []
+    for i in ids:
+        r = records[i]
+        print(f"{i:>5}  {r.get('datum', '')}  {r.get('klasse', '')}  {r.get('stunde', '')}  "
+              f"{plain(r.get('fach'))}  {plain(r.get('lehrkraft'))}  {plain(r.get('text'))}")
+    print(f"OK. {len(ids)} Treffer für {args.query!r}")
+    if args.bench:
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            searcher.search(args.query)
+        print(f"{(time.perf_counter() - t0) * 1000 / 1000:.4f} ms je Abfrage (Klartext gecacht)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
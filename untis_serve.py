@@ -0,0 +1,284 @@
+# untis_serve.py
+# Kleiner HTTP-Dienst (nur Standardbibliothek) für Anzeigen und Lehrer-Tools: hält
+# untis_subst_normalized.json im Speicher, indiziert nach Klasse, Datum und Lehrkraft, und
+# beantwortet Abfragen als JSON – statt dass jeder Client die ganze Datei oder Seite neu lädt.
+#
+#   GET /subst?cls=8c&date=31.10.2025&teacher=Mül   → {"version", "count", "rows": [...]}
+#       cls/teacher/date: mehrere Werte per Komma (= oder), Parameter untereinander = und;
+#       date als TT.MM.JJJJ oder JJJJ-MM-TT; ohne Parameter alle angezeigten Zeilen.
+#   GET /meta    → Stand, Zeilenzahl, Klassen/Daten/Lehrkräfte mit Zeilenzahl
+#   GET /health  → {"ok": true, "version": …}
+#
+# Jede Antwort trägt ein ETag aus Datenstand + Abfrage; If-None-Match → 304 ohne Inhalt.
+# Ändert sich die Datei (mtime/Größe, höchstens alle --poll Sekunden geprüft), wird neu
+# geladen; eine halb geschriebene Datei wird übergangen und der alte Stand weiter ausgeliefert.
+# Zeilen wie im Report (untis_shards.shown), Klassen wie im Dropdown (untis_shards.classes_of),
+# Lehrkräfte als Tokens des Klartexts (durchgestrichene und Vertretung).
+#
+# Beispiele:
+#   python untis_serve.py                                  # http://127.0.0.1:8765/subst?cls=8c
+#   python untis_serve.py --src docs/untis_subst_normalized.json --host 0.0.0.0 --port 8080
+#   python bench/bench_serve.py                            # Offline-Selbsttest + Latenz
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import untis_shards
+from untis_text import datum_iso, plain, tokens
+
+SRC_JSON = untis_shards.SRC_JSON
+HOST = "127.0.0.1"
+PORT = 8765
+POLL_S = 2.0          # höchstens so oft wird die Datei auf Änderungen geprüft
+GZIP_MIN = 1024       # kleinere Antworten bleiben unkomprimiert
+CACHE_MAX = 256       # zwischengespeicherte Antworten je Datenstand
+
+
+class SubstIndex:
+    """Ein geladener Stand: Zeilen plus Klasse/Datum/Lehrkraft → aufsteigende Zeilen-IDs."""
+
+    def __init__(self, records: list[dict], version: str):
+        self.records = records
+        self.version = version
+        index = untis_shards.build_index(records)
+        self.shown: list[int] = index["shown"]
+        self.classes: dict[str, list[int]] = {}
+        self.class_names: dict[str, str] = {}
+        for c, ids in index["classes"].items():
+            self.classes.setdefault(c.lower(), []).extend(ids)
+            self.class_names.setdefault(c.lower(), c)
+        self.dates: dict[str, list[int]] = {}
+        for d, ids in index["dates"].items():
+            self.dates.setdefault(datum_iso(d) or d, []).extend(ids)
+        self.teachers: dict[str, list[int]] = {}
+        for i in self.shown:
+            for t in tokens(plain(records[i].get("lehrkraft"))):
+                self.teachers.setdefault(t, []).append(i)
+        for m in (self.classes, self.dates):  # gleiche Schlüssel aus verschiedenen Schreibweisen
+            for k, ids in m.items():
+                m[k] = sorted(set(ids))
+
+    @staticmethod
+    def _union(m: dict[str, list[int]], keys: list[str]) -> set[int]:
+        out: set[int] = set()
+        for k in keys:
+            out.update(m.get(k, ()))
+        return out
+
+    def query(self, cls: list[str] = (), date: list[str] = (), teacher: list[str] = ()) -> list[int]:
+        """Zeilen-IDs (aufsteigend), die alle angegebenen Kriterien erfüllen."""
+        sets = []
+        if cls:
+            sets.append(self._union(self.classes, [c.lower() for c in cls]))
+        if date:
+            sets.append(self._union(self.dates, [datum_iso(d) or d for d in date]))
+        if teacher:
+            sets.append(self._union(self.teachers, [t.lower() for t in teacher]))
+        if not sets:
+            return list(self.shown)
+        sets.sort(key=len)
+        hit = sets[0].intersection(*sets[1:])
+        return sorted(hit)
+
+    def meta(self) -> dict:
+        return {"version": self.version, "rows": len(self.shown),
+                "classes": {self.class_names[k]: len(v) for k, v in sorted(self.classes.items())},
+                "dates": {k: len(v) for k, v in sorted(self.dates.items())},
+                "teachers": {k: len(v) for k, v in sorted(self.teachers.items())}}
+
+
+class Store:
+    """Liefert den aktuellen SubstIndex; lädt neu, wenn sich die Quelldatei ändert."""
+
+    def __init__(self, src: Path, poll: float = POLL_S):
+        self.src = src
+        self.poll = poll
+        self.index: SubstIndex | None = None
+        self.loads = 0
+        self._stamp: tuple[int, int] | None = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.cache: dict[tuple, tuple[bytes, bytes | None, str]] = {}  # Schlüssel → (json, gzip, Stand)
+        self.reload()
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = self.src.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self) -> bool:
+        """Lädt die Datei, wenn sie sich seit dem letzten Laden geändert hat."""
+        with self._lock:
+            self._checked = time.monotonic()
+            stamp = self._stat()
+            if stamp is None or stamp == self._stamp:
+                return False
+            try:
+                data = self.src.read_bytes()
+                records = json.loads(data.decode("utf-8"))
+            except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+                # vermutlich gerade im Schreiben – beim nächsten Abruf erneut versuchen
+                print(f"[warn] {self.src} nicht lesbar ({e}); bleibe bei Stand "
+                      f"{self.index.version if self.index else '–'}", file=sys.stderr)
+                return False
+            if not isinstance(records, list):
+                print(f"[warn] {self.src}: keine Zeilenliste, ignoriert", file=sys.stderr)
+                self._stamp = stamp
+                return False
+            self.index = SubstIndex(records, hashlib.sha256(data).hexdigest()[:16])
+            self.cache = {}
+            self._stamp = stamp
+            self.loads += 1
+            return True
+
+    def current(self) -> SubstIndex | None:
+        if time.monotonic() - self._checked >= self.poll:
+            self.reload()
+        return self.index
+
+
+def _values(qs: dict[str, list[str]], name: str) -> tuple[str, ...]:
+    """Werte eines Parameters, normalisiert (Kleinschreibung, Datum ISO) – gleiche Abfrage, gleiches ETag."""
+    norm = (lambda v: datum_iso(v) or v) if name == "date" else str.lower
+    return tuple(sorted({norm(v.strip()) for raw in qs.get(name, []) for v in raw.split(",") if v.strip()}))
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "untis_serve/1"
+    store: Store  # wird von make_server() gesetzt
+    quiet = False
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def _respond(self, head: bool) -> None:
+        url = urlsplit(self.path)
+        idx = self.store.current()
+        if url.path not in ("/subst", "/meta", "/health"):
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unbekannter Pfad {url.path}"}, head)
+        if idx is None:
+            return self._send_json(HTTPStatus.SERVICE_UNAVAILABLE,
+                                   {"error": f"{self.store.src} noch nicht vorhanden"}, head)
+        if url.path == "/health":
+            return self._send_json(HTTPStatus.OK, {"ok": True, "version": idx.version}, head)
+
+        qs = parse_qs(url.query)
+        if url.path == "/meta":
+            key: tuple = ("meta",)
+        else:
+            unknown = sorted(set(qs) - {"cls", "date", "teacher"})
+            if unknown:
+                return self._send_json(HTTPStatus.BAD_REQUEST,
+                                       {"error": f"unbekannte Parameter: {', '.join(unknown)}"}, head)
+            key = ("subst", *(_values(qs, n) for n in ("cls", "date", "teacher")))
+        etag = '"%s-%s"' % (idx.version, hashlib.sha1(repr(key).encode()).hexdigest()[:8])
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._common_headers(etag)
+            self.end_headers()
+            return
+
+        cached = self.store.cache.get(key)
+        if cached is None or cached[2] != idx.version:
+            if key[0] == "meta":
+                doc = idx.meta()
+            else:
+                ids = idx.query(*key[1:])
+                doc = {"version": idx.version, "count": len(ids), "rows": [idx.records[i] for i in ids]}
+            body = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            gz = gzip.compress(body, mtime=0) if len(body) >= GZIP_MIN else None
+            cached = (body, gz, idx.version)
+            if len(self.store.cache) >= CACHE_MAX:
+                self.store.cache.clear()
+            self.store.cache[key] = cached
+        body, gz, _ = cached
+        use_gz = gz is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        self.send_response(HTTPStatus.OK)
+        self._common_headers(etag)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if use_gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(gz if use_gz else body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(gz if use_gz else body)
+
+    def _common_headers(self, etag: str | None) -> None:
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # immer revalidieren, dann 304
+        else:
+            self.send_header("Cache-Control", "no-store")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def _send_json(self, status: HTTPStatus, doc: dict, head: bool) -> None:
+        body = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self._common_headers(None)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+def make_server(src: Path = SRC_JSON, host: str = HOST, port: int = PORT, poll: float = POLL_S,
+                quiet: bool = False) -> ThreadingHTTPServer:
+    """Server mit eigenem Store; port=0 wählt einen freien Port (server.server_address)."""
+    store = Store(src, poll)
+    handler = type("BoundHandler", (Handler,), {"store": store, "quiet": quiet})
+    srv = ThreadingHTTPServer((host, port), handler)
+    srv.store = store
+    return srv
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="HTTP-Abfragedienst für den normalisierten Vertretungsstand.")
+    ap.add_argument("--src", type=Path, default=SRC_JSON, help="normalisierte JSON (default: %(default)s)")
+    ap.add_argument("--host", default=HOST, help="Adresse (default: %(default)s; 0.0.0.0 = alle)")
+    ap.add_argument("--port", type=int, default=PORT, help="Port (default: %(default)s)")
+    ap.add_argument("--poll", type=float, default=POLL_S,
+                    help="Datei höchstens alle N Sekunden auf Änderungen prüfen (default: %(default)s)")
+    ap.add_argument("-q", "--quiet", action="store_true", help="keine Zugriffszeilen ausgeben")
+    args = ap.parse_args(argv)
+
+    srv = make_server(args.src, args.host, args.port, args.poll, args.quiet)
+    idx = srv.store.index
+    if idx is None:
+        print(f"[warn] {args.src} fehlt – antworte mit 503, bis die Datei da ist")
+    else:
+        print(f"OK. {len(idx.shown)} Zeilen, {len(idx.classes)} Klassen, Stand {idx.version}")
+    host, port = srv.server_address[:2]
+    print(f"Lausche auf http://{host}:{port}/subst?cls=… (Strg+C beendet)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
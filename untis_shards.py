@@ -0,0 +1,131 @@
+# untis_shards.py
+# Zerlegt untis_subst_normalized.json für die Veröffentlichung in kleine Dateien:
+#   shards/cls/<klasse>.json     – alle Vertretungszeilen, in deren "klasse" die Klasse vorkommt
+#   shards/date/<JJJJ-MM-TT>.json – alle Vertretungszeilen eines Tages
+#   shards/manifest.json         – Verzeichnis der Shards mit Inhalts-Hash und Zeilenzahl
+# build_index() liefert dieselbe Zuordnung als Zeilen-IDs; untis_normalize.py schreibt sie
+# als untis_subst_normalized.index.json neben den Gesamtstand.
+# report_all.html lädt bei ?cls= / ?date= nur das passende Shard statt des Gesamtstands.
+# Shards enthalten nur, was der Report anzeigt (gruppe 2, mindestens ein Feld gefüllt),
+# im Spaltenformat aus untis_compact.py (Zeilen wie in untis_subst_normalized.json).
+#
+# Beispiele:
+#   python untis_shards.py                               # → shards/ neben der JSON
+#   python untis_shards.py --src docs/untis_subst_normalized.json --out site/shards
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+
+import untis_compact
+from tools.stage_cache import hash_bytes
+
+SRC_JSON = Path("untis_subst_normalized.json")
+OUT_DIR = Path("shards")
+MANIFEST = "manifest.json"
+VERSION = 2  # 2: Shards im Spaltenformat
+
+_SLUG_RE = re.compile(r"[^0-9A-Za-z_-]+")
+_DATE_RE = re.compile(r"^(\d{1,2})\.(\d{1,2})\.(\d{4})$")
+
+
+def shown(r: dict) -> bool:
+    """Wie report_all.html: nur Datenzeilen (gruppe 2) mit mindestens einem Inhaltsfeld."""
+    try:
+        if int(r.get("gruppe", 2)) != 2:
+            return False
+    except (TypeError, ValueError):
+        pass
+    return any(str(r.get(k) or "").strip() for k in ("klasse", "stunde", "fach", "lehrkraft", "text"))
+
+
+def classes_of(r: dict) -> list[str]:
+    """Klassen einer Zeile wie im Report-Dropdown: "8a, 8b" → ["8a", "8b"]."""
+    return [c for c in (s.strip() for s in str(r.get("klasse") or "").split(",")) if c]
+
+
+def _slug(name: str, taken: set[str]) -> str:
+    base = _SLUG_RE.sub("_", name).strip("_") or "x"
+    slug, n = base, 1
+    while slug.lower() in taken:  # case-insensitive Dateisysteme
+        n += 1
+        slug = f"{base}_{n}"
+    taken.add(slug.lower())
+    return slug
+
+
+def _date_slug(datum: str, taken: set[str]) -> str:
+    m = _DATE_RE.match(datum)
+    return _slug(f"{m[3]}-{int(m[2]):02d}-{int(m[1]):02d}" if m else datum, taken)
+
+
+def build_index(records: list[dict]) -> dict:
+    """Klasse → Zeilen-IDs und Datum → Zeilen-IDs (IDs = Position in records, aufsteigend).
+
+    "shown" listet alle Zeilen, die der Report anzeigt; der Report filtert per Schnittmenge."""
+    shown_ids: list[int] = []
+    by_cls: dict[str, list[int]] = {}
+    by_date: dict[str, list[int]] = {}
+    for i, r in enumerate(records):
+        if not shown(r):
+            continue
+        shown_ids.append(i)
+        for c in dict.fromkeys(classes_of(r)):
+            by_cls.setdefault(c, []).append(i)
+        datum = str(r.get("datum") or "").strip()
+        if datum:
+            by_date.setdefault(datum, []).append(i)
+    return {"version": 1, "rows": len(records), "shown": shown_ids, "classes": by_cls, "dates": by_date}
+
+
+def group(records: list[dict]) -> tuple[dict[str, list[dict]], dict[str, list[dict]]]:
+    """(Klasse → Zeilen, Datum → Zeilen), jeweils in Originalreihenfolge."""
+    index = build_index(records)
+    return ({c: [records[i] for i in ids] for c, ids in index["classes"].items()},
+            {d: [records[i] for i in ids] for d, ids in index["dates"].items()})
+
+
+def _write(path: Path, rows: list[dict]) -> str:
+    data = untis_compact.dumps(rows).encode("utf-8")
+    path.write_bytes(data)
+    return hash_bytes(data)[:16]
+
+
+def write_shards(records: list[dict], out_dir: Path = OUT_DIR) -> dict:
+    """Schreibt cls/, date/ und manifest.json nach out_dir (alte Shards werden entfernt)."""
+    for sub in ("cls", "date"):
+        shutil.rmtree(out_dir / sub, ignore_errors=True)
+        (out_dir / sub).mkdir(parents=True, exist_ok=True)
+    by_cls, by_date = group(records)
+    manifest = {"version": VERSION, "format": "columnar", "rows": sum(1 for r in records if shown(r)),
+                "classes": {}, "dates": {}}
+    for kind, groups, slug in (("classes", by_cls, _slug), ("dates", by_date, _date_slug)):
+        taken: set[str] = set()
+        sub = "cls" if kind == "classes" else "date"
+        for name, rows in groups.items():
+            file = f"{sub}/{slug(name, taken)}.json"
+            manifest[kind][name] = {"file": file, "hash": _write(out_dir / file, rows), "rows": len(rows)}
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    return manifest
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Shards je Klasse/Datum aus untis_subst_normalized.json.")
+    ap.add_argument("--src", type=Path, default=SRC_JSON, help="normalisierter Stand (default: %(default)s)")
+    ap.add_argument("--out", type=Path, default=OUT_DIR, help="Zielordner (default: %(default)s)")
+    args = ap.parse_args(argv)
+    if not args.src.exists():
+        print(f"[error] {args.src} nicht gefunden", file=sys.stderr)
+        return 1
+    manifest = write_shards(json.loads(args.src.read_text(encoding="utf-8")), args.out)
+    print(f"OK. {len(manifest['classes'])} Klassen-, {len(manifest['dates'])} Datums-Shards → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+# untis_store.py
+# Historischer Speicher für normalisierte Vertretungen (SQLite, WAL).
+# Jeder normalisierte Stand wird mit Scrape-Zeitpunkt angehängt; unveränderte Stände
+# kosten nur eine Zeile in "captures". Indiziert auf datum, klasse, stunde, lehrkraft,
+# dazu ein Token-Index für einzelne Klassen/Lehrkräfte ("10a, 10b" → 10a, 10b).
+#
+# Aufbewahrung (compact): Stände, die älter als --keep-days sind, werden auf die letzte
+# Fassung je Tag reduziert; mit --max-age-days fallen Tage vor dem Stichtag ganz weg.
+#
+# Beispiele:
+#   python untis_store.py add untis_subst_normalized.json            # aktuellen Stand anhängen
+#   python untis_store.py backfill-git docs/untis_subst_normalized.json  # Historie aus Git übernehmen
+#   python untis_store.py query -c 8c --from 01.09.2025 --to 30.09.2025
+#   python untis_store.py query -l Li --stunde 3 --json
+#   python untis_store.py compact --keep-days 14 --max-age-days 400 --vacuum
+#   python untis_store.py stats
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from untis_text import FIELDS, content_hash, datum_iso, plain, tokens
+
+DB_PATH = Path("untis_history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id           INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    first_seen   TEXT NOT NULL,          -- Scrape-Zeitpunkt (ISO), als der Stand zuerst auftrat
+    last_seen    TEXT NOT NULL,          -- letzter Scrape mit identischem Inhalt
+    n_rows       INTEGER NOT NULL,       -- Zeilen beim Anhängen (vor compact)
+    source       TEXT
+);
+CREATE TABLE IF NOT EXISTS captures (
+    scraped_at   TEXT NOT NULL,
+    snapshot_id  INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS rows (
+    id                 INTEGER PRIMARY KEY,
+    snapshot_id        INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    gruppe             INTEGER,
+    datum              TEXT,
+    datum_iso          TEXT,             -- YYYY-MM-DD, für Bereichsabfragen
+    quelle_table_index INTEGER,
+    klasse             TEXT,
+    stunde             TEXT,
+    stunde_num         INTEGER,
+    fach               TEXT,             -- HTML wie in untis_subst_normalized.json
+    lehrkraft          TEXT,
+    lehrkraft_txt      TEXT,             -- Klartext (ohne <s>/<span>)
+    text               TEXT
+);
+CREATE TABLE IF NOT EXISTS row_keys (
+    kind    TEXT NOT NULL,               -- 'klasse' | 'lehrkraft'
+    key     TEXT NOT NULL,               -- Token in Kleinbuchstaben
+    row_id  INTEGER NOT NULL REFERENCES rows(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS day_latest (
+    datum_iso    TEXT PRIMARY KEY,       -- jüngster Stand, der diesen Tag enthält
+    snapshot_id  INTEGER NOT NULL REFERENCES snapshots(id)
+);
+CREATE INDEX IF NOT EXISTS idx_rows_datum     ON rows(datum_iso, snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_rows_snapshot  ON rows(snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_rows_klasse    ON rows(klasse);
+CREATE INDEX IF NOT EXISTS idx_rows_stunde    ON rows(stunde_num);
+CREATE INDEX IF NOT EXISTS idx_rows_lehrkraft ON rows(lehrkraft_txt);
+CREATE INDEX IF NOT EXISTS idx_keys           ON row_keys(kind, key, row_id);
+CREATE INDEX IF NOT EXISTS idx_keys_row       ON row_keys(row_id);
+CREATE INDEX IF NOT EXISTS idx_captures       ON captures(snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_seen ON snapshots(last_seen);
+"""
+
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---------- Hilfsfunktionen ----------
+
+def _int_or_none(x) -> int | None:
+    try:
+        return int(str(x).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------- Schreiben ----------
+
+def append(conn: sqlite3.Connection, records: list[dict], scraped_at: str | None = None,
+           source: str = "") -> tuple[int, bool]:
+    """Hängt einen normalisierten Stand an; gibt (snapshot_id, neu?) zurück.
+
+    Ist der Inhalt identisch zum jüngsten Stand, wird nur der Scrape-Zeitpunkt vermerkt."""
+    scraped_at = scraped_at or datetime.now().isoformat(timespec="seconds")
+    h = content_hash(records)
+    with conn:
+        latest = conn.execute("SELECT id, content_hash FROM snapshots ORDER BY first_seen DESC, id DESC LIMIT 1").fetchone()
+        if latest is not None and latest["content_hash"] == h:
+            conn.execute("UPDATE snapshots SET last_seen = MAX(last_seen, ?) WHERE id = ?", (scraped_at, latest["id"]))
+            conn.execute("INSERT INTO captures(scraped_at, snapshot_id) VALUES (?, ?)", (scraped_at, latest["id"]))
+            return latest["id"], False
+
+        sid = conn.execute(
+            "INSERT INTO snapshots(content_hash, first_seen, last_seen, n_rows, source) VALUES (?, ?, ?, ?, ?)",
+            (h, scraped_at, scraped_at, len(records), source),
+        ).lastrowid
+        conn.execute("INSERT INTO captures(scraped_at, snapshot_id) VALUES (?, ?)", (scraped_at, sid))
+
+        keys = []
+        days = set()
+        for r in records:
+            iso = datum_iso(r.get("datum"))
+            lehr = r.get("lehrkraft") or ""
+            lehr_txt = plain(lehr)
+            rid = conn.execute(
+                "INSERT INTO rows(snapshot_id, gruppe, datum, datum_iso, quelle_table_index, klasse, stunde,"
+                " stunde_num, fach, lehrkraft, lehrkraft_txt, text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sid, _int_or_none(r.get("gruppe")), r.get("datum"), iso, _int_or_none(r.get("quelle_table_index")),
+                 r.get("klasse") or "", r.get("stunde") or "", _int_or_none(r.get("stunde")),
+                 r.get("fach") or "", lehr, lehr_txt, r.get("text") or ""),
+            ).lastrowid
+            keys += [("klasse", t, rid) for t in tokens(r.get("klasse") or "")]
+            keys += [("lehrkraft", t, rid) for t in tokens(lehr_txt)]
+            if iso:
+                days.add(iso)
+        conn.executemany("INSERT INTO row_keys(kind, key, row_id) VALUES (?, ?, ?)", keys)
+        # jüngster Stand je Tag (Nachträge aus älteren Ständen überschreiben nicht)
+        conn.executemany(
+            "INSERT INTO day_latest(datum_iso, snapshot_id) VALUES (?, ?) "
+            "ON CONFLICT(datum_iso) DO UPDATE SET snapshot_id = excluded.snapshot_id "
+            "WHERE (SELECT first_seen FROM snapshots WHERE id = day_latest.snapshot_id) <= ?",
+            [(d, sid, scraped_at) for d in sorted(days)],
+        )
+    return sid, True
+
+
+def append_json(conn: sqlite3.Connection, path: Path, scraped_at: str | None = None) -> tuple[int, bool]:
+    records = json.loads(Path(path).read_text(encoding="utf-8"))
+    if scraped_at is None:
+        scraped_at = datetime.fromtimestamp(Path(path).stat().st_mtime).isoformat(timespec="seconds")
+    return append(conn, records, scraped_at, source=str(path))
+
+
+def backfill_git(conn: sqlite3.Connection, path: str) -> tuple[int, int]:
+    """Übernimmt alle Git-Stände von path (älteste zuerst); gibt (Stände, davon neu) zurück."""
+    log = subprocess.run(["git", "log", "--reverse", "--format=%H %cI", "--", path],
+                         capture_output=True, text=True, check=True).stdout.split("\n")
+    seen = new = 0
+    for line in filter(None, log):
+        sha, ts = line.split(" ", 1)
+        show = subprocess.run(["git", "show", f"{sha}:{path}"], capture_output=True, text=True)
+        if show.returncode != 0:
+            continue  # Datei in diesem Commit gelöscht
+        try:
+            records = json.loads(show.stdout)
+        except ValueError:
+            print(f"[warn] {sha[:7]}: kein gültiges JSON, übersprungen")
+            continue
+        at = datetime.fromisoformat(ts).astimezone().replace(tzinfo=None).isoformat(timespec="seconds")
+        _, is_new = append(conn, records, at,
+                           source=f"git:{sha[:12]}")
+        seen += 1
+        new += is_new
+    return seen, new
+
+
+# ---------- Lesen ----------
+
+def query(conn: sqlite3.Connection, klasse: str | None = None, lehrkraft: str | None = None,
+          stunde: int | None = None, datum_from: str | None = None, datum_to: str | None = None,
+          all_versions: bool = False, limit: int | None = None) -> list[dict]:
+    """Zeilen nach Klasse/Lehrkraft (Token, ohne Groß-/Kleinschreibung), Stunde und Datumsbereich.
+
+    Standard: je Tag nur die jüngste Fassung. all_versions=True liefert jede gespeicherte
+    Fassung mit ihrem Scrape-Zeitpunkt (scraped_at)."""
+    sql = ["SELECT r.*, s.first_seen AS scraped_at FROM rows r JOIN snapshots s ON s.id = r.snapshot_id"]
+    where, params = [], []
+    if not all_versions:
+        sql.append("JOIN day_latest d ON d.datum_iso = r.datum_iso AND d.snapshot_id = r.snapshot_id")
+    for kind, value in (("klasse", klasse), ("lehrkraft", lehrkraft)):
+        if value:
+            where.append(f"r.id IN (SELECT row_id FROM row_keys WHERE kind = '{kind}' AND key = ?)")
+            params.append(value.strip().lower())
+    if stunde is not None:
+        where.append("r.stunde_num = ?")
+        params.append(stunde)
+    if datum_from:
+        where.append("r.datum_iso >= ?")
+        params.append(datum_iso(datum_from) or datum_from)
+    if datum_to:
+        where.append("r.datum_iso <= ?")
+        params.append(datum_iso(datum_to) or datum_to)
+    if where:
+        sql.append("WHERE " + " AND ".join(where))
+    sql.append("ORDER BY r.datum_iso, s.first_seen, r.gruppe, r.stunde_num, r.id")
+    if limit:
+        sql.append("LIMIT ?")
+        params.append(limit)
+    out = []
+    for row in conn.execute(" ".join(sql), params):
+        rec = {k: row[k] for k in FIELDS}
+        rec["scraped_at"] = row["scraped_at"]
+        out.append(rec)
+    return out
+
+
+def stats(conn: sqlite3.Connection) -> dict:
+    one = lambda q: conn.execute(q).fetchone()[0]  # noqa: E731
+    return {
+        "snapshots": one("SELECT COUNT(*) FROM snapshots"),
+        "captures": one("SELECT COUNT(*) FROM captures"),
+        "rows": one("SELECT COUNT(*) FROM rows"),
+        "days": one("SELECT COUNT(*) FROM day_latest"),
+        "first_day": one("SELECT MIN(datum_iso) FROM day_latest"),
+        "last_day": one("SELECT MAX(datum_iso) FROM day_latest"),
+        "last_capture": one("SELECT MAX(scraped_at) FROM captures"),
+    }
+
+
+# ---------- Aufbewahrung ----------
+
+def compact(conn: sqlite3.Connection, keep_days: int = 14, max_age_days: int | None = None,
+            now: datetime | None = None, vacuum: bool = False) -> dict:
+    """Stände älter als keep_days → nur noch die letzte Fassung je Tag;
+    Tage älter als max_age_days → ganz entfernt. Der jüngste Stand bleibt immer erhalten."""
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=keep_days)).isoformat(timespec="seconds")
+    before = stats(conn)
+    with conn:
+        latest = conn.execute("SELECT id FROM snapshots ORDER BY first_seen DESC, id DESC LIMIT 1").fetchone()
+        latest_id = latest[0] if latest else -1
+        if max_age_days is not None:
+            day_cutoff = (now - timedelta(days=max_age_days)).date().isoformat()
+            conn.execute("DELETE FROM day_latest WHERE datum_iso < ?", (day_cutoff,))
+            conn.execute("DELETE FROM rows WHERE datum_iso < ? AND snapshot_id != ?", (day_cutoff, latest_id))
+        # überholte Fassungen alter Stände
+        conn.execute(
+            "DELETE FROM rows WHERE snapshot_id IN (SELECT id FROM snapshots WHERE last_seen < ? AND id != ?) "
+            "AND NOT EXISTS (SELECT 1 FROM day_latest d WHERE d.datum_iso = rows.datum_iso "
+            "AND d.snapshot_id = rows.snapshot_id)",
+            (cutoff, latest_id),
+        )
+        conn.execute(
+            "DELETE FROM snapshots WHERE id != ? AND last_seen < ? "
+            "AND NOT EXISTS (SELECT 1 FROM rows WHERE rows.snapshot_id = snapshots.id)",
+            (latest_id, cutoff),
+        )
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    if vacuum:
+        conn.execute("VACUUM")
+    after = stats(conn)
+    return {k: (before[k], after[k]) for k in ("snapshots", "captures", "rows", "days")}
+
+
+# ---------- CLI ----------
+
+def _print_rows(rows: list[dict], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    for r in rows:
+        print(f"{r['datum'] or '':<10}  {r['klasse'][:28]:<28}  {r['stunde']:>6}  {plain(r['fach'])[:12]:<12}  "
+              f"{plain(r['lehrkraft'])[:14]:<14}  {plain(r['text'])}")
+    print(f"({len(rows)} Zeilen)", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Historischer Speicher für normalisierte Vertretungen.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="SQLite-Datei (default: %(default)s)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("add", help="normalisiertes JSON anhängen")
+    p.add_argument("json", type=Path, nargs="?", default=Path("untis_subst_normalized.json"))
+    p.add_argument("--at", help="Scrape-Zeitpunkt (ISO); default: mtime der Datei")
+
+    p = sub.add_parser("backfill-git", help="alle Git-Stände einer JSON-Datei übernehmen")
+    p.add_argument("path", nargs="?", default="docs/untis_subst_normalized.json")
+
+    p = sub.add_parser("query", help="Zeilen abfragen")
+    p.add_argument("-c", "--class", dest="klasse")
+    p.add_argument("-l", "--lehrkraft")
+    p.add_argument("--stunde", type=int)
+    p.add_argument("--from", dest="datum_from", help="ab Datum (TT.MM.JJJJ oder JJJJ-MM-TT)")
+    p.add_argument("--to", dest="datum_to", help="bis Datum (einschließlich)")
+    p.add_argument("--all-versions", action="store_true", help="jede gespeicherte Fassung statt nur der jüngsten")
+    p.add_argument("--limit", type=int)
+    p.add_argument("--json", action="store_true", help="als JSON ausgeben")
+
+    p = sub.add_parser("compact", help="Aufbewahrung anwenden")
+    p.add_argument("--keep-days", type=int, default=14,
+                   help="alle Fassungen so lange behalten, danach nur die letzte je Tag (default: %(default)s)")
+    p.add_argument("--max-age-days", type=int, help="Tage vor diesem Alter ganz löschen")
+    p.add_argument("--vacuum", action="store_true", help="Datei anschließend verkleinern")
+
+    sub.add_parser("stats", help="Überblick")
+    args = ap.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        if args.cmd == "add":
+            sid, is_new = append_json(conn, args.json, args.at)
+            print(f"OK. Stand #{sid} {'neu angelegt' if is_new else 'unverändert, Zeitpunkt vermerkt'} → {args.db}")
+        elif args.cmd == "backfill-git":
+            seen, new = backfill_git(conn, args.path)
+            print(f"OK. {seen} Git-Stände gelesen, {new} neue Stände → {args.db}")
+        elif args.cmd == "query":
+            rows = query(conn, args.klasse, args.lehrkraft, args.stunde, args.datum_from, args.datum_to,
+                         args.all_versions, args.limit)
+            _print_rows(rows, args.json)
+        elif args.cmd == "compact":
+            res = compact(conn, args.keep_days, args.max_age_days, vacuum=args.vacuum)
+            print("OK. " + ", ".join(f"{k}: {a} → {b}" for k, (a, b) in res.items()))
+        elif args.cmd == "stats":
+            print(json.dumps(stats(conn), ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# untis_text.py
+# Klartext- und Zeilen-Hilfen für normalisierte Vertretungen, nur Standardbibliothek.
+# Gemeinsame Grundlage für untis_normalize, untis_search, untis_delta, untis_serve und
+# untis_store, ohne dass dafür der SQLite-Speicher geladen wird.
+#
+# Beispiele:
+#   plain("<s>Mül</s> Ma")          → "Mül Ma"
+#   tokens("Klassen: 10a, 10b")     → ["10a", "10b"]
+#   datum_iso("31.10.2025")         → "2025-10-31"
+
+from __future__ import annotations
+
+import hashlib
+import html
+import json
+import re
+
+FIELDS = ["gruppe", "datum", "quelle_table_index", "klasse", "stunde", "fach", "lehrkraft", "text"]
+
+TAG_RE = re.compile(r"<[^>]+>")
+TOKEN_RE = re.compile(r"[,\s;/|()]+")
+
+
+def datum_iso(datum: str | None) -> str | None:
+    """'31.10.2025' → '2025-10-31'; ISO wird durchgereicht; sonst None."""
+    s = (datum or "").strip()
+    m = re.fullmatch(r"(\d{1,2})\.(\d{1,2})\.(\d{4})", s)
+    if m:
+        return f"{m.group(3)}-{int(m.group(2)):02d}-{int(m.group(1)):02d}"
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", s):
+        return s
+    return None
+
+
+def plain(value: str | None) -> str:
+    """Klartext der (sanitisierten) Zell-HTML: nur s/del/b/strong/span/br kommen vor."""
+    return " ".join(html.unescape(TAG_RE.sub(" ", value or "")).split())
+
+
+def tokens(value: str) -> list[str]:
+    s = value.strip()
+    if s.startswith("Klassen:"):
+        s = s[len("Klassen:"):]
+    return sorted({t for t in TOKEN_RE.split(s.lower()) if t})
+
+
+def content_hash(records: list[dict]) -> str:
+    data = json.dumps([{k: r.get(k) for k in FIELDS} for r in records], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()